@@ -0,0 +1 @@
+"""Benchmarks of the data merging, YAML loading and TOML merging functions, run with `make benchmark`."""
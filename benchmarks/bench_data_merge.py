@@ -0,0 +1,191 @@
+"""
+Compare the time and memory used by the data merging functions with copying implementations.
+
+Run from the repository root:
+
+    python benchmarks/bench_data_merge.py
+"""
+
+import copy
+import sys
+import timeit
+import tracemalloc
+from collections import OrderedDict
+from functools import reduce
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Tuple
+
+from immutabledict import immutabledict
+
+from cookie_composer import data_merge
+
+
+def unordered_merge_iterables(iter1: Iterable, iter2: Iterable) -> set:
+    """`merge_iterables` freezing every item into a set."""
+    from itertools import chain
+
+    return set(chain(recursive_freeze_data(iter1), recursive_freeze_data(iter2)))
+
+
+def recursive_freeze_data(obj: Any) -> Any:
+    """`freeze_data` implemented recursively."""
+    if isinstance(obj, (str, int, float, bytes, type(None), bool)):
+        return obj
+    elif isinstance(obj, tuple) and type(obj) != tuple:
+        return type(obj)(*(recursive_freeze_data(i) for i in obj))
+    elif isinstance(obj, (tuple, list)):
+        return tuple(recursive_freeze_data(i) for i in obj)
+    elif isinstance(obj, (dict, OrderedDict, immutabledict)):
+        return immutabledict({k: recursive_freeze_data(v) for k, v in obj.items()})
+    elif isinstance(obj, (set, frozenset)):
+        return frozenset(recursive_freeze_data(i) for i in obj)
+    raise ValueError(obj)
+
+
+def copying_deep_merge(*dicts: dict) -> dict:
+    """`deep_merge` copying every value from the right-hand side."""
+
+    def merge_into(d1: dict, d2: dict) -> dict:
+        for key in d2:
+            if key not in d1 or not isinstance(d1[key], dict):
+                d1[key] = copy.deepcopy(d2[key])
+            else:
+                d1[key] = merge_into(d1[key], d2[key])
+        return d1
+
+    return reduce(merge_into, dicts, {})
+
+
+def copying_comprehensive_merge(*args: MutableMapping) -> Any:
+    """`comprehensive_merge` copying every value from the right-hand side."""
+    dict_types = (dict, OrderedDict, immutabledict)
+    iterable_types = (list, set, tuple)
+
+    def merge_into(d1: Any, d2: Any) -> Any:
+        if isinstance(d1, dict_types) and isinstance(d2, dict_types):
+            if isinstance(d1, OrderedDict) or isinstance(d2, OrderedDict):
+                od1: MutableMapping[Any, Any] = OrderedDict(d1)
+                od2: MutableMapping[Any, Any] = OrderedDict(d2)
+            else:
+                od1 = dict(d1)
+                od2 = dict(d2)
+
+            for key in od2:
+                od1[key] = merge_into(od1[key], od2[key]) if key in od1 else copy.deepcopy(od2[key])
+            return od1
+        elif isinstance(d1, list) and isinstance(d2, iterable_types):
+            return list(unordered_merge_iterables(d1, d2))
+        elif isinstance(d1, set) and isinstance(d2, iterable_types):
+            return unordered_merge_iterables(d1, d2)
+        elif isinstance(d1, tuple) and isinstance(d2, iterable_types):
+            return tuple(unordered_merge_iterables(d1, d2))
+        else:
+            return copy.deepcopy(d2)
+
+    return reduce(merge_into, args, {})
+
+
+def make_spec(num_paths: int, prefix: str) -> dict:
+    """Make an OpenAPI-like document with `num_paths` paths."""
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": f"{prefix} API", "version": "1.0.0"},
+        "paths": {
+            f"/{prefix}/{i}": {
+                "get": {
+                    "summary": f"Get {prefix} {i}",
+                    "parameters": [{"name": "id", "in": "path", "required": True}],
+                    "responses": {
+                        "200": {
+                            "description": "OK",
+                            "content": {"application/json": {"schema": {"type": "object", "title": f"{prefix}{i}"}}},
+                        }
+                    },
+                }
+            }
+            for i in range(num_paths)
+        },
+    }
+
+
+def make_dependencies(num_dependencies: int, prefix: str) -> list:
+    """Make a list of dependency records, like the hooks of a pre-commit configuration."""
+    return [
+        {"repo": f"https://github.com/{prefix}/{i}", "hooks": [{"id": f"{prefix}-{i}"}]}
+        for i in range(num_dependencies)
+    ]
+
+
+def make_deep_document(depth: int, leaf: str) -> dict:
+    """Make a document nested `depth` levels deep."""
+    document: Any = leaf
+    for _ in range(depth):
+        document = {"child": document, "tags": [leaf]}
+    return document
+
+
+def make_wide_document(width: int, prefix: str) -> dict:
+    """Make a document with `width` keys, each with a small nested value."""
+    return {f"key{i}": {"value": f"{prefix}{i}", "tags": [prefix]} for i in range(width)}
+
+
+def measure(func: Callable[..., Any], *args: Any, number: int = 5) -> Dict[str, float]:
+    """Return the mean time in milliseconds and the peak memory in KiB of calling the function."""
+    elapsed = timeit.timeit(lambda: func(*args), number=number) / number
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_ms": elapsed * 1000, "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    """Print a comparison table."""
+    existing = make_spec(2000, "pets")
+    new = make_spec(200, "owners")
+    new["info"] = {"description": "Merged"}
+
+    print(f"{'function':<45} {'time (ms)':>10} {'peak (KiB)':>12}")
+    merge_functions: List[Tuple[str, Callable[..., Any]]] = [
+        ("deep_merge (copying)", copying_deep_merge),
+        ("deep_merge", data_merge.deep_merge),
+        ("comprehensive_merge (copying)", copying_comprehensive_merge),
+        ("comprehensive_merge", data_merge.comprehensive_merge),
+    ]
+    for name, func in merge_functions:
+        result = measure(func, existing, new)
+        print(f"{name:<45} {result['time_ms']:>10.2f} {result['peak_kib']:>12.1f}")
+
+    existing_dependencies = make_dependencies(2000, "existing")
+    new_dependencies = existing_dependencies[:1000] + make_dependencies(500, "new")
+    iterable_functions: List[Tuple[str, Callable[..., Any]]] = [
+        ("merge_iterables (unordered)", unordered_merge_iterables),
+        ("merge_iterables", data_merge.merge_iterables),
+    ]
+    for name, func in iterable_functions:
+        result = measure(func, existing_dependencies, new_dependencies)
+        print(f"{name:<45} {result['time_ms']:>10.2f} {result['peak_kib']:>12.1f}")
+
+    # The copying implementations are recursive, so they need a higher recursion limit for deep documents
+    sys.setrecursionlimit(100_000)
+    for label, existing_document, new_document in [
+        ("10k deep", make_deep_document(10_000, "existing"), make_deep_document(10_000, "new")),
+        ("10k wide", make_wide_document(10_000, "existing"), make_wide_document(10_000, "new")),
+    ]:
+        document_functions: List[Tuple[str, Callable[..., Any]]] = [
+            (f"deep_merge {label} (copying)", copying_deep_merge),
+            (f"deep_merge {label}", data_merge.deep_merge),
+            (f"comprehensive_merge {label} (copying)", copying_comprehensive_merge),
+            (f"comprehensive_merge {label}", data_merge.comprehensive_merge),
+            (f"freeze_data {label} (recursive)", recursive_freeze_data),
+            (f"freeze_data {label}", data_merge.freeze_data),
+        ]
+        for name, func in document_functions:
+            args = (existing_document,) if name.startswith("freeze_data") else (existing_document, new_document)
+            result = measure(func, *args)
+            print(f"{name:<45} {result['time_ms']:>10.2f} {result['peak_kib']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare the throughput of parsing, merging and serializing TOML with the toml package and with the TOML backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_toml
+"""
+
+import timeit
+from functools import partial
+from typing import Callable, Dict, Tuple
+
+import toml
+
+from cookie_composer import toml_backend
+from cookie_composer.data_merge import comprehensive_merge
+
+from .fixtures import SAMPLES_DIR
+
+TextPair = Tuple[str, str]
+"""The text of an existing TOML file and a TOML file to merge into it."""
+
+
+def make_cargo_manifest(num_dependencies: int, prefix: str) -> str:
+    """Make a Cargo.toml-like document with comments and `num_dependencies` dependency tables."""
+    lines = ["# Generated manifest", "[package]", f'name = "{prefix}"', 'version = "0.1.0"  # Bumped on release', ""]
+    for i in range(num_dependencies):
+        lines.extend([f"[dependencies.{prefix}-crate-{i}]", f'version = "1.{i}"', 'features = ["std", "serde"]', ""])
+    return "\n".join(lines)
+
+
+def toml_package_merge(texts: TextPair) -> str:
+    """Parse, merge and serialize with the toml package."""
+    existing, new = texts
+    return toml.dumps(comprehensive_merge(toml.loads(existing), toml.loads(new)))
+
+
+def backend_merge(texts: TextPair, writer: str) -> str:
+    """Parse, merge and serialize with the TOML backend, keeping the existing layout if the writer can."""
+    existing, new = texts
+    merged = comprehensive_merge(toml_backend.loads(existing), toml_backend.loads(new))
+    return toml_backend.dumps(merged, existing, writer=writer)
+
+
+def compare(texts: TextPair, number: int = 3) -> Dict[str, float]:
+    """Return the best time in milliseconds of the toml package and of the backend with each installed writer."""
+    implementations: Dict[str, Callable[[TextPair], str]] = {"toml": toml_package_merge}
+    writers = {toml_backend.TOML, toml_backend.get_writer()}
+    for writer in sorted(writers):
+        implementations[f"{toml_backend.get_parser()[0]} + {writer}"] = partial(backend_merge, writer=writer)
+    return {
+        name: min(timeit.repeat(partial(func, texts), repeat=number, number=1)) * 1000
+        for name, func in implementations.items()
+    }
+
+
+def main() -> None:
+    """Print a comparison table."""
+    documents = {
+        "pyproject": (
+            (SAMPLES_DIR / "pyproject-base.toml").read_text(),
+            (SAMPLES_DIR / "pyproject-layer.toml").read_text(),
+        ),
+        "Cargo.toml (2k dependencies)": (make_cargo_manifest(2000, "base"), make_cargo_manifest(200, "layer")),
+    }
+
+    print(f"{'document':<30} {'implementation':<20} {'time (ms)':>10} {'KiB/s':>10}")
+    for name, texts in documents.items():
+        size_kib = sum(len(text.encode("utf-8")) for text in texts) / 1024
+        for implementation, elapsed in compare(texts).items():
+            print(f"{name:<30} {implementation:<20} {elapsed:>10.2f} {size_kib / elapsed * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
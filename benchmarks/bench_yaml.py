@@ -0,0 +1,75 @@
+"""
+Compare the time used to load YAML with each installed YAML backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_yaml
+"""
+
+import io
+import timeit
+from functools import partial
+from typing import Any, Dict, List
+
+from cookie_composer import yaml_backend
+
+from .fixtures import SAMPLES_DIR
+
+
+def make_composition(num_layers: int, context_size: int) -> List[dict]:
+    """Make the documents of a rendered composition file with large contexts."""
+    return [
+        {
+            "template": f"https://github.com/example/template-{i}",
+            "directory": f"layers/{i}",
+            "checkout": "main",
+            "commit": f"{i:040x}",
+            "merge_strategies": {"*.yaml": "comprehensive", "*.json": "nested-overwrite"},
+            "context": {f"option_{j}": [f"value {j}", j, j % 2 == 0, None, j / 3] for j in range(context_size)},
+        }
+        for i in range(num_layers)
+    ]
+
+
+def dump_all(documents: List[Any]) -> str:
+    """Serialize the documents to a YAML stream."""
+    stream = io.StringIO()
+    yaml_backend.dump_all_yaml(documents, stream)
+    return stream.getvalue()
+
+
+def compare_backends(text: str, number: int = 3) -> Dict[str, float]:
+    """
+    Return the best time in milliseconds to load the YAML stream with each installed backend.
+
+    Raises:
+        ValueError: If a backend loads different data than the pure-Python loader
+    """
+    expected = yaml_backend.load_all_yaml(text, yaml_backend.PURE_PYTHON)
+    timings = {}
+    for backend in yaml_backend.get_available_backends():
+        if yaml_backend.load_all_yaml(text, backend) != expected:
+            raise ValueError(f"The {backend} backend loaded different data.")
+        timer = timeit.Timer(partial(yaml_backend.load_all_yaml, text, backend))
+        timings[backend] = min(timer.repeat(repeat=number, number=1)) * 1000
+    return timings
+
+
+def main() -> None:
+    """Print a comparison table."""
+    streams = {
+        "composition (40 layers)": dump_all(make_composition(40, 200)),
+        "merge target (deployment)": (SAMPLES_DIR / "deployment-base.yaml").read_text(),
+        "merge target (10k keys)": dump_all([{f"key{i}": {"value": i, "tags": ["a", "b"]} for i in range(10_000)}]),
+    }
+
+    print(f"{'stream':<30} {'backend':<16} {'time (ms)':>10} {'speedup':>8}")
+    for name, text in streams.items():
+        timings = compare_backends(text)
+        for backend, elapsed in timings.items():
+            speedup = timings[yaml_backend.PURE_PYTHON] / elapsed
+            print(f"{name:<30} {backend:<16} {elapsed:>10.2f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Generated and sample documents for the benchmarks."""
+
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+SAMPLES_DIR = Path(__file__).parent / "samples"
+
+DocumentPair = Tuple[Any, Any]
+"""An existing document and a new document to merge into it."""
+
+
+def make_wide(width: int) -> DocumentPair:
+    """Documents with `width` keys, half of them in both documents."""
+    existing = {f"key{i}": {"value": i, "tags": ["existing"]} for i in range(width)}
+    new = {f"key{i}": {"value": -i, "tags": ["new"]} for i in range(width // 2, width + width // 2)}
+    return existing, new
+
+
+def make_deep(depth: int) -> DocumentPair:
+    """Documents nested `depth` levels deep along the same path."""
+    existing: Any = "existing"
+    new: Any = "new"
+    for level in range(depth):
+        existing = {"child": existing, "level": level, "tags": ["existing"]}
+        new = {"child": new, "tags": ["new"]}
+    return existing, new
+
+
+def make_list(size: int) -> DocumentPair:
+    """Documents with a list of `size` strings, half of them in both lists."""
+    existing = {"dependencies": [f"package-{i}>=1.0" for i in range(size)]}
+    new = {"dependencies": [f"package-{i}>=1.0" for i in range(size // 2, size + size // 2)]}
+    return existing, new
+
+
+def make_records(size: int) -> DocumentPair:
+    """Documents with a list of `size` records identified by `name`, half of them in both lists."""
+    existing = {"services": [{"name": f"service-{i}", "image": "app:1", "ports": [i]} for i in range(size)]}
+    new = {
+        "services": [{"name": f"service-{i}", "image": "app:2", "env": {"DEBUG": "1"}} for i in range(size // 2, size)]
+    }
+    return existing, new
+
+
+def load_sample(name: str) -> DocumentPair:
+    """Load the `<name>-base` and `<name>-layer` sample files."""
+    from cookie_composer.merge_files.json_file import read_json
+    from cookie_composer.merge_files.toml_file import read_toml
+    from cookie_composer.merge_files.yaml_file import read_yaml
+
+    readers = {".json": read_json, ".toml": read_toml, ".yaml": read_yaml}
+    base_path = next(SAMPLES_DIR.glob(f"{name}-base.*"))
+    layer_path = SAMPLES_DIR / f"{name}-layer{base_path.suffix}"
+    reader = readers[base_path.suffix]
+    return reader(base_path), reader(layer_path)
+
+
+def get_fixtures(scale: float = 1.0) -> Dict[str, Callable[[], DocumentPair]]:
+    """
+    Return the fixtures by name.
+
+    Args:
+        scale: Multiplies the sizes of the generated fixtures, to make quick runs
+
+    Returns:
+        A function returning each fixture, by name
+    """
+
+    def scaled(size: int) -> int:
+        return max(1, int(size * scale))
+
+    fixtures: Dict[str, Callable[[], DocumentPair]] = {}
+    for width in (100, 1_000, 10_000):
+        fixtures[f"wide-{width}"] = partial(make_wide, scaled(width))
+    for depth in (10, 100, 1_000, 10_000):
+        fixtures[f"deep-{depth}"] = partial(make_deep, scaled(depth))
+    for size in (100, 1_000, 10_000):
+        fixtures[f"list-{size}"] = partial(make_list, scaled(size))
+        fixtures[f"records-{size}"] = partial(make_records, scaled(size))
+    for sample in ("pyproject", "package", "deployment"):
+        fixtures[sample] = partial(load_sample, sample)
+    return fixtures
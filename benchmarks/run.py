@@ -0,0 +1,177 @@
+"""
+Benchmark the data merging functions.
+
+Run from the repository root:
+
+    python -m benchmarks.run                          # Run every benchmark
+    python -m benchmarks.run -k records               # Only run benchmarks with "records" in their name
+    python -m benchmarks.run --scale 0.1              # Shrink the generated fixtures for a quick run
+    python -m benchmarks.run --save baseline.json     # Save the results
+    python -m benchmarks.run --compare baseline.json  # Compare with saved results, failing on regressions
+
+Benchmark names are `<function or strategy>/<fixture>`. The fixture names keep their unscaled sizes.
+
+Each benchmark reports the best time of a call, and the peak memory traced by `tracemalloc` during a call.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cookie_composer import data_merge
+from cookie_composer.data_merge import (
+    COMPREHENSIVE,
+    DEFAULT_RECORD_KEYS,
+    KEYED_COMPREHENSIVE,
+    NESTED_OVERWRITE,
+    OVERWRITE,
+    Context,
+)
+
+from .fixtures import DocumentPair, get_fixtures
+
+Result = Dict[str, Any]
+
+STRATEGY_FUNCTIONS: Dict[str, Callable[[Any, Any], Any]] = {
+    OVERWRITE: lambda existing, new: {**existing, **new},
+    NESTED_OVERWRITE: data_merge.deep_merge,
+    COMPREHENSIVE: data_merge.comprehensive_merge,
+    KEYED_COMPREHENSIVE: lambda existing, new: data_merge.comprehensive_merge(
+        existing, new, record_keys=DEFAULT_RECORD_KEYS
+    ),
+}
+"""How the merge functions merge data for each merge strategy."""
+
+BENCHMARK_KINDS = [
+    *(f"merge[{strategy}]" for strategy in STRATEGY_FUNCTIONS),
+    "freeze_data",
+    "Context.flatten",
+    "Context.flatten (cached)",
+]
+"""The kinds of benchmarks run for each fixture."""
+
+
+def flatten_new_context(existing: Any, new: Any) -> Any:
+    """Flatten a context with a child, as done when prompting for each layer."""
+    return Context(existing).new_child(new).flatten()
+
+
+def get_benchmarks(documents: DocumentPair) -> Dict[str, Callable[[], Any]]:
+    """Return the benchmarks of a fixture, by kind."""
+    existing, new = documents
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        f"merge[{strategy}]": partial(func, existing, new) for strategy, func in STRATEGY_FUNCTIONS.items()
+    }
+    benchmarks["freeze_data"] = lambda: data_merge.freeze_data(existing)
+    benchmarks["Context.flatten"] = lambda: flatten_new_context(existing, new)
+    benchmarks["Context.flatten (cached)"] = Context(existing).new_child(new).flatten
+    return benchmarks
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Result:
+    """Return the best time in microseconds and the peak memory in KiB of calling the function."""
+    try:
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        elapsed = min(timer.repeat(repeat=repeat, number=number)) / number
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except (RecursionError, ValueError, TypeError) as e:
+        return {"error": type(e).__name__}
+
+    return {"time_us": elapsed * 1_000_000, "peak_kib": peak / 1024}
+
+
+def run_benchmarks(
+    name_filter: Optional[str] = None, scale: float = 1.0, repeat: int = 3
+) -> Iterator[Tuple[str, Result]]:
+    """
+    Run the benchmarks.
+
+    Args:
+        name_filter: Only run benchmarks containing this string in their name
+        scale: Multiplies the sizes of the generated fixtures
+        repeat: The number of timing runs, of which the best is reported
+
+    Yields:
+        The name and result of each benchmark
+    """
+    for fixture_name, make_fixture in get_fixtures(scale).items():
+        names = {kind: f"{kind}/{fixture_name}" for kind in BENCHMARK_KINDS}
+        selected = [kind for kind, name in names.items() if not name_filter or name_filter in name]
+        if not selected:
+            continue
+
+        benchmarks = get_benchmarks(make_fixture())
+        for kind in selected:
+            yield names[kind], measure(benchmarks[kind], repeat)
+
+
+def format_result(name: str, result: Result, baseline: Optional[Result] = None) -> str:
+    """Format a result as a row of the report."""
+    if "error" in result:
+        return f"{name:<55} {result['error']:>12}"
+
+    row = f"{name:<55} {result['time_us']:>12.1f} {result['peak_kib']:>12.1f}"
+    if baseline and "time_us" in baseline:
+        row += f" {result['time_us'] / baseline['time_us']:>9.2f}x"
+    return row
+
+
+def get_regressions(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> List[str]:
+    """Return the names of the benchmarks that are slower than the baseline by more than the threshold."""
+    return [
+        name
+        for name, result in results.items()
+        if "time_us" in result
+        and "time_us" in baseline.get(name, {})
+        and result["time_us"] > baseline[name]["time_us"] * threshold
+    ]
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and print a report."""
+    parser = argparse.ArgumentParser(description="Benchmark cookie_composer.data_merge")
+    parser.add_argument("-k", dest="name_filter", help="Only run benchmarks containing this string in their name")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the sizes of the generated fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of timing runs")
+    parser.add_argument("--save", type=Path, help="Save the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Compare the results with this JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="The slowdown ratio reported as a regression by --compare"
+    )
+    options = parser.parse_args(args)
+
+    baseline: Dict[str, Result] = json.loads(options.compare.read_text()) if options.compare else {}
+    header = f"{'benchmark':<55} {'time (µs)':>12} {'peak (KiB)':>12}"
+    print(header + (f" {'vs base':>10}" if baseline else ""))
+
+    results = {}
+    for name, result in run_benchmarks(options.name_filter, options.scale, options.repeat):
+        results[name] = result
+        print(format_result(name, result, baseline.get(name)), flush=True)
+
+    if options.save:
+        options.save.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    regressions = get_regressions(results, baseline, options.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks are more than {options.threshold:.2f}x slower than the baseline:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
 """This overrides the default cookie cutter environment."""
 
 import json
-from typing import Any, List, MutableMapping, Optional
-
+import shutil
+from contextlib import contextmanager
+from functools import lru_cache
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Iterator, List, MutableMapping, Optional, Union
+
+from cookiecutter.config import get_user_config
 from cookiecutter.environment import StrictEnvironment
 from cookiecutter.exceptions import UndefinedVariableInTemplate
 from cookiecutter.prompt import (
@@ -13,8 +19,10 @@ from cookiecutter.prompt import (
     render_variable,
 )
 from jinja2 import Environment, UndefinedError
+from jinja2.bccache import Bucket, FileSystemBytecodeCache
 from jinja2.ext import Extension
 
+from cookie_composer import file_writes
 from cookie_composer.data_merge import Context
 
 
@@ -38,6 +46,152 @@ class JsonifyContextExtension(Extension):
         environment.filters["jsonify"] = jsonify
 
 
+class ContentHashBytecodeCache(FileSystemBytecodeCache):
+    """
+    A persistent Jinja bytecode cache keyed by the content of the templates.
+
+    Jinja keys cached bytecode by the template's file name. Templates are rendered from a new temporary
+    directory every time, so the cache key also uses the template source and the environment configuration.
+    Rendering the same template version again reuses the compiled bytecode.
+    """
+
+    def get_bucket(self, environment: Environment, name: str, filename: Optional[str], source: str) -> Bucket:
+        """Return a cache bucket for the template."""
+        checksum = self.get_source_checksum(source)
+        key_parts = [name, filename or "", checksum, environment_fingerprint(environment)]
+        key = sha1("|".join(key_parts).encode("utf-8")).hexdigest()  # noqa: S324
+        bucket = Bucket(environment, key, checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+
+def environment_fingerprint(environment: Environment) -> str:
+    """Return a string representing the environment settings that change how a template compiles."""
+    settings = [
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        environment.line_statement_prefix,
+        environment.line_comment_prefix,
+        environment.trim_blocks,
+        environment.lstrip_blocks,
+        environment.newline_sequence,
+        environment.keep_trailing_newline,
+        environment.optimized,
+        repr(environment.autoescape),
+        sorted(environment.extensions),
+    ]
+    return repr(settings)
+
+
+_active_bytecode_cache: Optional[ContentHashBytecodeCache] = None
+"""The bytecode cache resolved by the current `use_bytecode_cache` block."""
+
+
+@lru_cache(maxsize=None)
+def _bytecode_cache_for(directory: Path) -> ContentHashBytecodeCache:
+    """Return the bytecode cache stored in a directory."""
+    directory.mkdir(parents=True, exist_ok=True)
+    return ContentHashBytecodeCache(str(directory))
+
+
+def get_bytecode_cache() -> ContentHashBytecodeCache:
+    """
+    Return the bytecode cache shared by all the Jinja environments, stored in the cookiecutters directory.
+
+    Inside a [use_bytecode_cache][cookie_composer.cc_overrides.use_bytecode_cache] block, the cache it resolved is
+    returned without reading the user config again.
+    """
+    if _active_bytecode_cache is not None:
+        return _active_bytecode_cache
+    user_config = get_user_config()
+    return _bytecode_cache_for(Path(user_config["cookiecutters_dir"]).expanduser().resolve() / ".jinja-bytecode")
+
+
+def create_env_with_context(context: MutableMapping[str, Any]) -> Environment:
+    """Cookiecutter's `create_env_with_context` using the shared bytecode cache."""
+    from cookiecutter.utils import create_env_with_context as cookiecutter_create_env_with_context
+
+    env = cookiecutter_create_env_with_context(context)
+    env.bytecode_cache = get_bytecode_cache()
+    return env
+
+
+@contextmanager
+def use_bytecode_cache(bytecode_cache: Optional[ContentHashBytecodeCache] = None) -> Iterator[None]:
+    """
+    Use one bytecode cache for all the Jinja environments created in the block.
+
+    The cache is resolved once, when entering the block, and is also used by the environments cookiecutter creates
+    while generating files. Nested blocks keep the cache of the outer block.
+
+    Args:
+        bytecode_cache: The cache to use. Defaults to the cache of the outer block, or the one in the cookiecutters
+            directory.
+    """
+    global _active_bytecode_cache  # noqa: PLW0603
+    import cookiecutter.generate
+
+    original_bytecode_cache = _active_bytecode_cache
+    original_create_env_with_context = cookiecutter.generate.create_env_with_context
+    _active_bytecode_cache = bytecode_cache or get_bytecode_cache()
+    cookiecutter.generate.create_env_with_context = create_env_with_context
+    try:
+        yield
+    finally:
+        cookiecutter.generate.create_env_with_context = original_create_env_with_context
+        _active_bytecode_cache = original_bytecode_cache
+
+
+class ReflinkShutil:
+    """
+    The `shutil` functions cookiecutter uses to generate files, copying with reflinks where enabled.
+
+    Cookiecutter copies binary files and the `_copy_without_render` paths verbatim with `shutil.copyfile` and
+    `shutil.copytree`. Inside a [reflink_copies][cookie_composer.file_writes.reflink_copies] block, these copies use
+    copy-on-write clones where the file system supports them. The other attributes are the `shutil` module's.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        """Return the `shutil` module's attribute."""
+        return getattr(shutil, name)
+
+    @staticmethod
+    def copyfile(src: Union[str, Path], dst: Union[str, Path], *, follow_symlinks: bool = True) -> Union[str, Path]:
+        """Copy the data of a file, like `shutil.copyfile`, using a reflink if enabled."""
+        if file_writes.reflinks_enabled() and follow_symlinks and file_writes.clone_file(Path(src), Path(dst)):
+            return dst
+        return shutil.copyfile(src, dst, follow_symlinks=follow_symlinks)
+
+    @staticmethod
+    def copytree(src: Union[str, Path], dst: Union[str, Path], **kwargs: Any) -> Union[str, Path]:
+        """Copy a directory tree, like `shutil.copytree`, using reflinks if enabled."""
+        if file_writes.reflinks_enabled():
+            kwargs.setdefault("copy_function", file_writes.copy_file_with_metadata)
+        return shutil.copytree(src, dst, **kwargs)
+
+
+@contextmanager
+def use_reflink_copies() -> Iterator[None]:
+    """
+    Make cookiecutter copy the files it doesn't render with reflinks, if enabled, in the block.
+
+    Whether reflinks are used is checked for each copy, with
+    [reflinks_enabled][cookie_composer.file_writes.reflinks_enabled].
+    """
+    import cookiecutter.generate
+
+    original_shutil = cookiecutter.generate.shutil
+    cookiecutter.generate.shutil = ReflinkShutil()  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        cookiecutter.generate.shutil = original_shutil
+
+
 class CustomStrictEnvironment(StrictEnvironment):
     """
     Create strict Jinja2 environment.
@@ -48,6 +202,7 @@ class CustomStrictEnvironment(StrictEnvironment):
     """
 
     def __init__(self, **kwargs):
+        kwargs.setdefault("bytecode_cache", get_bytecode_cache())
         super().__init__(**kwargs)
         if "cookiecutter.extensions.JsonifyExtension" in self.extensions:  # pragma: no cover
             del self.extensions["cookiecutter.extensions.JsonifyExtension"]
@@ -110,6 +110,26 @@ def validate_context_params(ctx: Any, param: Any, value: list) -> Optional[Order
     default="all",
     help="Accept pre/host hooks",
 )
+@click.option(
+    "--parallel",
+    is_flag=True,
+    help="Resolve the context of every layer first, then generate the layers' files concurrently.",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    help="The maximum number of processes generating files with --parallel. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    help="Render the templates in a memory-backed file system, so the files are only written to disk once.",
+)
+@click.option(
+    "--reflink",
+    is_flag=True,
+    help="Copy files with copy-on-write clones (reflinks) where the file system supports them.",
+)
 @click.argument("path_or_url", type=str, required=True)
 @click.argument("context_params", nargs=-1, callback=validate_context_params)
 def create(
@@ -121,6 +141,10 @@ def create(
     default_config: bool,
     destination: Path,
     accept_hooks: str,
+    parallel: bool,
+    max_workers: Optional[int],
+    in_memory: bool,
+    reflink: bool,
     path_or_url: str,
     context_params: Optional[MutableMapping[str, Any]] = None,
 ) -> None:
@@ -136,6 +160,10 @@ def create(
         default_config,
         accept_hooks,
         initial_context=context_params or {},
+        parallel=parallel,
+        max_workers=max_workers,
+        reflink=reflink,
+        in_memory=in_memory,
     )
 
 
@@ -189,6 +217,26 @@ def create(
     default="all",
     help="Accept pre/host hooks",
 )
+@click.option(
+    "--parallel",
+    is_flag=True,
+    help="Resolve the context of every layer first, then generate the layers' files concurrently.",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    help="The maximum number of processes generating files with --parallel. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    help="Render the templates in a memory-backed file system, so the files are only written to disk once.",
+)
+@click.option(
+    "--reflink",
+    is_flag=True,
+    help="Copy files with copy-on-write clones (reflinks) where the file system supports them.",
+)
 @click.argument("path_or_url", type=str, required=True)
 @click.argument("context_params", nargs=-1, callback=validate_context_params)
 def add(
@@ -200,6 +248,10 @@ def add(
     default_config: bool,
     destination: Path,
     accept_hooks: str,
+    parallel: bool,
+    max_workers: Optional[int],
+    in_memory: bool,
+    reflink: bool,
     path_or_url: str,
     context_params: Optional[MutableMapping[str, Any]] = None,
 ) -> None:
@@ -217,6 +269,10 @@ def add(
             default_config=default_config,
             accept_hooks=accept_hooks,
             initial_context=context_params or {},
+            parallel=parallel,
+            max_workers=max_workers,
+            reflink=reflink,
+            in_memory=in_memory,
         )
     except GitError as e:
         raise click.UsageError(str(e)) from e
@@ -237,12 +293,28 @@ def add(
     type=click.Path(exists=True, dir_okay=True, file_okay=False, resolve_path=True),
     help="The directory to update. Defaults to the current working directory.",
 )
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    help="Render the templates in a memory-backed file system, so the files are only written to disk once.",
+)
+@click.option(
+    "--reflink",
+    is_flag=True,
+    help="Copy files with copy-on-write clones (reflinks) where the file system supports them.",
+)
 @click.argument("context_params", nargs=-1, callback=validate_context_params)
-def update(no_input: bool, destination: Path, context_params: Optional[OrderedDict] = None) -> None:
+def update(
+    no_input: bool,
+    destination: Path,
+    in_memory: bool,
+    reflink: bool,
+    context_params: Optional[OrderedDict] = None,
+) -> None:
     """Update the project to the latest version of each template."""
     destination = destination or Path.cwd()
     try:
-        update_cmd(destination, no_input=no_input)
+        update_cmd(destination, no_input=no_input, reflink=reflink, in_memory=in_memory)
     except GitError as e:
         raise click.UsageError(str(e)) from e
 
@@ -5,10 +5,12 @@ from pathlib import Path
 from typing import Any, MutableMapping, Optional
 
 from cookie_composer.composition import get_context_for_layer
+from cookie_composer.file_writes import track_writes
 from cookie_composer.git_commands import checkout_branch, get_repo
 from cookie_composer.io import get_composition_from_path_or_url, read_rendered_composition, write_rendered_composition
 from cookie_composer.layers import render_layers
 from cookie_composer.templates.types import get_template_name
+from cookie_composer.utils import echo
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,10 @@ def add_cmd(
     default_config: bool = False,
     accept_hooks: str = "all",
     initial_context: Optional[MutableMapping[str, Any]] = None,
+    parallel: bool = False,
+    max_workers: Optional[int] = None,
+    reflink: bool = False,
+    in_memory: bool = False,
 ) -> None:
     """
     Add a template or configuration to an existing project.
@@ -39,6 +45,10 @@ def add_cmd(
         default_config: Do not load a config file. Use the defaults instead
         accept_hooks: How to deal with pre/post hooks
         initial_context: The initial context for the composition layer
+        parallel: Generate the files of the layers concurrently, after resolving their contexts
+        max_workers: The maximum number of processes used when `parallel` is `True`
+        reflink: Copy files with copy-on-write clones (reflinks) where the file system supports them
+        in_memory: Render the layers in a memory-backed file system, so the files are only written to disk once
 
     Raises:
         GitError: If the destination_dir is not a git repository
@@ -68,7 +78,7 @@ def add_cmd(
     )
 
     # Get the merged context for all layers
-    initial_context = get_context_for_layer(proj_composition)
+    composition_context = get_context_for_layer(proj_composition)
 
     # Make sure the destination directory is a git repository
     repo = get_repo(destination_dir)
@@ -79,12 +89,18 @@ def add_cmd(
     checkout_branch(repo, branch_name)
 
     # Render and merge the additional layers
-    rendered_layers = render_layers(
-        addl_composition.layers,
-        output_dir,
-        initial_context=initial_context,
-        no_input=no_input,
-        accept_hooks=accept_hooks,
-    )
+    with track_writes() as writes:
+        rendered_layers = render_layers(
+            addl_composition.layers,
+            output_dir,
+            initial_context=composition_context,
+            no_input=no_input,
+            accept_hooks=accept_hooks,
+            parallel=parallel,
+            max_workers=max_workers,
+            reflink=reflink,
+            in_memory=in_memory,
+        )
     proj_composition.layers.extend(rendered_layers)
     write_rendered_composition(proj_composition)
+    echo(str(writes))
@@ -8,8 +8,10 @@ import click
 from git import GitError
 
 from cookie_composer.composition import RenderedComposition
+from cookie_composer.file_writes import track_writes
 from cookie_composer.io import get_composition_from_path_or_url, write_rendered_composition
 from cookie_composer.layers import render_layers
+from cookie_composer.utils import echo
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,10 @@ def create_cmd(
     default_config: bool = False,
     accept_hooks: str = "all",
     initial_context: Optional[MutableMapping[str, Any]] = None,
+    parallel: bool = False,
+    max_workers: Optional[int] = None,
+    reflink: bool = False,
+    in_memory: bool = False,
 ) -> Path:
     """
     Generate a new project from a composition file, local template or remote template.
@@ -40,6 +46,10 @@ def create_cmd(
         default_config: Do not load a config file. Use the defaults instead
         accept_hooks: Which pre/post hooks should be applied?
         initial_context: The initial context for the composition
+        parallel: Generate the files of the layers concurrently, after resolving their contexts
+        max_workers: The maximum number of processes used when `parallel` is `True`
+        reflink: Copy files with copy-on-write clones (reflinks) where the file system supports them
+        in_memory: Render the layers in a memory-backed file system, so the files are only written to disk once
 
     Raises:
         ClickException: If there is a problem cloning the repository
@@ -63,11 +73,22 @@ def create_cmd(
     except GitError as e:
         raise click.ClickException(f"Error cloning repository: {e}") from e
 
-    rendered_layers = render_layers(composition.layers, output_dir, no_input=no_input, accept_hooks=accept_hooks)
+    with track_writes() as writes:
+        rendered_layers = render_layers(
+            composition.layers,
+            output_dir,
+            no_input=no_input,
+            accept_hooks=accept_hooks,
+            parallel=parallel,
+            max_workers=max_workers,
+            reflink=reflink,
+            in_memory=in_memory,
+        )
     rendered_composition = RenderedComposition(
         layers=rendered_layers,
         render_dir=output_dir,
         rendered_name=rendered_layers[0].rendered_name,
     )
     write_rendered_composition(rendered_composition)
+    echo(str(writes))
     return rendered_composition.render_dir / rendered_composition.rendered_name
@@ -16,13 +16,17 @@ from cookie_composer.utils import (
 )
 
 
-def update_cmd(project_dir: Optional[Path] = None, no_input: bool = False) -> None:
+def update_cmd(
+    project_dir: Optional[Path] = None, no_input: bool = False, reflink: bool = False, in_memory: bool = False
+) -> None:
     """
     Update the project with the latest versions of each layer.
 
     Args:
         project_dir: The project directory to update. Defaults to current directory.
         no_input: If `True` force each layer's `no_input` attribute to `True`
+        reflink: Copy files with copy-on-write clones (reflinks) where the file system supports them
+        in_memory: Render the layers in a memory-backed file system, so the files are only written to disk once
 
     Raises:
         GitError: If the destination_dir is not a git repository
@@ -55,6 +59,8 @@ def update_cmd(project_dir: Optional[Path] = None, no_input: bool = False) -> No
         echo("All layers are up-to-date.")
         return
 
+    # Unlike create and add, don't report the write stats: the layers are rendered into empty temporary
+    # directories, so every file counts as written, and the project itself is only changed by applying the diff.
     with TemporaryDirectory() as tempdir:
         current_state_dir = Path(tempdir) / "current_state"
         current_state_dir.mkdir(exist_ok=True)
@@ -72,6 +78,8 @@ def update_cmd(project_dir: Optional[Path] = None, no_input: bool = False) -> No
             initial_context=initial_context,
             no_input=no_input,
             accept_hooks="none",
+            reflink=reflink,
+            in_memory=in_memory,
         )
         remove_paths(current_state_dir, {Path(".git")})  # don't want the .git dir, if it exists
         current_composition = update_rendered_composition_layers(proj_composition, current_rendered_layers)
@@ -87,6 +95,8 @@ def update_cmd(project_dir: Optional[Path] = None, no_input: bool = False) -> No
             initial_context=initial_context,
             no_input=no_input,
             accept_hooks="none",
+            reflink=reflink,
+            in_memory=in_memory,
         )
         remove_paths(updated_state_dir, deleted_paths)
         updated_composition = update_rendered_composition_layers(proj_composition, updated_rendered_layers)
@@ -1,8 +1,9 @@
 """Project configuration and options."""
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, List, Mapping, Optional, Tuple
 
+from immutabledict import immutabledict
 from pydantic import BaseModel, DirectoryPath
 
 from cookie_composer.data_merge import comprehensive_merge
@@ -31,13 +32,45 @@ class RenderedComposition(BaseModel):
     rendered_name: str
     """The name of the rendered project."""
 
+    _prefix_contexts: List[Tuple[RenderedLayer, Mapping[str, Any], Mapping[str, Any]]] = []
+    """By layer index, the layer and rendered context merged last, and the merged context of the layers up to it."""
+
     @property
     def layer_names(self) -> List[str]:
         """Return a list of the names of all the layers."""
         return [x.layer.layer_name for x in self.layers]
 
-
-def get_context_for_layer(composition: RenderedComposition, index: Optional[int] = None) -> dict:
+    def get_prefix_context(self, index: int) -> Mapping[str, Any]:
+        """
+        Return the merged context of the layers `0` to `index`.
+
+        The merged contexts are cached by layer index, with the layer and `rendered_context` merged last. A cached
+        context is reused while the layers up to its index, and their `rendered_context`, are the same objects.
+        So checking the cache doesn't merge or copy anything, and only the layers after a replaced, removed, or
+        added layer are merged. Changes made inside an existing `rendered_context` are not detected.
+
+        Args:
+            index: The 0-based index of the last layer to merge
+
+        Returns:
+            A read-only view of the merged context. Its nested values are shared with the cache and must not be
+            modified, so copy them before changing them.
+        """
+        num_valid = min(len(self._prefix_contexts), index + 1)
+        for position, (layer, rendered_context, _) in enumerate(self._prefix_contexts[:num_valid]):
+            if layer is not self.layers[position] or rendered_context is not layer.rendered_context:
+                del self._prefix_contexts[position:]
+                num_valid = position
+                break
+
+        merged_context: Any = self._prefix_contexts[-1][2] if self._prefix_contexts else {}
+        for layer in self.layers[num_valid : index + 1]:
+            merged_context = immutabledict(comprehensive_merge(merged_context, layer.rendered_context))
+            self._prefix_contexts.append((layer, layer.rendered_context, merged_context))
+        return self._prefix_contexts[index][2]
+
+
+def get_context_for_layer(composition: RenderedComposition, index: Optional[int] = None) -> Mapping[str, Any]:
     """
     Merge the contexts for all layers up to index.
 
@@ -48,15 +81,11 @@ def get_context_for_layer(composition: RenderedComposition, index: Optional[int]
         index: Merge the contexts of the layers up to this 0-based index. `None` to do all layers.
 
     Returns:
-        The comprehensively merged context
+        A read-only view of the comprehensively merged context. See
+            [get_prefix_context][cookie_composer.composition.RenderedComposition.get_prefix_context].
     """
-    full_context: Dict[str, Any] = {}
-    if index is None:
-        layers = composition.layers
-    else:
-        layers = composition.layers[: index + 1]
-
-    for layer in layers:
-        full_context = comprehensive_merge(full_context, layer.rendered_context)
+    num_layers = len(composition.layers) if index is None else len(composition.layers[: index + 1])
+    if num_layers == 0:
+        return immutabledict()
 
-    return full_context
+    return composition.get_prefix_context(num_layers - 1)
@@ -5,11 +5,11 @@ import logging
 from collections import ChainMap, OrderedDict
 from functools import reduce
 from pathlib import Path
-from typing import Any, Dict, Iterable, MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
 
 from immutabledict import immutabledict
 
-from cookie_composer.matching import rel_fnmatch
+from cookie_composer.matching import compile_globs
 
 logger = logging.getLogger(__name__)
 
@@ -18,81 +18,201 @@ def deep_merge(*dicts: dict) -> dict:
     """
     Merges dicts deeply.
 
+    The arguments are not modified. The result shares the values that are not changed by the merge with the
+    arguments, so copy it before modifying its nested values.
+
     Args:
         *dicts: List of dicts to merge with the first one as the base
 
     Returns:
         dict: The merged dict
+
+    Raises:
+        TypeError: If a nested dict is merged with a value that isn't a dict. Depending on the value,
+            `KeyError` or `IndexError` can be raised instead.
     """
+    # The nested dicts copied by this merge, by id, which are safe to modify
+    copies: Dict[int, dict] = {}
 
     def merge_into(d1: dict, d2: dict) -> dict:
-        for key in d2:
-            if key not in d1 or not isinstance(d1[key], dict):
-                d1[key] = copy.deepcopy(d2[key])
-            else:
-                d1[key] = merge_into(d1[key], d2[key])
+        # Nested dicts are merged from a stack instead of recursively, so deep documents do not hit the recursion limit
+        stack = [(d1, d2)]
+        while stack:
+            target, source = stack.pop()
+            for key in source:
+                if key not in target or not isinstance(target[key], dict):
+                    target[key] = source[key]
+                else:
+                    if id(target[key]) not in copies:
+                        target[key] = copy.copy(target[key])
+                        copies[id(target[key])] = target[key]
+                    stack.append((target[key], source[key]))
         return d1
 
     return reduce(merge_into, dicts, {})
 
 
-def merge_iterables(iter1: Iterable, iter2: Iterable) -> set:
+def merge_iterables(iter1: Iterable, iter2: Iterable, frozen_items: Optional[Dict[int, Any]] = None) -> list:
     """
-    Merge and de-duplicate a bunch of lists into a single list.
+    Merge and de-duplicate two iterables into a single list.
 
-    Order is not guaranteed.
+    Items keep the order in which they are first seen. Unhashable items, such as dicts and lists, are converted
+    into read-only equivalents with [freeze_data][cookie_composer.data_merge.freeze_data] so they can be compared.
 
     Args:
         iter1: An Iterable
         iter2: An Iterable
+        frozen_items: The read-only equivalents of unhashable items, by id, to reuse between merges.
+            Only pass it while the items are alive.
 
     Returns:
-        The merged, de-duplicated sequence as a set
+        The merged, de-duplicated sequence as a list
     """
     from itertools import chain
 
-    return set(chain(freeze_data(iter1), freeze_data(iter2)))
+    frozen_items = {} if frozen_items is None else frozen_items
+    return list(dict.fromkeys(_freeze_item(item, frozen_items) for item in chain(iter1, iter2)))
+
+
+def _freeze_item(item: Any, frozen_items: Dict[int, Any]) -> Any:
+    """Return the item if it is hashable, or its memoized read-only equivalent."""
+    try:
+        hash(item)
+    except TypeError:
+        if id(item) not in frozen_items:
+            frozen_items[id(item)] = freeze_data(item)
+        return frozen_items[id(item)]
+    return item
+
+
+def merge_records(
+    iter1: Iterable,
+    iter2: Iterable,
+    record_keys: Sequence[str],
+    merge_record: Callable[[Any, Any], Any],
+    frozen_items: Optional[Dict[int, Any]] = None,
+) -> list:
+    """
+    Merge two iterables, merging the records (dicts) that have the same identity.
+
+    A record's identity is the value of the first of `record_keys` it contains. A record with the same identity
+    as a previous record is merged into it with `merge_record`, keeping the position of the previous record.
+    Other items are de-duplicated like [merge_iterables][cookie_composer.data_merge.merge_iterables].
+
+    Args:
+        iter1: An Iterable
+        iter2: An Iterable
+        record_keys: The keys identifying a record, in order of preference
+        merge_record: The function merging a record into a previous record with the same identity
+        frozen_items: The read-only equivalents of unhashable items, by id, to reuse between merges.
+            Only pass it while the items are alive.
 
+    Returns:
+        The merged sequence as a list
+    """
+    from itertools import chain
 
-def comprehensive_merge(*args: MutableMapping) -> Any:  # noqa: C901
+    frozen_items = {} if frozen_items is None else frozen_items
+    merged: List[Any] = []
+    positions: Dict[Tuple[str, Any], int] = {}
+    seen_items: Dict[Any, None] = {}
+
+    for item in chain(iter1, iter2):
+        identity = _get_record_identity(item, record_keys)
+        if identity is None:
+            frozen_item = _freeze_item(item, frozen_items)
+            if frozen_item not in seen_items:
+                seen_items[frozen_item] = None
+                merged.append(frozen_item)
+        elif identity in positions:
+            position = positions[identity]
+            merged[position] = merge_record(merged[position], item)
+        else:
+            positions[identity] = len(merged)
+            merged.append(item)
+    return merged
+
+
+def _get_record_identity(item: Any, record_keys: Sequence[str]) -> Optional[Tuple[str, Any]]:
+    """Return the first record key in the item and its value, if the item is a record with a hashable key."""
+    if not isinstance(item, (dict, OrderedDict, immutabledict)):
+        return None
+    for key in record_keys:
+        if key in item:
+            try:
+                hash(item[key])
+            except TypeError:
+                return None
+            return key, item[key]
+    return None
+
+
+def comprehensive_merge(*args: MutableMapping, record_keys: Sequence[str] = ()) -> Any:  # noqa: C901
     """
     Merges data comprehensively.
 
     All arguments must be of the same type.
 
     - Scalars are overwritten by the new values
-    - lists are merged and de-duplicated
+    - lists are merged and de-duplicated, keeping the order items are first seen
     - dicts are recursively merged
+    - if `record_keys` is set, dicts in lists with the same value for a record key are recursively merged
+
+    The arguments are not modified. Only the containers along the merged paths are copied; the result shares
+    the other values with the arguments, so copy it before modifying its nested values.
 
     Args:
         *args: List of dicts to merge with the first one the base
+        record_keys: The keys identifying the dicts in lists, in order of preference
 
     Returns:
         The merged data
+
+    Raises:
+        ValueError: If a list item that isn't hashable contains a type
+            [freeze_data][cookie_composer.data_merge.freeze_data] doesn't support.
     """
     dict_types = (dict, OrderedDict, immutabledict)
     iterable_types = (list, set, tuple)
-
-    def merge_into(d1: Any, d2: Any) -> Any:
-        if isinstance(d1, dict_types) and isinstance(d2, dict_types):
-            if isinstance(d1, OrderedDict) or isinstance(d2, OrderedDict):
-                od1: MutableMapping[Any, Any] = OrderedDict(d1)
-                od2: MutableMapping[Any, Any] = OrderedDict(d2)
-            else:
-                od1 = dict(d1)
-                od2 = dict(d2)
-
-            for key in od2:
-                od1[key] = merge_into(od1[key], od2[key]) if key in od1 else copy.deepcopy(od2[key])
-            return od1  # type: ignore[return-value]
+    frozen_items: Dict[int, Any] = {}
+
+    def copy_mapping(d1: Any, d2: Any) -> MutableMapping:
+        if isinstance(d1, OrderedDict) or isinstance(d2, OrderedDict):
+            return OrderedDict(d1)
+        return dict(d1)
+
+    def merge_values(d1: Any, d2: Any) -> Any:
+        if isinstance(d1, list) and isinstance(d2, iterable_types) and record_keys:
+            return merge_records(d1, d2, record_keys, merge_into, frozen_items)
+        elif isinstance(d1, tuple) and isinstance(d2, iterable_types) and record_keys:
+            return tuple(merge_records(d1, d2, record_keys, merge_into, frozen_items))
         elif isinstance(d1, list) and isinstance(d2, iterable_types):
-            return list(merge_iterables(d1, d2))
+            return merge_iterables(d1, d2, frozen_items)
         elif isinstance(d1, set) and isinstance(d2, iterable_types):
-            return merge_iterables(d1, d2)
+            return set(merge_iterables(d1, d2, frozen_items))
         elif isinstance(d1, tuple) and isinstance(d2, iterable_types):
-            return tuple(merge_iterables(d1, d2))
+            return tuple(merge_iterables(d1, d2, frozen_items))
         else:
-            return copy.deepcopy(d2)
+            return d2
+
+    def merge_into(d1: Any, d2: Any) -> Any:
+        if not (isinstance(d1, dict_types) and isinstance(d2, dict_types)):
+            return merge_values(d1, d2)
+
+        # Nested dicts are merged from a stack instead of recursively, so deep documents do not hit the recursion limit
+        merged = copy_mapping(d1, d2)
+        stack = [(merged, d2)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                if key not in target:
+                    target[key] = value
+                elif isinstance(target[key], dict_types) and isinstance(value, dict_types):
+                    target[key] = copy_mapping(target[key], value)
+                    stack.append((target[key], value))
+                else:
+                    target[key] = merge_values(target[key], value)
+        return merged
 
     if isinstance(args[0], list):
         return reduce(merge_into, args, [])
@@ -107,33 +227,190 @@ def comprehensive_merge(*args: MutableMapping) -> Any:  # noqa: C901
 
 
 class Context(ChainMap):
-    """Provides merging and convenience functions for managing contexts."""
+    """
+    Provides merging and convenience functions for managing contexts.
+
+    The flattened view of the maps is cached. A child created with `new_child` only merges its new map into the
+    flattened view of its parent. Changes made through the context, or through its parents, invalidate the cache,
+    as does replacing one of its maps. Changes made directly to the contents of the underlying maps aren't detected,
+    so make them through the context.
+    """
+
+    def __init__(self, *maps: MutableMapping):
+        super().__init__(*maps)
+        self._parent: Optional["Context"] = None
+        self._flattened: Optional[MutableMapping] = None
+        self._flattened_from: Tuple[Any, ...] = ()
 
     @property
     def is_empty(self) -> bool:
         """The context has only one mapping and it is empty."""
         return len(self.maps) == 1 and len(self.maps[0]) == 0
 
+    def new_child(self, m: Optional[MutableMapping] = None) -> "Context":  # type: ignore[override]
+        """Return a new context with a new map followed by all the maps of this context."""
+        child = super().new_child(m)
+        child._parent = self
+        return child
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """Set the value in the first map."""
+        super().__setitem__(key, value)
+        self._flattened = None
+
+    def __delitem__(self, key: Any) -> None:
+        """Remove the key from the first map."""
+        super().__delitem__(key)
+        self._flattened = None
+
+    def pop(self, key: Any, *args: Any) -> Any:
+        """Remove the key from the first map and return its value."""
+        self._flattened = None
+        return super().pop(key, *args)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        """Remove and return an item from the first map."""
+        self._flattened = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        """Clear the first map."""
+        self._flattened = None
+        super().clear()
+
     def flatten(self) -> MutableMapping:
-        """Comprehensively merge all the maps into a single mapping."""
-        return reduce(comprehensive_merge, self.maps, {})
+        """
+        Comprehensively merge all the maps into a single mapping.
+
+        The returned mapping is a new mapping, but the nested values are shared with the cache and the maps. So
+        change its nested values only after copying them.
+        """
+        return copy.copy(self._get_flattened())
+
+    def _get_flattened(self) -> MutableMapping:
+        """Return the cached flattened view, updating it if necessary."""
+        parent = self._parent
+        if parent is not None and not _is_same_sequence(self.maps[1:], parent.maps):
+            parent = None
+        parent_flattened = parent._get_flattened() if parent is not None else None
+
+        # The cache is valid if nothing was changed through this context, and it has the same maps and the same
+        # flattened view of its parent. The parent rebuilds its view when it changes, so its identity is enough.
+        flattened_from = (parent_flattened, *self.maps)
+        if self._flattened is not None and _is_same_sequence(flattened_from, self._flattened_from):
+            return self._flattened
+
+        if parent is not None and _merges_incrementally(self.maps[0], parent.maps):
+            self._flattened = comprehensive_merge(self.maps[0], parent_flattened)  # type: ignore[arg-type]
+        else:
+            self._flattened = reduce(comprehensive_merge, self.maps, {})
+        self._flattened_from = flattened_from
+        return self._flattened  # type: ignore[return-value]
+
+
+def _is_same_sequence(first: Sequence, second: Sequence) -> bool:
+    """Do both sequences contain the same objects?"""
+    return len(first) == len(second) and all(a is b for a, b in zip(first, second))
+
+
+def _merge_kind(value: Any) -> str:
+    """Return how `comprehensive_merge` treats the value."""
+    if isinstance(value, (dict, OrderedDict, immutabledict)):
+        return "mapping"
+    elif isinstance(value, (list, set, tuple)):
+        return "iterable"
+    return "scalar"
+
+
+def _merges_incrementally(value: Any, later_values: List[Any]) -> bool:
+    """
+    Is merging the value into the merged later values the same as merging them all in order?
+
+    It is not when a later value has a different kind, for example a scalar replacing a list, because merging
+    discards everything merged before the change.
+
+    Nested mappings are checked from a stack instead of recursively, so deep documents do not hit the recursion limit.
+
+    Args:
+        value: The first value
+        later_values: The values merged after the first value, in order
+
+    Returns:
+        `True` if the value can be merged into the merged later values
+    """
+    stack = [(value, later_values)]
+    while stack:
+        value, later_values = stack.pop()
+        if not later_values:
+            continue
+        kind = _merge_kind(value)
+        if any(_merge_kind(later_value) != kind for later_value in later_values):
+            return False
+        if kind == "mapping":
+            for key, item in value.items():
+                stack.append((item, [later_value[key] for later_value in later_values if key in later_value]))
+    return True
+
+
+_SCALAR_TYPES = (str, int, float, bytes, type(None), bool)
 
 
 def freeze_data(obj: Any) -> Any:
-    """Check type and recursively return a new read-only object."""
-    if isinstance(obj, (str, int, float, bytes, type(None), bool)):
+    """
+    Check type and return a new read-only object, freezing nested objects.
+
+    Nested objects are frozen from a stack instead of recursively, so deep documents do not hit the recursion limit.
+
+    Args:
+        obj: The object to freeze
+
+    Returns:
+        A read-only equivalent of the object
+
+    Raises:
+        ValueError: If the object, or an object nested in it, is not a supported type
+    """
+    if isinstance(obj, _SCALAR_TYPES):
+        return obj
+
+    frozen_root: List[Any] = []
+    # Each frame is an object, an iterator over its nested objects, and the nested objects frozen so far
+    stack: List[Tuple[Any, Iterator[Any], List[Any]]] = [(obj, iter(_get_nested_objects(obj)), [])]
+    while stack:
+        container, nested_objects, frozen_objects = stack[-1]
+        for nested_obj in nested_objects:
+            if isinstance(nested_obj, _SCALAR_TYPES):
+                frozen_objects.append(nested_obj)
+            else:
+                stack.append((nested_obj, iter(_get_nested_objects(nested_obj)), []))
+                break
+        else:
+            stack.pop()
+            frozen = _build_frozen(container, frozen_objects)
+            (stack[-1][2] if stack else frozen_root).append(frozen)
+    return frozen_root[0]
+
+
+def _get_nested_objects(obj: Any) -> Iterable:
+    """Return the objects nested in an object that is not a scalar."""
+    if isinstance(obj, (tuple, list, set, frozenset)):
         return obj
-    elif isinstance(obj, tuple) and type(obj) != tuple:  # assumed namedtuple
-        return type(obj)(*(freeze_data(i) for i in obj))
-    elif isinstance(obj, (tuple, list)):
-        return tuple(freeze_data(i) for i in obj)
     elif isinstance(obj, (dict, OrderedDict, immutabledict)):
-        return immutabledict({k: freeze_data(v) for k, v in obj.items()})
-    elif isinstance(obj, (set, frozenset)):
-        return frozenset(freeze_data(i) for i in obj)
+        return obj.values()
     raise ValueError(obj)
 
 
+def _build_frozen(obj: Any, frozen_objects: List[Any]) -> Any:
+    """Return the read-only equivalent of an object from its frozen nested objects."""
+    if isinstance(obj, tuple) and type(obj) != tuple:  # assumed namedtuple
+        return type(obj)(*frozen_objects)
+    elif isinstance(obj, (tuple, list)):
+        return tuple(frozen_objects)
+    elif isinstance(obj, (dict, OrderedDict, immutabledict)):
+        return immutabledict(zip(obj.keys(), frozen_objects))
+    return frozenset(frozen_objects)
+
+
 # Strategies merging files and data.
 DO_NOT_MERGE = "do-not-merge"
 """Do not merge the data, use the file path to determine what to do."""
@@ -152,6 +429,35 @@ COMPREHENSIVE = "comprehensive"
 - dicts are recursively merged
 """
 
+KEYED_COMPREHENSIVE = "keyed-comprehensive"
+"""Comprehensively merge the two data structures, merging the records in lists by an identity key.
+
+Records (dicts) in lists with the same value for the identity key are recursively merged, instead of being kept as
+two different items. The identity keys are listed after a colon, in order of preference, like
+`keyed-comprehensive:name,id`. Without a list, the keys are
+[DEFAULT_RECORD_KEYS][cookie_composer.data_merge.DEFAULT_RECORD_KEYS].
+"""
+
+DEFAULT_RECORD_KEYS = ("name", "id")
+"""The keys identifying records when the `keyed-comprehensive` strategy does not list them."""
+
+
+def parse_merge_strategy(merge_strategy: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Split a merge strategy into its name and its record keys.
+
+    Args:
+        merge_strategy: The merge strategy, like `comprehensive` or `keyed-comprehensive:name`
+
+    Returns:
+        The name of the strategy and the record keys. Only `keyed-comprehensive` has record keys.
+    """
+    name, _, keys = merge_strategy.partition(":")
+    if name != KEYED_COMPREHENSIVE:
+        return merge_strategy, ()
+    record_keys = tuple(key.strip() for key in keys.split(",") if key.strip())
+    return name, record_keys or DEFAULT_RECORD_KEYS
+
 
 def get_merge_strategy(path: Path, merge_strategies: Dict[str, str]) -> str:
     """
@@ -170,13 +476,14 @@ def get_merge_strategy(path: Path, merge_strategies: Dict[str, str]) -> str:
 
     strategy = DO_NOT_MERGE  # The default
 
-    if path.suffix not in MERGE_FUNCTIONS:
+    if MERGE_FUNCTIONS.get_key(path) is None:
         return DO_NOT_MERGE
 
-    for pattern, strat in merge_strategies.items():
-        if rel_fnmatch(str(path), pattern):
-            logger.debug(f"{path} matches merge strategy pattern {pattern} for {strat}")
-            strategy = strat
-            break
+    patterns = tuple(merge_strategies)
+    index = compile_globs(patterns).first_match(path)
+    if index is not None:
+        pattern = patterns[index]
+        strategy = merge_strategies[pattern]
+        logger.debug(f"{path} matches merge strategy pattern {pattern} for {strategy}")
 
     return strategy
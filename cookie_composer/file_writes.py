@@ -0,0 +1,259 @@
+"""
+Write files only when their content changes.
+
+Rewriting a file with identical content still updates its modification time, so tools like git and build systems
+have to check it again. These functions compare the new content with the existing file (sizes first, then bytes)
+and skip the write if they are the same.
+
+Inside a [track_writes][cookie_composer.file_writes.track_writes] block, the writes and skipped writes are counted.
+
+Inside a [reflink_copies][cookie_composer.file_writes.reflink_copies] block, files are copied with copy-on-write
+clones (reflinks) on file systems that support them, like Btrfs, XFS and APFS. A clone shares the data blocks, not
+the inode, with the original, so editing either file never changes the other. Other file systems fall back to a
+regular copy.
+"""
+
+import filecmp
+import io
+import logging
+import os
+import shutil
+import stat
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+FICLONE = 0x40049409
+"""The Linux `ioctl` request cloning a file's data into another file."""
+
+
+class WriteStats:
+    """The number of files written and skipped because they were unchanged."""
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+
+    def record(self, written: bool) -> None:
+        """Count a write or a skipped write."""
+        if written:
+            self.written += 1
+        else:
+            self.skipped += 1
+
+    def __str__(self) -> str:
+        """Summarize the counts for the command output."""
+        return f"Wrote {self.written} files. Skipped {self.skipped} unchanged files."
+
+
+_active_stats: Optional[WriteStats] = None
+
+
+@contextmanager
+def track_writes() -> Iterator[WriteStats]:
+    """
+    Count the files written and skipped in the block.
+
+    If the writes are already tracked, the outer block's counts are used.
+
+    Yields:
+        The counts of written and skipped files
+    """
+    global _active_stats  # noqa: PLW0603
+
+    if _active_stats is not None:
+        yield _active_stats
+        return
+
+    _active_stats = WriteStats()
+    try:
+        yield _active_stats
+    finally:
+        _active_stats = None
+
+
+def _record(written: bool) -> bool:
+    if _active_stats is not None:
+        _active_stats.record(written)
+    return written
+
+
+_reflinks_enabled = False
+
+
+@contextmanager
+def reflink_copies(enabled: bool = True) -> Iterator[None]:
+    """
+    Copy files with reflinks, where the file system supports them, in the block.
+
+    Args:
+        enabled: Use reflinks. `False` uses regular copies, even inside an enclosing block.
+    """
+    global _reflinks_enabled  # noqa: PLW0603
+
+    previous = _reflinks_enabled
+    _reflinks_enabled = enabled
+    try:
+        yield
+    finally:
+        _reflinks_enabled = previous
+
+
+def reflinks_enabled() -> bool:
+    """Return `True` if files are copied with reflinks."""
+    return _reflinks_enabled
+
+
+def _ficlone(origin: Path, destination: Path) -> None:
+    """Clone a file with the Linux FICLONE ioctl."""
+    import fcntl
+
+    with open(origin, "rb") as origin_file, open(destination, "wb") as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, origin_file.fileno())
+
+
+def _clonefile(origin: Path, destination: Path) -> None:
+    """Clone a file with the macOS clonefile system call, which requires a new destination path."""
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    clone_path = destination.with_name(f".{destination.name}.{os.getpid()}.clone")
+    if libc.clonefile(os.fsencode(origin), os.fsencode(clone_path), 0) != 0:
+        error_number = ctypes.get_errno()
+        raise OSError(error_number, os.strerror(error_number), str(origin))
+    os.replace(clone_path, destination)
+
+
+def clone_file(origin: Path, destination: Path) -> bool:
+    """
+    Copy the data of a file with a copy-on-write clone.
+
+    Args:
+        origin: The file to clone
+        destination: The path of the clone. An existing file is replaced.
+
+    Returns:
+        `True` if the file was cloned, `False` if the platform or file system doesn't support clones
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            _ficlone(origin, destination)
+        elif sys.platform == "darwin":
+            _clonefile(origin, destination)
+        else:
+            return False
+    except OSError as e:
+        logger.debug("Unable to clone %s: %s", origin, e)
+        return False
+    return True
+
+
+def copy_file(origin: Union[str, Path], destination: Union[str, Path]) -> None:
+    """
+    Copy the data and permission bits of a file, like `shutil.copy`, using a reflink if enabled.
+
+    Args:
+        origin: The file to copy
+        destination: The path of the copy
+    """
+    if not (_reflinks_enabled and clone_file(Path(origin), Path(destination))):
+        shutil.copyfile(origin, destination)
+    shutil.copymode(origin, destination)
+
+
+def copy_file_with_metadata(origin: Union[str, Path], destination: Union[str, Path]) -> Union[str, Path]:
+    """
+    Copy a file with its metadata, like `shutil.copy2`, using a reflink if enabled.
+
+    This is a `copy_function` for `shutil.copytree`.
+
+    Args:
+        origin: The file to copy
+        destination: The path of the copy
+
+    Returns:
+        The path of the copy
+    """
+    copy_file(origin, destination)
+    shutil.copystat(origin, destination)
+    return destination
+
+
+def _copy_mode_if_different(origin: Path, destination: Path) -> None:
+    """Copy the permission bits of origin to destination, if they differ."""
+    if stat.S_IMODE(os.stat(origin).st_mode) != stat.S_IMODE(os.stat(destination).st_mode):
+        shutil.copymode(origin, destination)
+
+
+def has_content(path: Path, content: bytes) -> bool:
+    """Return `True` if the file exists and contains exactly `content`."""
+    try:
+        if os.stat(path).st_size != len(content):
+            return False
+        return path.read_bytes() == content
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def copy_if_changed(origin: Path, destination: Path) -> bool:
+    """
+    Copy a file and its permission bits, like `shutil.copy`, unless the destination has the same content.
+
+    The file is copied with [copy_file][cookie_composer.file_writes.copy_file], so it uses a reflink if enabled.
+
+    Args:
+        origin: The file to copy
+        destination: The path to copy it to
+
+    Returns:
+        `True` if the file was written, `False` if it was unchanged
+    """
+    if destination.is_file() and filecmp.cmp(origin, destination, shallow=False):
+        _copy_mode_if_different(origin, destination)
+        return _record(False)
+
+    copy_file(origin, destination)
+    return _record(True)
+
+
+def write_bytes_if_changed(path: Path, content: bytes) -> bool:
+    """
+    Write the content to the file, unless the file already has the same content.
+
+    Args:
+        path: The file to write
+        content: The new content
+
+    Returns:
+        `True` if the file was written, `False` if it was unchanged
+    """
+    if has_content(path, content):
+        return _record(False)
+
+    path.write_bytes(content)
+    return _record(True)
+
+
+def write_text_if_changed(path: Path, text: str, encoding: Optional[str] = None) -> bool:
+    """
+    Write the text to the file, like `Path.write_text`, unless the file already has the same content.
+
+    Args:
+        path: The file to write
+        text: The new text
+        encoding: The text encoding. Defaults to the same encoding as `open()`.
+
+    Returns:
+        `True` if the file was written, `False` if it was unchanged
+    """
+    buffer = io.BytesIO()
+    # Encode and translate newlines exactly like writing the text to a file
+    wrapper = io.TextIOWrapper(buffer, encoding=encoding)
+    wrapper.write(text)
+    wrapper.flush()
+    content = buffer.getvalue()
+    wrapper.detach()
+    return write_bytes_if_changed(path, content)
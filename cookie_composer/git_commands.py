@@ -1,11 +1,12 @@
 """Functions for using git."""
 
 import logging
+import os
 import subprocess
 import tempfile
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterator, Optional, Union
+from typing import Iterable, Iterator, List, Optional, Union
 
 from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError, Repo
 
@@ -46,13 +47,17 @@ def get_repo(
         ) from e
 
 
-def clone(repo_url: str, dest_path: Optional[Path] = None) -> Repo:
+def clone(
+    repo_url: str, dest_path: Optional[Path] = None, depth: Optional[int] = None, filter: Optional[str] = None
+) -> Repo:
     """
     Clone a repo.
 
     Args:
         repo_url: Repo URL or local path.
         dest_path: The path to clone to.
+        depth: Only clone this many commits of history.
+        filter: A partial clone filter, like `blob:none`.
 
     Returns:
         The repository.
@@ -64,7 +69,220 @@ def clone(repo_url: str, dest_path: Optional[Path] = None) -> Repo:
         return get_repo(dest_path, ensure_clean=True)
     else:
         logger.debug(f"Cloning {repo_url} into {dest_path}")
-        return Repo.clone_from(repo_url, dest_path)
+        return Repo.clone_from(repo_url, dest_path, depth=depth, filter=filter)
+
+
+def clone_mirror(repo_url: str, mirror_path: Path, depth: Optional[int] = None, filter: Optional[str] = None) -> Repo:
+    """
+    Clone a bare mirror of a repo, with all its branches and tags.
+
+    Args:
+        repo_url: Repo URL or local path.
+        mirror_path: The path to clone to.
+        depth: Only clone this many commits of history.
+        filter: A partial clone filter, like `blob:none`.
+
+    Returns:
+        The mirror repository. If `mirror_path` exists, it is returned without fetching.
+    """
+    if mirror_path.exists():
+        logger.debug(f"Found mirror {mirror_path}")
+        return get_repo(mirror_path)
+
+    logger.debug(f"Mirroring {repo_url} into {mirror_path}")
+    return Repo.clone_from(repo_url, mirror_path, mirror=True, depth=depth, filter=filter)
+
+
+def is_shallow(repo: Repo) -> bool:
+    """Return `True` if the repository is a shallow clone, missing the history before some commits."""
+    return Path(repo.common_dir, "shallow").exists()
+
+
+def is_partial(repo: Repo) -> bool:
+    """Return `True` if the repository is a partial clone, downloading missing objects when they are needed."""
+    try:
+        # Mirrors mark the promisor remote instead of setting extensions.partialClone
+        settings = repo.git.config("--get-regexp", r"^(extensions\.partialclone|remote\..*\.promisor)$")
+    except GitCommandError:
+        return False
+    return any(not line.endswith(" false") for line in settings.splitlines())
+
+
+def fetch_commit(repo: Repo, ref: str, remote_name: str = "origin") -> Optional[str]:
+    """
+    Fetch a branch, tag or commit that isn't in the repository yet.
+
+    The remote's branches and tags are fetched first. If `ref` is a commit that is still missing, as in a shallow
+    clone, the commit is fetched by its hash. If the remote doesn't allow that, the whole history is fetched.
+
+    Args:
+        repo: The repository to fetch into
+        ref: The branch, tag or commit hash
+        remote_name: The name of the remote to fetch from
+
+    Returns:
+        The commit hash, or `None` if the remote doesn't have `ref`
+    """
+    remote = repo.remote(remote_name)
+    remote.fetch()
+    if commit := resolve_commit(repo, ref):
+        return commit
+
+    try:
+        repo.git.fetch(remote_name, ref, depth=1 if is_shallow(repo) else None)
+    except GitCommandError as e:
+        logger.debug(f"Could not fetch {ref} from {remote_name}: {e}")
+        if not is_shallow(repo):
+            return None
+        logger.info(f"Fetching the whole history of {remote_name} to find {ref}.")
+        repo.git.fetch(remote_name, unshallow=True)
+    return resolve_commit(repo, ref)
+
+
+def resolve_commit(repo: Repo, ref: str) -> Optional[str]:
+    """
+    Resolve a branch, tag or commit to a commit hash.
+
+    Args:
+        repo: The repository to look in
+        ref: The branch, tag or (abbreviated) commit hash
+
+    Returns:
+        The commit hash, or `None` if the ref doesn't exist in the repository
+    """
+    try:
+        return repo.git.rev_parse("--verify", "--quiet", f"{ref}^{{commit}}")
+    except GitCommandError:
+        return None
+
+
+SPARSE_CHECKOUT_OPTIONS = ["core.sparseCheckout=true", "core.sparseCheckoutCone=true"]
+"""Configuration for the commands updating a sparse worktree.
+
+The options are passed to each command, instead of set with `git sparse-checkout`, because that moves `core.bare` out
+of the repository's config, where GitPython expects it.
+"""
+
+
+def get_sparse_checkout_file(worktree: Repo) -> Path:
+    """Return the path of the sparse checkout patterns of a worktree."""
+    return Path(worktree.git_dir, "info", "sparse-checkout")
+
+
+def get_sparse_paths(worktree: Repo) -> Optional[List[str]]:
+    """
+    Return the directories checked out in a sparse worktree.
+
+    Args:
+        worktree: The worktree
+
+    Returns:
+        The directories, or `None` if the worktree isn't sparse
+    """
+    sparse_checkout_file = get_sparse_checkout_file(worktree)
+    if not sparse_checkout_file.exists():
+        return None
+    patterns = sparse_checkout_file.read_text().splitlines()
+    # Parent directories of nested paths are followed by the exclusion of their subdirectories
+    return [
+        pattern.strip("/")
+        for pattern in patterns
+        if pattern.startswith("/") and pattern.endswith("/") and f"!{pattern}*/" not in patterns
+    ]
+
+
+def get_sparse_patterns(sparse_paths: Iterable[str]) -> str:
+    """
+    Return the cone mode sparse checkout patterns for the files at the root of the repository and some directories.
+
+    Args:
+        sparse_paths: The directories to check out
+
+    Returns:
+        The contents of a sparse checkout file
+    """
+    directories = sorted({path.strip("/") for path in sparse_paths if path.strip("/")})
+    # A directory inside another one is already checked out
+    directories = [path for path in directories if not any(path.startswith(f"{other}/") for other in directories)]
+    lines = ["/*", "!/*/"]
+    parents = set()
+    for directory in directories:
+        parts = directory.split("/")
+        for index in range(1, len(parts)):
+            parent = "/".join(parts[:index])
+            if parent not in parents:
+                parents.add(parent)
+                lines.extend([f"/{parent}/", f"!/{parent}/*/"])
+        lines.append(f"/{directory}/")
+    return "\n".join(lines) + "\n"
+
+
+def set_sparse_paths(worktree: Repo, sparse_paths: Optional[List[str]]) -> None:
+    """
+    Check out only some directories, and the files at the root of the repository, in a worktree.
+
+    Args:
+        worktree: The worktree
+        sparse_paths: The directories to check out. `None` checks out everything.
+    """
+    sparse_checkout_file = get_sparse_checkout_file(worktree)
+    if sparse_paths is None and not sparse_checkout_file.exists():
+        return
+
+    sparse_checkout_file.parent.mkdir(parents=True, exist_ok=True)
+    sparse_checkout_file.write_text("/*\n" if sparse_paths is None else get_sparse_patterns(sparse_paths))
+    worktree.git(c=SPARSE_CHECKOUT_OPTIONS).read_tree("-mu", "HEAD")
+    if sparse_paths is None:
+        sparse_checkout_file.unlink()
+
+
+def detached_worktree(repo: Repo, worktree_path: Path, commit: str, sparse_paths: Optional[List[str]] = None) -> Repo:
+    """
+    Check out a commit in a detached worktree of a repository, reusing the worktree if it exists.
+
+    A detached worktree shares the repository's objects and never holds a branch, so fetching into the repository
+    and adding other worktrees always works.
+
+    Args:
+        repo: The repository, usually a bare mirror
+        worktree_path: The path of the worktree. A directory that isn't a worktree of `repo` is replaced.
+        commit: The commit to check out
+        sparse_paths: Only check out these directories, and the files at the root of the repository. The paths are
+            added to the paths of an existing sparse worktree. `None` checks out everything.
+
+    Returns:
+        The worktree
+    """
+    common_dir = Path(repo.common_dir).resolve()
+    if worktree_path.exists():
+        try:
+            worktree = Repo(worktree_path)
+            is_worktree = Path(worktree.git_dir).resolve() != common_dir
+            if is_worktree and Path(worktree.common_dir).resolve() == common_dir:
+                current_paths = get_sparse_paths(worktree)
+                if sparse_paths is None or current_paths is None:
+                    set_sparse_paths(worktree, None)
+                elif not set(sparse_paths) <= set(current_paths):
+                    set_sparse_paths(worktree, current_paths + sparse_paths)
+                if worktree.head.commit.hexsha != commit:
+                    worktree.git(c=SPARSE_CHECKOUT_OPTIONS).checkout("--force", "--detach", commit)
+                return worktree
+        except (InvalidGitRepositoryError, NoSuchPathError, ValueError):
+            pass
+        logger.info(f"{worktree_path} is not a worktree of {repo.common_dir}, replacing it.")
+        remove_single_path(worktree_path)
+
+    repo.git.worktree("prune")
+    if not sparse_paths:
+        repo.git.worktree("add", "--detach", str(worktree_path), commit)
+        return Repo(worktree_path)
+
+    repo.git.worktree("add", "--no-checkout", "--detach", str(worktree_path), commit)
+    worktree = Repo(worktree_path)
+    get_sparse_checkout_file(worktree).parent.mkdir(parents=True, exist_ok=True)
+    get_sparse_checkout_file(worktree).write_text(get_sparse_patterns(sparse_paths))
+    worktree.git(c=SPARSE_CHECKOUT_OPTIONS).checkout("--force", "--detach", commit)
+    return worktree
 
 
 def branch_exists(repo: Repo, branch_name: str) -> bool:
@@ -192,6 +410,129 @@ def apply_patch(repo: Repo, diff: str) -> None:
         _apply_patch_with_reject(repo, diff)
 
 
+def _get_checkout_ref(repo: Repo, branch: Optional[str] = None, commit: Optional[str] = None) -> str:
+    """Return the ref to check out, following the logic of `temp_git_worktree_dir`."""
+    branch_is_current = branch is None or repo.head.is_detached or branch == repo.active_branch.name
+    return "HEAD" if branch_is_current and commit is None else commit or branch  # type: ignore[return-value]
+
+
+def _fetch_missing_objects(repo: Repo, tree: str, remote_name: str = "origin") -> None:
+    """Download the objects of a tree missing from a partial clone in one fetch, instead of one fetch per object."""
+    objects = repo.git.rev_list("--objects", "--missing=print", tree).splitlines()
+    missing = [line[1:] for line in objects if line.startswith("?")]
+    if not missing:
+        return
+
+    logger.debug(f"Fetching {len(missing)} missing objects of {tree}")
+    fetch_command = [
+        "git",
+        f"--git-dir={repo.git_dir}",
+        "fetch",
+        remote_name,
+        "--no-tags",
+        "--no-write-fetch-head",
+        "--recurse-submodules=no",
+        "--filter=blob:none",
+        "--stdin",
+    ]
+    try:
+        subprocess.run(fetch_command, input="\n".join(missing).encode(), capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise GitError(f"Could not fetch the files of {tree}: {e.stderr.decode()}") from e
+
+
+def export_tree(repo: Repo, ref: str, output_dir: Path, directory: Optional[str] = None) -> Path:
+    """
+    Write the files of a commit into a directory, checking them out from the repository's object database.
+
+    Unlike a checkout, nothing is written to the repository and only the files in `directory` are written.
+    The commit is read into a temporary index, and the files are written by one `git checkout-index` process.
+    Like a checkout, the files are converted with the commit's `.gitattributes` and the git configuration, for
+    example their line endings, `ident` keywords and smudge filters like Git LFS. Executable files and symbolic
+    links are kept. Submodules are skipped, like `git archive` does.
+
+    Args:
+        repo: The repository
+        ref: The branch, tag or commit to export
+        output_dir: The directory to write the files in. The files keep their paths relative to the repo root.
+        directory: The directory within the repository to export. Defaults to the whole repository.
+
+    Raises:
+        GitError: If the ref or the directory doesn't exist, or the files can't be checked out
+
+    Returns:
+        The output directory
+    """
+    pathspec = directory.strip("/") if directory else "."
+    try:
+        tree = repo.git.rev_parse("--verify", f"{ref}^{{tree}}")
+        listing = repo.git.ls_tree("-r", "-z", "--full-tree", tree, "--", pathspec)
+    except GitCommandError as e:
+        raise GitError(f"Could not find {ref} in {repo.common_dir}") from e
+
+    paths = []
+    for entry in filter(None, listing.split("\0")):
+        info, path = entry.split("\t", 1)
+        if info.split()[1] == "blob":
+            paths.append(path)
+    if directory and not paths:
+        raise GitError(f"Could not find {directory} at {ref} in {repo.common_dir}")
+    if is_partial(repo):
+        _fetch_missing_objects(repo, f"{tree}:{directory.strip('/')}" if directory else tree)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="export-tree") as temp_dir:
+        # An empty work tree makes git read the attributes from the temporary index, which holds the whole commit
+        git = ["git", f"--git-dir={repo.git_dir}", f"--work-tree={temp_dir}"]
+        env = {**os.environ, "GIT_INDEX_FILE": os.path.join(temp_dir, "index")}
+        checkout_index = ["checkout-index", "--force", "-z", "--stdin", f"--prefix={output_dir.resolve()}{os.sep}"]
+        try:
+            subprocess.run([*git, "read-tree", tree], env=env, capture_output=True, check=True)
+            subprocess.run(
+                [*git, *checkout_index], input="\0".join(paths).encode(), env=env, capture_output=True, check=True
+            )
+        except subprocess.CalledProcessError as e:
+            raise GitError(f"Could not export the files of {ref}: {e.stderr.decode()}") from e
+    return output_dir
+
+
+@contextmanager
+def temp_git_tree_dir(
+    repo_path: Path,
+    output_dir: Optional[Path] = None,
+    branch: Optional[str] = None,
+    commit: Optional[str] = None,
+    directory: Optional[str] = None,
+) -> Iterator[Path]:
+    """
+    Context Manager for a temporary copy of the files of a branch or commit in a git repo.
+
+    The branch or commit is chosen like [temp_git_worktree_dir][cookie_composer.git_commands.temp_git_worktree_dir],
+    but the files are exported with [export_tree][cookie_composer.git_commands.export_tree] instead of checked out,
+    so no worktree is added and only `directory` is written.
+
+    Args:
+        repo_path: The path to the template git repo
+        output_dir: The path to put the files in. Defaults to a temporary directory.
+        branch: The branch to export
+        commit: The optional commit to export
+        directory: The directory within the repository to export. Defaults to the whole repository.
+
+    Yields:
+        The output_dir, with the files at their paths relative to the repo root
+    """
+    repo = get_repo(repo_path, search_parent_directories=True)
+    output_dir = output_dir or Path(tempfile.mkdtemp(prefix=repo_path.name))
+    if commit and repo.remotes and resolve_commit(repo, commit) is None:
+        # The commit is older than the history of a shallow clone, or newer than the last fetch
+        fetch_commit(repo, commit, repo.remotes[0].name)
+
+    try:
+        yield export_tree(repo, _get_checkout_ref(repo, branch, commit), output_dir, directory)
+    finally:
+        remove_single_path(output_dir)
+
+
 @contextmanager
 def temp_git_worktree_dir(
     repo_path: Path, worktree_path: Optional[Path] = None, branch: Optional[str] = None, commit: Optional[str] = None
@@ -207,8 +548,11 @@ def temp_git_worktree_dir(
     - If a commit is provided, use that
     - If a branch is provided, and it is not the current branch, use that
     - If a branch is provided, and it is the current branch, use the current commit
+    - If a branch is provided, and the repo has a detached HEAD, like a cached template, use the current commit
     - If neither a branch nor a commit is provided, use the current branch and commit
 
+    The worktree is always detached, so it can be created while the branch is checked out elsewhere.
+
 
     Args:
         repo_path: The path to the template git repo
@@ -229,10 +573,7 @@ def temp_git_worktree_dir(
     worktree_path = worktree_path or tmp_dir
     worktree_path.mkdir(parents=True, exist_ok=True)
 
-    branch_is_active_branch = branch is None or branch == repo.active_branch.name
-    git_cmd = ["add", str(worktree_path), commit or branch]
-    if branch_is_active_branch and commit is None:
-        git_cmd = ["add", "-d", str(worktree_path)]
+    git_cmd = ["add", "--detach", str(worktree_path), _get_checkout_ref(repo, branch, commit)]
 
     try:
         repo.git.worktree(*git_cmd)
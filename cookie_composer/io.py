@@ -1,6 +1,7 @@
 """Functions for handling input/output operations."""
 
 import copy
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any, List, MutableMapping, Optional, Union
 
@@ -11,7 +12,7 @@ from cookie_composer.composition import Composition, RenderedComposition, logger
 from cookie_composer.data_merge import comprehensive_merge
 from cookie_composer.exceptions import MissingCompositionFileError
 from cookie_composer.layers import LayerConfig, RenderedLayer
-from cookie_composer.templates.types import Template
+from cookie_composer.templates.types import Template, TemplateRepo
 
 
 def serialize_layer(layer: LayerConfig) -> dict:
@@ -25,24 +26,63 @@ def serialize_layer(layer: LayerConfig) -> dict:
             "password": layer.template.repo.password,
         }
     )
+    if layer.template.repo.clone is not None:
+        layer_info["clone"] = asdict(layer.template.repo.clone)
     return layer_info
 
 
-def deserialize_layer(layer_info: dict, local_path: Optional[Path] = None, **kwargs: Any) -> LayerConfig:
-    """Deserialize a layer configuration from a rendered layer."""
-    from cookie_composer.templates.source import get_template_repo
-
+def _merge_layer_info(layer_info: dict, **kwargs: Any) -> dict:
+    """Return a copy of the layer information with the keyword arguments merged in."""
     layer_info = copy.deepcopy(layer_info)
     if kwargs:
         layer_info = comprehensive_merge(layer_info, kwargs)
+    return layer_info
+
+
+def _template_repo_spec(layer_info: dict) -> dict:
+    """Return the arguments to get the template repository of a layer."""
+    return {
+        "url": layer_info["template"],
+        "checkout": layer_info.get("checkout"),
+        "password": layer_info.get("password"),
+        "clone": layer_info.get("clone"),
+        "directory": layer_info.get("directory", ""),
+    }
+
+
+def prefetch_template_repos(
+    layer_infos: List[dict], local_path: Optional[Path] = None, **kwargs: Any
+) -> List[TemplateRepo]:
+    """
+    Get the template repositories of several layers concurrently.
+
+    Args:
+        layer_infos: The serialized layer configurations
+        local_path: Used to resolve local paths.
+        **kwargs: Additional keyword arguments merged into each layer configuration
+
+    Returns:
+        The template repository of each layer, in layer order
+    """
+    from cookie_composer.templates.source import get_template_repos
+
+    repo_specs = [_template_repo_spec(_merge_layer_info(layer_info, **kwargs)) for layer_info in layer_infos]
+    return get_template_repos(repo_specs, local_path=local_path)
+
+
+def deserialize_layer(
+    layer_info: dict, local_path: Optional[Path] = None, template_repo: Optional[TemplateRepo] = None, **kwargs: Any
+) -> LayerConfig:
+    """Deserialize a layer configuration from a rendered layer, optionally using an already fetched template repo."""
+    from cookie_composer.templates.source import get_template_repo
+
+    layer_info = _merge_layer_info(layer_info, **kwargs)
+    repo_spec = _template_repo_spec(layer_info)
+    for key in ("template", "checkout", "password", "clone"):
+        layer_info.pop(key, None)
 
     template = Template(
-        repo=get_template_repo(
-            url=layer_info.pop("template"),
-            local_path=local_path,
-            checkout=layer_info.pop("checkout", None),
-            password=layer_info.pop("password", None),
-        ),
+        repo=template_repo or get_template_repo(local_path=local_path, **repo_spec),
         directory=layer_info.pop("directory", ""),
     )
     initial_context = layer_info.pop("context", {})  # Context from the composition file
@@ -62,7 +102,9 @@ def serialize_rendered_layer(rendered_layer: RenderedLayer) -> dict:
     return layer_info
 
 
-def deserialize_rendered_layer(rendered_layer_info: dict, location: Path) -> RenderedLayer:
+def deserialize_rendered_layer(
+    rendered_layer_info: dict, location: Path, template_repo: Optional[TemplateRepo] = None
+) -> RenderedLayer:
     """
     Deserialize a rendered layer from output.
 
@@ -70,6 +112,7 @@ def deserialize_rendered_layer(rendered_layer_info: dict, location: Path) -> Ren
         rendered_layer_info: A dictionary containing the rendered layer information
         location: The location of the rendered layer, typically the
             parent directory of the parent directory of the .composition.yaml file
+        template_repo: The already fetched template repository of the layer, if any
 
     Returns:
         A rendered layer object
@@ -84,7 +127,7 @@ def deserialize_rendered_layer(rendered_layer_info: dict, location: Path) -> Ren
         rendered_layer["rendered_name"] = layer_info.pop("rendered_name")
 
     return RenderedLayer(
-        layer=deserialize_layer(layer_info, local_path=location),
+        layer=deserialize_layer(layer_info, local_path=location, template_repo=template_repo),
         **rendered_layer,
     )
 
@@ -95,9 +138,13 @@ def serialize_composition(layers: List[LayerConfig]) -> List[dict]:
 
 
 def deserialize_composition(composition_info: List[dict], local_path: Optional[Path] = None, **kwargs) -> Composition:
-    """Deserialize a composition from output."""
+    """Deserialize a composition from output, fetching the layers' templates concurrently."""
+    template_repos = prefetch_template_repos(composition_info, local_path=local_path, **kwargs)
     return Composition(
-        layers=[deserialize_layer(layer_info, local_path=local_path, **kwargs) for layer_info in composition_info]
+        layers=[
+            deserialize_layer(layer_info, local_path=local_path, template_repo=template_repo, **kwargs)
+            for layer_info, template_repo in zip(composition_info, template_repos)
+        ]
     )
 
 
@@ -107,10 +154,14 @@ def serialize_rendered_composition(composition: RenderedComposition) -> List[dic
 
 
 def deserialize_rendered_composition(composition_info: List[dict], location: Path) -> RenderedComposition:
-    """Deserialize a rendered composition from output."""
+    """Deserialize a rendered composition from output, fetching the layers' templates concurrently."""
     rendered_name = composition_info[0]["rendered_name"]
+    template_repos = prefetch_template_repos(composition_info, local_path=location)
     return RenderedComposition(
-        layers=[deserialize_rendered_layer(layer_info, location) for layer_info in composition_info],
+        layers=[
+            deserialize_rendered_layer(layer_info, location, template_repo)
+            for layer_info, template_repo in zip(composition_info, template_repos)
+        ],
         render_dir=location.parent,
         rendered_name=rendered_name,
     )
@@ -119,13 +170,13 @@ def deserialize_rendered_composition(composition_info: List[dict], location: Pat
 def read_yaml(path_or_url: Union[str, Path]) -> List[dict]:
     """Read a YAML file and return a list of dictionaries."""
     import fsspec
-    from ruamel.yaml import YAML
 
-    yaml = YAML(typ="safe")
+    from cookie_composer.yaml_backend import load_all_yaml
+
     try:
         of = fsspec.open(path_or_url, mode="rt")
         with of as f:
-            return list(yaml.load_all(f))
+            return load_all_yaml(f.read())
     except FileNotFoundError as e:
         raise MissingCompositionFileError(str(path_or_url)) from e
 
@@ -133,14 +184,12 @@ def read_yaml(path_or_url: Union[str, Path]) -> List[dict]:
 def write_yaml(path: Path, contents: List[dict]) -> None:
     """Write a YAML file."""
     import fsspec
-    from ruamel.yaml import YAML
 
-    yaml = YAML(typ="safe")
-    yaml.default_flow_style = False
-    yaml.indent(mapping=2, sequence=4, offset=2)
+    from cookie_composer.yaml_backend import dump_all_yaml
+
     of = fsspec.open(str(path), mode="wt")
     with of as f:
-        yaml.dump_all(contents, f)
+        dump_all_yaml(contents, f)
 
 
 def is_composition_file(path_or_url: Union[str, Path]) -> bool:
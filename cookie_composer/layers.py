@@ -3,26 +3,33 @@
 import copy
 import logging
 import os
-import shutil
-import tempfile
 from collections import OrderedDict
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, MutableMapping, Optional
+from typing import Any, Dict, List, Mapping, MutableMapping, NamedTuple, Optional
 
 import click
 from cookiecutter.config import get_user_config
+from cookiecutter.exceptions import NonTemplatedInputDirException
 from cookiecutter.generate import apply_overwrites_to_context, generate_files
 from cookiecutter.main import _patch_import_path_for_repo
 from pydantic import BaseModel, DirectoryPath, Field, model_validator
 
-from cookie_composer.cc_overrides import CustomStrictEnvironment, prompt_for_config
+from cookie_composer.cc_overrides import (
+    CustomStrictEnvironment,
+    prompt_for_config,
+    use_bytecode_cache,
+    use_reflink_copies,
+)
 from cookie_composer.data_merge import DO_NOT_MERGE, Context, comprehensive_merge, get_merge_strategy
+from cookie_composer.file_writes import copy_if_changed, reflink_copies, reflinks_enabled
 from cookie_composer.matching import matches_any_glob
 from cookie_composer.merge_files import MERGE_FUNCTIONS
+from cookie_composer.merge_files.document_cache import cached_documents, invalidate_document
+from cookie_composer.render_cache import get_render_cache, get_render_cache_key
 
 from .templates.types import Template
-from .utils import echo
+from .utils import echo, temporary_render_dir
 
 logger = logging.getLogger(__name__)
 
@@ -178,7 +185,9 @@ class RenderedLayer(BaseModel):
         return values
 
 
-def get_write_strategy(origin: Path, destination: Path, rendered_layer: RenderedLayer) -> WriteStrategy:
+def get_write_strategy(
+    origin: Path, destination: Path, rendered_layer: RenderedLayer, destination_exists: Optional[bool] = None
+) -> WriteStrategy:
     """
     Based on the layer_config rules, determine if we should overwrite an existing path.
 
@@ -186,6 +195,8 @@ def get_write_strategy(origin: Path, destination: Path, rendered_layer: Rendered
         origin: Path within the rendered layer that we are evaluating.
         destination: Path to which we would write this file (may not actually exist)
         rendered_layer: Rendered layer configuration.
+        destination_exists: Whether the destination exists, or will exist when it is written.
+            Defaults to checking the file system.
 
     Returns:
         The appropriate way to handle writing this file.
@@ -194,7 +205,10 @@ def get_write_strategy(origin: Path, destination: Path, rendered_layer: Rendered
         logger.debug(f"{origin} matches a skip_generation pattern. Skipping.")
         return WriteStrategy.SKIP
 
-    if not destination.exists():
+    if destination_exists is None:
+        destination_exists = destination.exists()
+
+    if not destination_exists:
         logger.debug(f"{destination} does not exist. Writing.")
         return WriteStrategy.WRITE
 
@@ -221,14 +235,21 @@ def get_write_strategy(origin: Path, destination: Path, rendered_layer: Rendered
 
 
 def get_template_rendered_name(template: Template, context: MutableMapping) -> str:
-    """Find and render the template's root directory's name."""
-    from cookiecutter.find import find_template
+    """
+    Find and render the template's root directory's name.
 
+    Like cookiecutter's `find_template`, but it also lists templates in Zip archives without extracting them.
+
+    Raises:
+        NonTemplatedInputDirException: If the template doesn't have a templated root directory
+    """
     envvars = context.get("cookiecutter", {}).get("_jinja2_env_vars", {})
     env = CustomStrictEnvironment(context=context, keep_trailing_newline=True, **envvars)
-    template_dir = find_template(template.cached_path, env)
-    name_tmpl = env.from_string(template_dir.name)
-    return name_tmpl.render(**context)
+    for name in template.listdir():
+        if "cookiecutter" in name and env.variable_start_string in name and env.variable_end_string in name:
+            name_tmpl = env.from_string(name)
+            return name_tmpl.render(**context)
+    raise NonTemplatedInputDirException
 
 
 def render_layer(
@@ -254,53 +275,108 @@ def render_layer(
         The rendered layer information
     """
     full_context = full_context or Context()
+    layer_context = resolve_layer_context(layer_config, full_context)
+    _accept_hooks = should_accept_hooks(accept_hooks)
+    rendered_name = generate_layer_files(layer_config.template, render_dir, layer_context, commit, _accept_hooks)
+
+    rendered_layer = RenderedLayer(
+        layer=layer_config,
+        location=render_dir,
+        rendered_context=copy.deepcopy(layer_context),
+        rendered_commit=commit or layer_config.template.repo.latest_sha,
+        rendered_name=rendered_name,
+    )
+
+    return rendered_layer
+
+
+def resolve_layer_context(layer_config: LayerConfig, full_context: Context) -> dict:
+    """
+    Get the context to render a layer with, prompting the user if necessary.
+
+    Args:
+        layer_config: The configuration of the layer to render
+        full_context: The extra context from all layers in the composition
+
+    Returns:
+        A dict containing the context for rendering the layer
+    """
     user_config = get_user_config(config_file=None, default_config=False)
-    repo_dir = layer_config.template.cached_path
 
     default_context = user_config.get("default_context", {})
     context = layer_config.generate_context(
         default_context=default_context,
     )
     context_for_prompting = {k: v for k, v in context.items() if (k not in full_context or k.startswith("_"))}
-    layer_context = get_layer_context(
-        template_repo_dir=repo_dir,
+    return get_layer_context(
+        template_repo_dir=layer_config.template.cached_path,
         context_for_prompting=context_for_prompting,
         initial_context=layer_config.initial_context or {},
         full_context=full_context,
         no_input=layer_config.no_input,
     )
-    cookiecutter_context = {"cookiecutter": layer_context}
 
+
+def should_accept_hooks(accept_hooks: str) -> bool:
+    """Convert a layer's accept_hooks value into whether to run the hooks, asking the user if necessary."""
     if accept_hooks == "ask":
-        _accept_hooks = click.confirm("Do you want to execute hooks?")
-    else:
-        _accept_hooks = accept_hooks == "yes"
-
-    rendered_name = get_template_rendered_name(layer_config.template, cookiecutter_context)
-
-    # call cookiecutter's generate files function
-    with layer_config.template.repo.render_source(commit=commit) as repo_dir:
-        if layer_config.template.directory:
-            repo_dir = repo_dir / layer_config.template.directory  # NOQA: PLW2901
-        generate_files(
-            repo_dir=repo_dir,
-            context=cookiecutter_context,
-            overwrite_if_exists=False,
-            output_dir=str(render_dir),
-            accept_hooks=_accept_hooks,
-        )
+        return click.confirm("Do you want to execute hooks?")
+    return accept_hooks == "yes"
 
-    rendered_layer = RenderedLayer(
-        layer=layer_config,
-        location=render_dir,
-        rendered_context=copy.deepcopy(layer_context),
-        rendered_commit=commit or layer_config.template.repo.latest_sha,
-        rendered_name=rendered_name,
-    )
 
-    layer_config.template.cleanup()
+def generate_layer_files(
+    template: Template,
+    render_dir: Path,
+    layer_context: dict,
+    commit: Optional[str] = None,
+    accept_hooks: bool = True,
+    reflink: Optional[bool] = None,
+) -> str:
+    """
+    Generate the files of a layer using cookiecutter.
 
-    return rendered_layer
+    This doesn't prompt the user, so it can run in a separate process.
+
+    Args:
+        template: The template to render
+        render_dir: Where to render the template
+        layer_context: The resolved context of the layer
+        commit: The commit to checkout if the template is a git repo
+        accept_hooks: Run the template's pre- and post-hooks
+        reflink: Copy files with reflinks where possible. Defaults to the current
+            [reflink_copies][cookie_composer.file_writes.reflink_copies] setting.
+
+    Returns:
+        The name of the rendered template directory
+    """
+    if reflink is not None:
+        with reflink_copies(reflink):
+            return generate_layer_files(template, render_dir, layer_context, commit, accept_hooks)
+
+    cookiecutter_context = {"cookiecutter": layer_context}
+    rendered_name = get_template_rendered_name(template, cookiecutter_context)
+
+    # Rendering a specific commit is deterministic, so the result can be cached
+    render_cache = get_render_cache() if commit else None
+    cache_key = get_render_cache_key(commit, template.directory, layer_context, accept_hooks) if commit else ""
+
+    if render_cache is None or not render_cache.get(cache_key, render_dir / rendered_name):
+        # call cookiecutter's generate files function
+        render_source = template.repo.render_source(commit=commit, directory=template.directory)
+        with render_source as repo_dir, use_bytecode_cache(), use_reflink_copies():
+            if template.directory:
+                repo_dir = repo_dir / template.directory  # NOQA: PLW2901
+            generate_files(
+                repo_dir=repo_dir,
+                context=cookiecutter_context,
+                overwrite_if_exists=False,
+                output_dir=str(render_dir),
+                accept_hooks=accept_hooks,
+            )
+        if render_cache is not None:
+            render_cache.put(cache_key, render_dir / rendered_name)
+
+    return rendered_name
 
 
 def get_layer_context(
@@ -344,9 +420,13 @@ def get_layer_context(
 def render_layers(
     layers: List[LayerConfig],
     destination: Path,
-    initial_context: Optional[dict] = None,
+    initial_context: Optional[Mapping[str, Any]] = None,
     no_input: bool = False,
     accept_hooks: str = "all",
+    in_memory: bool = False,
+    parallel: bool = False,
+    max_workers: Optional[int] = None,
+    reflink: bool = False,
 ) -> List[RenderedLayer]:
     """
     Render layers to a destination.
@@ -354,32 +434,143 @@ def render_layers(
     Args:
         layers: A list of `LayerConfig` to render
         destination: The location to merge the rendered layers to
-        initial_context: An initial context to pass to the rendering
+        initial_context: An initial context to pass to the rendering. It isn't modified.
         no_input: If `True` force each layer's `no_input` attribute to `True`
         accept_hooks: How to process pre/post hooks.
+        in_memory: Render each layer in a memory-backed file system, so the generated files are only
+            written to disk once, when they are merged into the destination.
+        parallel: Resolve the context of every layer first, then generate the layers' files concurrently
+            in a process pool. The layers are still merged in order.
+        max_workers: The maximum number of processes used when `parallel` is `True`.
+            Defaults to the number of CPUs.
+        reflink: Copy files with copy-on-write clones (reflinks) where the file system supports them, and with
+            regular copies elsewhere. This speeds up templates with large files that are copied verbatim.
 
     Returns:
         A list of the rendered layer information
     """
-    full_context = Context(initial_context) if initial_context else Context()
+    # The bytecode cache is resolved once for all the layers' environments
+    with reflink_copies(reflink), use_bytecode_cache():
+        if parallel:
+            return _render_layers_concurrently(
+                layers, destination, initial_context, no_input, accept_hooks, in_memory, max_workers
+            )
+        return _render_layers_sequentially(layers, destination, initial_context, no_input, accept_hooks, in_memory)
+
+
+def _render_layers_sequentially(
+    layers: List[LayerConfig],
+    destination: Path,
+    initial_context: Optional[Mapping[str, Any]],
+    no_input: bool,
+    accept_hooks: str,
+    in_memory: bool,
+) -> List[RenderedLayer]:
+    """
+    Render each layer in turn, then merge them all into the destination.
+
+    The layers are kept in their render directories until the last one is rendered, so the merge can skip the
+    files that later layers overwrite. See [merge_rendered_layers][cookie_composer.layers.merge_rendered_layers].
+    """
+    from contextlib import ExitStack
+
+    full_context = Context(dict(initial_context)) if initial_context else Context()
     rendered_layers = []
     num_layers = len(layers)
     accept_hooks_layers = get_accept_hooks_per_layer(accept_hooks, num_layers)
 
-    for layer_config, accept_hook in zip(layers, accept_hooks_layers):
-        layer_config.no_input = True if no_input else layer_config.no_input
-        with tempfile.TemporaryDirectory() as render_dir:
-            rendered_layer = render_layer(
-                layer_config, Path(render_dir), full_context, layer_config._commit, accept_hook
-            )
-            merge_layers(destination, rendered_layer)
+    with ExitStack() as stack:
+        for layer_config, accept_hook in zip(layers, accept_hooks_layers):
+            layer_config.no_input = True if no_input else layer_config.no_input
+            render_dir = stack.enter_context(temporary_render_dir(in_memory))
+            rendered_layer = render_layer(layer_config, render_dir, full_context, layer_config._commit, accept_hook)
             full_context.update(rendered_layer.rendered_context)
+            merged_context = comprehensive_merge(rendered_layer.rendered_context, rendered_layer.layer.initial_context)
+            rendered_layer.layer.initial_context = merged_context  # type: ignore[assignment]
+            rendered_layers.append(rendered_layer)
+            full_context = full_context.new_child(merged_context)
+
+        merge_rendered_layers(destination, rendered_layers)
+
+    for rendered_layer in rendered_layers:
         rendered_layer.location = destination
-        merged_context = comprehensive_merge(rendered_layer.rendered_context, rendered_layer.layer.initial_context)
-        rendered_layer.layer.initial_context = merged_context  # type: ignore[assignment]
-        rendered_layers.append(rendered_layer)
+
+    return rendered_layers
+
+
+def _render_layers_concurrently(
+    layers: List[LayerConfig],
+    destination: Path,
+    initial_context: Optional[Mapping[str, Any]],
+    no_input: bool,
+    accept_hooks: str,
+    in_memory: bool,
+    max_workers: Optional[int],
+) -> List[RenderedLayer]:
+    """
+    Render layers by resolving every context first and generating the files concurrently.
+
+    A layer's context only depends on the contexts of previous layers, not on their files. So the contexts are
+    resolved in order, possibly prompting the user, before any files are generated.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from contextlib import ExitStack
+
+    full_context = Context(dict(initial_context)) if initial_context else Context()
+    accept_hooks_layers = get_accept_hooks_per_layer(accept_hooks, len(layers))
+
+    layer_contexts = []
+    layer_accept_hooks = []
+    merged_contexts = []
+    for layer_config, accept_hook in zip(layers, accept_hooks_layers):
+        layer_config.no_input = True if no_input else layer_config.no_input
+        layer_context = resolve_layer_context(layer_config, full_context)
+        layer_contexts.append(layer_context)
+        layer_accept_hooks.append(should_accept_hooks(accept_hook))
+        full_context.update(copy.deepcopy(layer_context))
+        merged_context = comprehensive_merge(layer_context, layer_config.initial_context)
+        merged_contexts.append(merged_context)
         full_context = full_context.new_child(merged_context)
 
+    with ExitStack() as stack:
+        render_dirs = [stack.enter_context(temporary_render_dir(in_memory)) for _ in layers]
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    generate_layer_files,
+                    layer_config.template,
+                    render_dir,
+                    layer_context,
+                    layer_config._commit,
+                    accept_hook,
+                    reflinks_enabled(),
+                )
+                for layer_config, render_dir, layer_context, accept_hook in zip(
+                    layers, render_dirs, layer_contexts, layer_accept_hooks
+                )
+            ]
+            rendered_names = [future.result() for future in futures]
+
+        rendered_layers = []
+        for layer_config, render_dir, layer_context, rendered_name in zip(
+            layers, render_dirs, layer_contexts, rendered_names
+        ):
+            rendered_layer = RenderedLayer(
+                layer=layer_config,
+                location=render_dir,
+                rendered_context=copy.deepcopy(layer_context),
+                rendered_commit=layer_config._commit or layer_config.template.repo.latest_sha,
+                rendered_name=rendered_name,
+            )
+            rendered_layers.append(rendered_layer)
+
+        merge_rendered_layers(destination, rendered_layers)
+
+        for rendered_layer, merged_context in zip(rendered_layers, merged_contexts):
+            rendered_layer.location = destination
+            rendered_layer.layer.initial_context = merged_context  # type: ignore[assignment]
+
     return rendered_layers
 
 
@@ -417,9 +608,10 @@ def merge_layers(destination: Path, rendered_layer: RenderedLayer) -> None:
             write_strat = get_write_strategy(origin_path, dest_path, rendered_layer)
             if write_strat == WriteStrategy.MERGE:
                 merge_strategy = get_merge_strategy(origin_path, rendered_layer.layer.merge_strategies)
-                MERGE_FUNCTIONS[dest_path.suffix](origin_path, dest_path, merge_strategy)
+                MERGE_FUNCTIONS.get_for_path(dest_path)(origin_path, dest_path, merge_strategy)
             elif write_strat == WriteStrategy.WRITE:
-                shutil.copy(origin_path, dest_path)
+                invalidate_document(dest_path)
+                copy_if_changed(origin_path, dest_path)
 
         for d in dirs:
             dest_path = destination / rel_root / d
@@ -427,3 +619,113 @@ def merge_layers(destination: Path, rendered_layer: RenderedLayer) -> None:
             write_strat = get_write_strategy(origin_path, dest_path, rendered_layer)
             if write_strat in {WriteStrategy.WRITE, WriteStrategy.MERGE}:
                 dest_path.mkdir(parents=True, exist_ok=True)
+
+
+class MergeOperation(NamedTuple):
+    """A rendered file to write to, or merge into, a destination path."""
+
+    origin: Path
+    """The path to the rendered file."""
+
+    write_strategy: WriteStrategy
+    """Either `WriteStrategy.WRITE` or `WriteStrategy.MERGE`."""
+
+    merge_strategy: str = DO_NOT_MERGE
+    """The merge strategy when merging."""
+
+
+class MergePlan(NamedTuple):
+    """The operations needed to merge several rendered layers into a destination."""
+
+    directories: List[Path]
+    """The directories to create, in order."""
+
+    files: Dict[Path, List[MergeOperation]]
+    """The operations for each destination file, in order."""
+
+
+def plan_layer_merges(destination: Path, rendered_layers: List[RenderedLayer]) -> MergePlan:
+    """
+    Work out how each destination path is produced when the rendered layers are merged in order.
+
+    Each layer is evaluated the same way as [merge_layers][cookie_composer.layers.merge_layers], except that paths
+    written by previous layers are treated as existing without writing them. A write discards the operations
+    planned for the path by previous layers, so each path only keeps the last write and the merges that follow it.
+
+    Args:
+        destination: The root path to merge into.
+        rendered_layers: The rendered layers, in order.
+
+    Returns:
+        The merge plan
+    """
+    directories: Dict[Path, None] = OrderedDict()
+    files: Dict[Path, List[MergeOperation]] = OrderedDict()
+
+    for rendered_layer in rendered_layers:
+        for root, dirs, filenames in os.walk(rendered_layer.location):
+            rel_root = Path(root).relative_to(rendered_layer.location)
+
+            for f in filenames:
+                dest_path = destination / rel_root / f
+                origin_path = Path(f"{root}/{f}")
+                exists = dest_path in files or dest_path.exists()
+                write_strat = get_write_strategy(origin_path, dest_path, rendered_layer, exists)
+                if write_strat == WriteStrategy.MERGE:
+                    merge_strategy = get_merge_strategy(origin_path, rendered_layer.layer.merge_strategies)
+                    files.setdefault(dest_path, []).append(
+                        MergeOperation(origin_path, WriteStrategy.MERGE, merge_strategy)
+                    )
+                elif write_strat == WriteStrategy.WRITE:
+                    files[dest_path] = [MergeOperation(origin_path, WriteStrategy.WRITE)]
+
+            for d in dirs:
+                dest_path = destination / rel_root / d
+                origin_path = Path(f"{root}/{d}")
+                exists = dest_path in directories or dest_path.exists()
+                write_strat = get_write_strategy(origin_path, dest_path, rendered_layer, exists)
+                if write_strat in {WriteStrategy.WRITE, WriteStrategy.MERGE}:
+                    directories[dest_path] = None
+
+    return MergePlan(list(directories), files)
+
+
+def merge_rendered_layers(destination: Path, rendered_layers: List[RenderedLayer]) -> None:
+    """
+    Merge several rendered layers into a destination, writing each destination path once.
+
+    The result is the same as calling [merge_layers][cookie_composer.layers.merge_layers] for each layer in order.
+    Files that are not merged are copied once from the last layer that writes them. Files that are merged are
+    parsed once, every merge is applied in memory, and the result is written once. Merge functions that don't use
+    the document cache read the destination file themselves, so the written file is copied before merging into it.
+
+    Args:
+        destination: The root path to merge into.
+        rendered_layers: The rendered layers, in order.
+    """
+    plan = plan_layer_merges(destination, rendered_layers)
+
+    for directory in plan.directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    with cached_documents() as document_cache:
+        for dest_path, operations in plan.files.items():
+            first, merges = operations[0], operations[1:]
+            deferred_write = None
+            if first.write_strategy != WriteStrategy.WRITE:
+                merges = operations
+            elif merges and MERGE_FUNCTIONS.uses_document_cache(dest_path):
+                # The merges read the written file from the layer, instead of from a copy
+                document_cache.set_source(dest_path, first.origin)
+                deferred_write = first.origin
+            else:
+                copy_if_changed(first.origin, dest_path)
+
+            try:
+                for operation in merges:
+                    MERGE_FUNCTIONS.get_for_path(dest_path)(operation.origin, dest_path, operation.merge_strategy)
+            except Exception:
+                if deferred_write is not None and dest_path not in document_cache:
+                    # No merge was done, so the written file is only in the layer
+                    copy_if_changed(deferred_write, dest_path)
+                raise
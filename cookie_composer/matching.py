@@ -1,8 +1,14 @@
 """Matching files and patterns."""
 
-from fnmatch import fnmatch
+import os
+import re
+from fnmatch import fnmatch, translate
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+_GROUP_REFERENCE = re.compile(r"(?<!\\)\(\?P([<=])(\w+)")
+"""Named groups and back references generated by some versions of `fnmatch.translate`."""
 
 
 def rel_fnmatch(name: str, pat: str) -> bool:
@@ -10,6 +16,65 @@ def rel_fnmatch(name: str, pat: str) -> bool:
     return fnmatch(name, pat) if pat.startswith("*") else fnmatch(name, f"*{pat}")
 
 
+class GlobMatcher:
+    """
+    A sequence of glob patterns compiled into a single regular expression.
+
+    Each pattern is matched the same way as [rel_fnmatch][cookie_composer.matching.rel_fnmatch].
+    """
+
+    def __init__(self, patterns: Tuple[str, ...]):
+        self.patterns = patterns
+        self._group_index: Dict[str, int] = {}
+
+        alternatives = []
+        for index, pattern in enumerate(patterns):
+            group_name = f"_{index}"
+            self._group_index[group_name] = index
+            rel_pattern = pattern if pattern.startswith("*") else f"*{pattern}"
+            regex = translate(os.path.normcase(rel_pattern))
+            # Keep the group names generated by `translate` unique within the combined expression
+            regex = _GROUP_REFERENCE.sub(rf"(?P\1{group_name}_\2", regex)
+            alternatives.append(f"(?P<{group_name}>{regex})")
+
+        self._regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def first_match(self, path: Union[str, Path]) -> Optional[int]:
+        """
+        Return the index of the first pattern that matches the path.
+
+        Args:
+            path: Path to test
+
+        Returns:
+            The index of the first matching pattern, or `None` if no pattern matches
+        """
+        if self._regex is None:
+            return None
+        match = self._regex.match(os.path.normcase(str(path)))
+        return None if match is None else self._group_index[match.lastgroup]  # type: ignore[index]
+
+    def matches(self, path: Union[str, Path]) -> bool:
+        """Does the path match any of the patterns?"""
+        return self.first_match(path) is not None
+
+
+@lru_cache(maxsize=256)
+def compile_globs(patterns: Tuple[str, ...]) -> GlobMatcher:
+    """
+    Return a compiled matcher for the glob patterns.
+
+    Matchers are cached, so a set of patterns is only compiled once.
+
+    Args:
+        patterns: The glob patterns
+
+    Returns:
+        The compiled matcher
+    """
+    return GlobMatcher(patterns)
+
+
 def matches_any_glob(path: Union[str, Path], patterns: List[str]) -> bool:
     """
     Does the path match any of the glob patterns?
@@ -21,4 +86,4 @@ def matches_any_glob(path: Union[str, Path], patterns: List[str]) -> bool:
     Returns:
         `True` if it matches any of the patterns
     """
-    return any(rel_fnmatch(str(path), pat) for pat in patterns)
+    return compile_globs(tuple(patterns)).matches(path)
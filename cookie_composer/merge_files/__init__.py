@@ -7,26 +7,182 @@ The merging functions should look similar to the following:
 def merge_generic_files(origin: Path, destination: Path, merge_strategy: str) -> None:
 ```
 
-The function must write the file to destination.
+The function must write the file to destination. Functions that parse the destination should read and write it with
+[read_document][cookie_composer.merge_files.document_cache.read_document] and
+[write_document][cookie_composer.merge_files.document_cache.write_document], so several merges into the same
+destination are applied in memory and written once. Only the built-in merge functions, and the ones registered with
+`uses_document_cache=True`, are trusted to do so; the destination file is written before the others are called.
 
 The function must wrap any errors into a [MergeError][cookie_composer.exceptions.MergeError] and raise it.
+
+Merge functions are registered in [MERGE_FUNCTIONS][cookie_composer.merge_files.MERGE_FUNCTIONS] by file suffix
+(`.json`) or file name (`requirements.txt`), and their module is only imported the first time a file needs it.
+Other packages can register merge functions with an entry point in the `cookie_composer.merge_files` group:
+
+```toml
+[project.entry-points."cookie_composer.merge_files"]
+".env" = "my_package.merge:merge_env_files"
+"requirements.txt" = "my_package.merge:merge_requirements_files"
+```
 """
 
+import importlib
+import logging
+from functools import partial
 from pathlib import Path
-from typing import Callable, Dict
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Optional, Set
 
-from cookie_composer.merge_files.ini_file import merge_ini_files
-from cookie_composer.merge_files.json_file import merge_json_files
-from cookie_composer.merge_files.toml_file import merge_toml_files
-from cookie_composer.merge_files.yaml_file import merge_yaml_files
+logger = logging.getLogger(__name__)
 
 merge_function = Callable[[Path, Path, str], None]
 
-MERGE_FUNCTIONS: Dict[str, merge_function] = {
-    ".json": merge_json_files,
-    ".yaml": merge_yaml_files,
-    ".yml": merge_yaml_files,
-    ".ini": merge_ini_files,
-    ".cfg": merge_ini_files,
-    ".toml": merge_toml_files,
+ENTRY_POINT_GROUP = "cookie_composer.merge_files"
+"""The entry point group for registering merge functions from other packages."""
+
+BUILTIN_MERGE_FUNCTIONS: Dict[str, str] = {
+    ".json": "cookie_composer.merge_files.json_file:merge_json_files",
+    ".yaml": "cookie_composer.merge_files.yaml_file:merge_yaml_files",
+    ".yml": "cookie_composer.merge_files.yaml_file:merge_yaml_files",
+    ".ini": "cookie_composer.merge_files.ini_file:merge_ini_files",
+    ".cfg": "cookie_composer.merge_files.ini_file:merge_ini_files",
+    ".toml": "cookie_composer.merge_files.toml_file:merge_toml_files",
 }
+"""The `module:function` import path of the merge function for each built-in suffix."""
+
+
+def import_object(import_path: str) -> merge_function:
+    """Import an object from a `module:attribute` import path."""
+    module_name, _, attribute = import_path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _get_entry_points(group: str) -> list:
+    """Return the entry points in a group."""
+    from importlib.metadata import entry_points
+
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        return list(all_entry_points.select(group=group))
+    return list(all_entry_points.get(group, []))  # Python < 3.10
+
+
+class MergeFunctionRegistry(Mapping[str, merge_function]):
+    """
+    The merge functions by file suffix or file name, imported on first use.
+
+    Entry points in the `cookie_composer.merge_files` group are discovered the first time a key isn't found in the
+    registered merge functions. Registered merge functions take precedence over entry points with the same name.
+
+    The registry also records which merge functions read and write their destination through the document cache.
+    Merge functions from entry points are assumed not to.
+    """
+
+    def __init__(
+        self,
+        import_paths: Dict[str, str],
+        entry_point_group: Optional[str] = ENTRY_POINT_GROUP,
+        document_cache_keys: Iterable[str] = (),
+    ):
+        self._loaders: Dict[str, Callable[[], merge_function]] = {
+            key: partial(import_object, import_path) for key, import_path in import_paths.items()
+        }
+        self._functions: Dict[str, merge_function] = {}
+        self._entry_point_group = entry_point_group
+        self._document_cache_keys: Set[str] = set(document_cache_keys)
+
+    def register(self, key: str, function: merge_function, uses_document_cache: bool = False) -> None:
+        """
+        Register a merge function for a file suffix or file name, replacing any existing merge function.
+
+        Args:
+            key: The file suffix, like `.json`, or the file name, like `requirements.txt`
+            function: The merge function
+            uses_document_cache: The merge function reads and writes the destination with `read_document` and
+                `write_document`, so it doesn't need the destination file to exist before it is called.
+        """
+        self._loaders[key] = lambda: function
+        self._functions[key] = function
+        if uses_document_cache:
+            self._document_cache_keys.add(key)
+        else:
+            self._document_cache_keys.discard(key)
+
+    def _discover_entry_points(self) -> None:
+        """Add the merge functions registered with entry points, once."""
+        if self._entry_point_group is None:
+            return
+        for entry_point in _get_entry_points(self._entry_point_group):
+            if entry_point.name in self._loaders:
+                logger.debug(f"Ignoring the {entry_point.value} merge function: {entry_point.name} is registered.")
+                continue
+            self._loaders[entry_point.name] = entry_point.load
+        self._entry_point_group = None
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a merge function is registered for the key, looking at the entry points if needed."""
+        if key not in self._loaders:
+            self._discover_entry_points()
+        return key in self._loaders
+
+    def __getitem__(self, key: str) -> merge_function:
+        """Return the merge function for the key, importing it on first use."""
+        if key not in self._functions:
+            if key not in self:
+                raise KeyError(key)
+            self._functions[key] = self._loaders[key]()
+        return self._functions[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys of every registered merge function, including the entry points."""
+        self._discover_entry_points()
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        """Return the number of registered merge functions, including the entry points."""
+        self._discover_entry_points()
+        return len(self._loaders)
+
+    def get_key(self, path: Path) -> Optional[str]:
+        """
+        Return the key of the merge function for the path, without importing it.
+
+        The file name takes precedence over the file suffix.
+
+        Args:
+            path: The path of the file to merge
+
+        Returns:
+            The file name or suffix of the path, or `None` if no merge function handles the path
+        """
+        for key in (path.name, path.suffix):
+            if key and key in self:
+                return key
+        return None
+
+    def uses_document_cache(self, path: Path) -> bool:
+        """
+        Return `True` if the merge function for the path reads and writes it through the document cache.
+
+        Args:
+            path: The path of the file to merge
+
+        Returns:
+            `True` if the destination file doesn't need to exist before the merge function is called
+        """
+        return self.get_key(path) in self._document_cache_keys
+
+    def get_for_path(self, path: Path) -> merge_function:
+        """
+        Return the merge function for the path.
+
+        Raises:
+            KeyError: If no merge function handles the path
+        """
+        key = self.get_key(path)
+        if key is None:
+            raise KeyError(path.name)
+        return self[key]
+
+
+MERGE_FUNCTIONS = MergeFunctionRegistry(BUILTIN_MERGE_FUNCTIONS, document_cache_keys=BUILTIN_MERGE_FUNCTIONS)
+"""The registry of merge functions."""
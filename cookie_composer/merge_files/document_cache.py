@@ -0,0 +1,173 @@
+"""
+Keep parsed destination documents in memory while merging several files into them.
+
+Merge functions read and write their destination documents through
+[read_document][cookie_composer.merge_files.document_cache.read_document] and
+[write_document][cookie_composer.merge_files.document_cache.write_document].
+Outside of a [cached_documents][cookie_composer.merge_files.document_cache.cached_documents] block,
+they read and write the file directly.
+Inside the block, each destination is parsed once, every merge is folded into the parsed document in memory,
+and the document is serialized once when the block ends.
+"""
+
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+DocumentReader = Callable[[Path], Any]
+DocumentWriter = Callable[[Path, Any], None]
+
+
+class DocumentCache:
+    """Parsed documents, keyed by their destination path, waiting to be written."""
+
+    def __init__(self):
+        self._documents: Dict[str, Tuple[Any, DocumentWriter]] = {}
+        self._sources: Dict[str, Path] = {}
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.abspath(path)
+
+    def __contains__(self, path: Path) -> bool:
+        """Return `True` if a document for the path is waiting to be written."""
+        return self._key(path) in self._documents
+
+    def set_source(self, path: Path, source: Path) -> None:
+        """
+        Read the document for `path` from `source` instead, the first time it is read.
+
+        This avoids copying a file to the destination only to parse it again.
+
+        Args:
+            path: The destination path of the document
+            source: The file containing the initial contents of the document
+        """
+        self.invalidate(path)
+        self._sources[self._key(path)] = source
+
+    def get_source(self, path: Path) -> Path:
+        """Return the file containing the initial contents of the document for `path`."""
+        return self._sources.get(self._key(path), path)
+
+    def read(self, path: Path, reader: DocumentReader) -> Any:
+        """Return the cached document for the path, or read it with `reader`."""
+        key = self._key(path)
+        if key in self._documents:
+            return self._documents[key][0]
+        return reader(self._sources.get(key, path))
+
+    def write(self, path: Path, document: Any, writer: DocumentWriter) -> None:
+        """Keep the document in memory until the cache is flushed."""
+        self._documents[self._key(path)] = (document, writer)
+
+    def invalidate(self, path: Path) -> None:
+        """Forget the document for the path without writing it, for example when the file is overwritten."""
+        key = self._key(path)
+        self._documents.pop(key, None)
+        self._sources.pop(key, None)
+
+    def flush(self) -> None:
+        """Write all the cached documents to their paths and clear the cache."""
+        for key, (document, writer) in self._documents.items():
+            path = Path(key)
+            writer(path, document)
+            if key in self._sources:
+                shutil.copymode(self._sources[key], path)
+        self._documents.clear()
+        self._sources.clear()
+
+
+_active_cache: Optional[DocumentCache] = None
+
+
+def get_active_cache() -> Optional[DocumentCache]:
+    """Return the document cache in use, if any."""
+    return _active_cache
+
+
+@contextmanager
+def cached_documents() -> Iterator[DocumentCache]:
+    """
+    Keep the documents written by merge functions in memory, and write them when the block ends.
+
+    If a cache is already in use, it is reused and flushed by the outermost block.
+
+    The documents are also written if the block raises an exception. Without the cache, each merge is written as it
+    happens, and files copied by the layers are already on disk, so the merges done before the error are kept too.
+
+    Yields:
+        The document cache
+    """
+    global _active_cache  # noqa: PLW0603
+
+    if _active_cache is not None:
+        yield _active_cache
+        return
+
+    document_cache = _active_cache = DocumentCache()
+    try:
+        yield document_cache
+    finally:
+        # The cache stays active while flushing, so the writers can read the sources of the documents
+        try:
+            document_cache.flush()
+        finally:
+            _active_cache = None
+
+
+def read_document(path: Path, reader: DocumentReader) -> Any:
+    """
+    Read the parsed document for a destination path.
+
+    Args:
+        path: The destination path
+        reader: A function that parses a file
+
+    Returns:
+        The parsed document
+    """
+    if _active_cache is None:
+        return reader(path)
+    return _active_cache.read(path, reader)
+
+
+def write_document(path: Path, document: Any, writer: DocumentWriter) -> None:
+    """
+    Write a parsed document to its destination path, or keep it in memory if a cache is in use.
+
+    Args:
+        path: The destination path
+        document: The parsed document
+        writer: A function that serializes the document to a file
+    """
+    if _active_cache is None:
+        writer(path, document)
+    else:
+        _active_cache.write(path, document, writer)
+
+
+def get_document_source(path: Path) -> Path:
+    """
+    Return the file containing the initial contents of the document for a destination path.
+
+    Writers that keep the formatting of the existing file read it from this path.
+
+    Args:
+        path: The destination path
+
+    Returns:
+        The source set with [set_source][cookie_composer.merge_files.document_cache.DocumentCache.set_source], or the
+        destination path
+    """
+    if _active_cache is None:
+        return path
+    return _active_cache.get_source(path)
+
+
+def invalidate_document(path: Path) -> None:
+    """Forget any cached document for the path, because the file is about to be overwritten."""
+    if _active_cache is not None:
+        _active_cache.invalidate(path)
@@ -1,13 +1,38 @@
 """Merge two .ini files into one."""
 
 import configparser
+import io
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict
 
 from cookie_composer import data_merge
-from cookie_composer.data_merge import COMPREHENSIVE, DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE
+from cookie_composer.data_merge import (
+    COMPREHENSIVE,
+    DO_NOT_MERGE,
+    KEYED_COMPREHENSIVE,
+    NESTED_OVERWRITE,
+    OVERWRITE,
+    parse_merge_strategy,
+)
 from cookie_composer.exceptions import MergeError
+from cookie_composer.file_writes import write_text_if_changed
+from cookie_composer.merge_files.document_cache import read_document, write_document
+
+
+def read_ini(path: Path) -> configparser.ConfigParser:
+    """Read and parse an INI file."""
+    config = configparser.ConfigParser()
+    with path.open() as f:
+        config.read_file(f)
+    return config
+
+
+def write_ini(path: Path, config: configparser.ConfigParser) -> None:
+    """Write a parsed INI file, unless the file already has the same content."""
+    buffer = io.StringIO()
+    config.write(buffer)
+    write_text_if_changed(path, buffer.getvalue())
 
 
 def merge_ini_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
@@ -29,9 +54,10 @@ def merge_ini_files(new_file: Path, existing_file: Path, merge_strategy: str) ->
             merge_strategy,
             "Can not merge with do-not-merge strategy.",
         )
+
+    strategy_name, record_keys = parse_merge_strategy(merge_strategy)
     try:
-        existing_config = configparser.ConfigParser()
-        existing_config.read_file(existing_file.open())
+        existing_config = read_document(existing_file, read_ini)
 
         if merge_strategy == OVERWRITE:
             new_config = configparser.ConfigParser()
@@ -39,19 +65,21 @@ def merge_ini_files(new_file: Path, existing_file: Path, merge_strategy: str) ->
             existing_config.update(new_config)
         elif merge_strategy == NESTED_OVERWRITE:
             existing_config.read(new_file)
-        elif merge_strategy == COMPREHENSIVE:
+        elif merge_strategy == COMPREHENSIVE or strategy_name == KEYED_COMPREHENSIVE:
             new_config = configparser.ConfigParser()
             new_config.read_file(new_file.open())
             new_config_dict = config_to_dict(new_config)
             existing_config_dict = config_to_dict(existing_config)
-            existing_config_dict = data_merge.comprehensive_merge(existing_config_dict, new_config_dict)
+            existing_config_dict = data_merge.comprehensive_merge(
+                existing_config_dict, new_config_dict, record_keys=record_keys
+            )
             existing_config = dict_to_config(existing_config_dict)
         else:
             raise MergeError(error_message=f"Unrecognized merge strategy {merge_strategy}")
     except (configparser.Error, FileNotFoundError) as e:
         raise MergeError(str(new_file), str(existing_file), merge_strategy, str(e)) from e
 
-    existing_config.write(existing_file.open("w"))
+    write_document(existing_file, existing_config, write_ini)
 
 
 def config_to_dict(config: configparser.ConfigParser) -> dict:
@@ -6,8 +6,17 @@ from typing import Any
 import orjson
 
 from cookie_composer import data_merge
-from cookie_composer.data_merge import COMPREHENSIVE, DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE
+from cookie_composer.data_merge import (
+    COMPREHENSIVE,
+    DO_NOT_MERGE,
+    KEYED_COMPREHENSIVE,
+    NESTED_OVERWRITE,
+    OVERWRITE,
+    parse_merge_strategy,
+)
 from cookie_composer.exceptions import MergeError
+from cookie_composer.file_writes import write_text_if_changed
+from cookie_composer.merge_files.document_cache import read_document, write_document
 
 
 def default(obj: Any) -> dict:
@@ -19,6 +28,16 @@ def default(obj: Any) -> dict:
     raise TypeError
 
 
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file."""
+    return orjson.loads(path.read_text())
+
+
+def write_json(path: Path, data: Any) -> None:
+    """Serialize data to a JSON file, unless the file already has the same content."""
+    write_text_if_changed(path, orjson.dumps(data, default=default).decode("utf-8"))
+
+
 def merge_json_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
     """
     Merge two json files into one.
@@ -41,17 +60,20 @@ def merge_json_files(new_file: Path, existing_file: Path, merge_strategy: str) -
 
     try:
         new_data = orjson.loads(new_file.read_text())
-        existing_data = orjson.loads(existing_file.read_text())
+        existing_data = read_document(existing_file, read_json)
     except (orjson.JSONDecodeError, FileNotFoundError) as e:
         raise MergeError(str(new_file), str(existing_file), merge_strategy, str(e)) from e
 
+    strategy_name, record_keys = parse_merge_strategy(merge_strategy)
     if merge_strategy == OVERWRITE:
         existing_data.update(new_data)
     elif merge_strategy == NESTED_OVERWRITE:
         existing_data = data_merge.deep_merge(existing_data, new_data)
     elif merge_strategy == COMPREHENSIVE:
         existing_data = data_merge.comprehensive_merge(existing_data, new_data)
+    elif strategy_name == KEYED_COMPREHENSIVE:
+        existing_data = data_merge.comprehensive_merge(existing_data, new_data, record_keys=record_keys)
     else:
         raise MergeError(error_message=f"Unrecognized merge strategy {merge_strategy}")
 
-    existing_file.write_text(orjson.dumps(existing_data, default=default).decode("utf-8"))
+    write_document(existing_file, existing_data, write_json)
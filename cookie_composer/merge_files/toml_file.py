@@ -1,12 +1,38 @@
 """Merge two toml files into one."""
 
 from pathlib import Path
+from typing import Any, Tuple, Type
 
-import toml
-
-from cookie_composer import data_merge
-from cookie_composer.data_merge import COMPREHENSIVE, DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE
+from cookie_composer import data_merge, toml_backend
+from cookie_composer.data_merge import (
+    COMPREHENSIVE,
+    DO_NOT_MERGE,
+    KEYED_COMPREHENSIVE,
+    NESTED_OVERWRITE,
+    OVERWRITE,
+    parse_merge_strategy,
+)
 from cookie_composer.exceptions import MergeError
+from cookie_composer.file_writes import write_text_if_changed
+from cookie_composer.merge_files.document_cache import get_document_source, read_document, write_document
+
+
+def read_toml(path: Path) -> Any:
+    """Read and parse a TOML file."""
+    return toml_backend.loads(path.read_text())
+
+
+def write_toml(path: Path, data: Any) -> None:
+    """
+    Serialize data to a TOML file, unless the file already has the same content.
+
+    With `tomlkit`, the formatting and comments of the document's original file are kept.
+    """
+    layout = None
+    layout_path = get_document_source(path)
+    if toml_backend.get_writer() == toml_backend.TOMLKIT and layout_path.is_file():
+        layout = layout_path.read_text()
+    write_text_if_changed(path, toml_backend.dumps(data, layout))
 
 
 def merge_toml_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
@@ -29,19 +55,23 @@ def merge_toml_files(new_file: Path, existing_file: Path, merge_strategy: str) -
             "Can not merge with do-not-merge strategy.",
         )
 
+    read_errors: Tuple[Type[Exception], ...] = (*toml_backend.get_decode_errors(), FileNotFoundError, TypeError)
     try:
-        new_data = toml.loads(new_file.read_text())
-        existing_data = toml.loads(existing_file.read_text())
-    except (toml.TomlDecodeError, FileNotFoundError, TypeError) as e:
+        new_data = toml_backend.loads(new_file.read_text())
+        existing_data = read_document(existing_file, read_toml)
+    except read_errors as e:
         raise MergeError(str(new_file), str(existing_file), merge_strategy, str(e)) from e
 
+    strategy_name, record_keys = parse_merge_strategy(merge_strategy)
     if merge_strategy == OVERWRITE:
         existing_data.update(new_data)
     elif merge_strategy == NESTED_OVERWRITE:
         existing_data = data_merge.deep_merge(existing_data, new_data)
     elif merge_strategy == COMPREHENSIVE:
         existing_data = data_merge.comprehensive_merge(existing_data, new_data)
+    elif strategy_name == KEYED_COMPREHENSIVE:
+        existing_data = data_merge.comprehensive_merge(existing_data, new_data, record_keys=record_keys)
     else:
         raise MergeError(error_message=f"Unrecognized merge strategy {merge_strategy}")
 
-    existing_file.write_text(toml.dumps(existing_data))
+    write_document(existing_file, existing_data, write_toml)
@@ -1,12 +1,34 @@
 """Merge two json files into one."""
 
+import io
 from pathlib import Path
-
-from immutabledict import ImmutableOrderedDict, immutabledict
+from typing import Any
 
 from cookie_composer import data_merge
-from cookie_composer.data_merge import COMPREHENSIVE, DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE
+from cookie_composer.data_merge import (
+    COMPREHENSIVE,
+    DO_NOT_MERGE,
+    KEYED_COMPREHENSIVE,
+    NESTED_OVERWRITE,
+    OVERWRITE,
+    parse_merge_strategy,
+)
 from cookie_composer.exceptions import MergeError
+from cookie_composer.file_writes import write_text_if_changed
+from cookie_composer.merge_files.document_cache import invalidate_document, read_document, write_document
+from cookie_composer.yaml_backend import dump_yaml, load_yaml
+
+
+def read_yaml(path: Path) -> Any:
+    """Read and parse a YAML file."""
+    return load_yaml(path.read_bytes())
+
+
+def write_yaml(path: Path, data: Any) -> None:
+    """Serialize data to a YAML file, unless the file already has the same content."""
+    buffer = io.StringIO()
+    dump_yaml(data, buffer)
+    write_text_if_changed(path, buffer.getvalue(), encoding="utf-8")
 
 
 def merge_yaml_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
@@ -21,13 +43,7 @@ def merge_yaml_files(new_file: Path, existing_file: Path, merge_strategy: str) -
     Raises:
         MergeError: If something goes wrong
     """
-    from ruamel.yaml import YAML, SafeRepresenter, YAMLError
-
-    yaml = YAML(typ="safe")
-    yaml.default_flow_style = False
-    yaml.indent(mapping=2, sequence=4, offset=2)
-    yaml.Representer.add_representer(immutabledict, SafeRepresenter.represent_dict)
-    yaml.Representer.add_representer(ImmutableOrderedDict, SafeRepresenter.represent_dict)
+    from ruamel.yaml import YAMLError
 
     if merge_strategy == DO_NOT_MERGE:
         raise MergeError(
@@ -38,19 +54,23 @@ def merge_yaml_files(new_file: Path, existing_file: Path, merge_strategy: str) -
         )
 
     try:
-        new_data = yaml.load(new_file)
-        existing_data = yaml.load(existing_file)
+        new_data = read_yaml(new_file)
+        existing_data = read_document(existing_file, read_yaml)
     except (YAMLError, FileNotFoundError) as e:
         raise MergeError(str(new_file), str(existing_file), merge_strategy, str(e)) from e
 
+    strategy_name, record_keys = parse_merge_strategy(merge_strategy)
     if merge_strategy == OVERWRITE:
-        existing_file.write_text(new_file.read_text())
+        invalidate_document(existing_file)
+        write_text_if_changed(existing_file, new_file.read_text())
         return
     elif merge_strategy == NESTED_OVERWRITE:
         existing_data = data_merge.deep_merge(existing_data, new_data)
     elif merge_strategy == COMPREHENSIVE:
         existing_data = data_merge.comprehensive_merge(existing_data, new_data)
+    elif strategy_name == KEYED_COMPREHENSIVE:
+        existing_data = data_merge.comprehensive_merge(existing_data, new_data, record_keys=record_keys)
     else:
         raise MergeError(error_message=f"Unrecognized merge strategy {merge_strategy}")
 
-    yaml.dump(existing_data, existing_file)
+    write_document(existing_file, existing_data, write_yaml)
@@ -0,0 +1,162 @@
+"""
+Resolve the latest commit of a template's remote without fetching.
+
+The remote's refs are listed with `git ls-remote`, which only downloads the refs, not the objects. Each remote and
+ref is resolved once per process. Set `remote_refs_ttl` in the `cookie_composer` section of the cookiecutter user
+config to also keep the results on disk for that many seconds, so several commands in a row don't query the remote.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cookiecutter.config import get_user_config
+from git import GitCommandError, Repo
+
+from cookie_composer.exceptions import GitError
+from cookie_composer.git_commands import resolve_commit
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = ".remote-refs.json"
+"""The name of the file, in the cookiecutters directory, caching the resolved refs."""
+
+COMMIT_HASH_PATTERN = re.compile(r"^[0-9a-f]{7,40}$")
+"""A possibly abbreviated commit hash."""
+
+_resolved_refs: Dict[Tuple[str, str], Optional[str]] = {}
+
+
+class RemoteRefsCache:
+    """A file caching the resolved refs of remotes for a limited time."""
+
+    def __init__(self, path: Path, ttl: float):
+        self.path = path
+        self.ttl = ttl
+
+    def _read(self) -> Dict[str, List]:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, url: str, ref: str) -> Optional[str]:
+        """
+        Return the cached commit of a ref.
+
+        Args:
+            url: The URL of the remote
+            ref: The branch, tag or `HEAD`
+
+        Returns:
+            The commit hash, or `None` if the ref isn't cached or is older than the TTL
+        """
+        commit, resolved_at = self._read().get(f"{url} {ref}", (None, 0))
+        return commit if time.time() - resolved_at < self.ttl else None
+
+    def put(self, url: str, ref: str, commit: str) -> None:
+        """Cache the commit of a ref, replacing the file atomically."""
+        entries = self._read()
+        now = time.time()
+        entries = {key: value for key, value in entries.items() if now - value[1] < self.ttl}
+        entries[f"{url} {ref}"] = [commit, now]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f"{self.path.name}.")
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            json.dump(entries, temp_file)
+        os.replace(temp_path, self.path)
+
+
+def get_remote_refs_cache() -> Optional[RemoteRefsCache]:
+    """Return the on-disk cache of resolved refs, or `None` if `remote_refs_ttl` isn't configured."""
+    user_config = get_user_config()
+    ttl = (user_config.get("cookie_composer") or {}).get("remote_refs_ttl")
+    if not ttl:
+        return None
+    return RemoteRefsCache(Path(user_config["cookiecutters_dir"]).expanduser().resolve() / CACHE_FILE_NAME, ttl)
+
+
+def clear_resolved_refs() -> None:
+    """Forget the refs resolved by this process."""
+    _resolved_refs.clear()
+
+
+def ls_remote(repo: Repo, ref: str, remote_name: str = "origin") -> Optional[str]:
+    """
+    Resolve a branch, tag or `HEAD` on a remote, by listing the remote's refs.
+
+    Like `git rev-parse`, tags take precedence over branches. Annotated tags are resolved to their commit.
+
+    Args:
+        repo: A repository with the remote
+        ref: The branch, tag or `HEAD`
+        remote_name: The name of the remote
+
+    Raises:
+        GitError: If the remote can't be reached
+
+    Returns:
+        The commit hash, or `None` if the remote doesn't have the ref
+    """
+    candidates = [ref] if ref == "HEAD" or ref.startswith("refs/") else []
+    candidates += [f"refs/tags/{ref}^{{}}", f"refs/tags/{ref}", f"refs/heads/{ref}"]
+    try:
+        output = str(repo.git.ls_remote(remote_name, ref, f"{ref}^{{}}"))
+    except GitCommandError as e:
+        raise GitError(f"Could not list the refs of {remote_name}: {e.stderr}") from e
+
+    remote_refs = {name: sha for sha, name in parse_ls_remote(output)}
+    return next((remote_refs[name] for name in candidates if name in remote_refs), None)
+
+
+def parse_ls_remote(output: str) -> List[Tuple[str, str]]:
+    """
+    Parse the output of `git ls-remote`.
+
+    Args:
+        output: The output, with a commit hash and a ref name separated by a tab on each line
+
+    Returns:
+        The commit hash and name of each ref
+    """
+    refs = []
+    for line in output.splitlines():
+        sha, name = line.split("\t", 1)
+        refs.append((sha, name))
+    return refs
+
+
+def get_latest_sha(repo: Repo, ref: Optional[str] = None) -> Optional[str]:
+    """
+    Return the latest commit of a ref on a repository's first remote, without fetching.
+
+    Args:
+        repo: A repository with a remote
+        ref: The branch, tag or commit. Defaults to the remote's default branch.
+
+    Returns:
+        The commit hash. A commit hash that isn't the name of a remote ref is its own latest commit.
+    """
+    remote = repo.remotes[0]
+    ref = ref or "HEAD"
+    key = (remote.url, ref)
+    if key in _resolved_refs:
+        return _resolved_refs[key]
+
+    disk_cache = get_remote_refs_cache()
+    commit = disk_cache.get(remote.url, ref) if disk_cache else None
+    if commit is None:
+        commit = ls_remote(repo, ref, remote.name)
+        if commit is None and COMMIT_HASH_PATTERN.match(ref):
+            commit = resolve_commit(repo, ref) or (ref if len(ref) == 40 else None)
+        if commit is not None and disk_cache:
+            disk_cache.put(remote.url, ref, commit)
+
+    logger.debug("%s of %s is %s", ref, remote.url, commit)
+    _resolved_refs[key] = commit
+    return commit
@@ -0,0 +1,171 @@
+"""A content-addressed cache of rendered layers."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Tuple
+
+from cookiecutter.config import get_user_config
+
+from cookie_composer.file_writes import copy_file_with_metadata
+from cookie_composer.utils import remove_single_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+"""The default maximum size, in bytes, of all the rendered trees in the cache."""
+
+TREE_DIR_NAME = "tree"
+"""The name of the directory in a cache entry containing the rendered tree."""
+
+SIZE_FILE_NAME = "size"
+"""The name of the file in a cache entry containing the size of the rendered tree."""
+
+
+def get_render_cache_key(commit: str, directory: str, rendered_context: Mapping[str, Any], accept_hooks: bool) -> str:
+    """
+    Return a stable hash of everything that determines how a layer renders.
+
+    Args:
+        commit: The commit of the template that is rendered
+        directory: The directory within the template repository containing the template
+        rendered_context: The context used to render the template
+        accept_hooks: Are the template's hooks run?
+
+    Returns:
+        The cache key
+    """
+    from cookiecutter import __version__ as cookiecutter_version
+
+    from cookie_composer import __version__
+
+    key_data = {
+        "commit": commit,
+        "directory": directory or "",
+        "context": rendered_context,
+        "accept_hooks": accept_hooks,
+        "versions": [__version__, cookiecutter_version],
+    }
+    serialized = json.dumps(key_data, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def get_tree_size(path: Path) -> int:
+    """Return the total size, in bytes, of the files in a directory tree."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            file_path = os.path.join(root, filename)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+class RenderCache:
+    """
+    Rendered layer trees stored by a hash of the inputs that rendered them.
+
+    The least recently used entries are removed when the total size of the cache is more than `max_size`.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def entry_path(self, key: str) -> Path:
+        """The path to the cache entry of a key."""
+        return self.cache_dir / key
+
+    def get(self, key: str, destination: Path) -> bool:
+        """
+        Copy the cached tree for a key to the destination.
+
+        Args:
+            key: The cache key
+            destination: The path to copy the rendered tree to. It must not exist.
+
+        Returns:
+            `True` if the key was in the cache
+        """
+        entry_path = self.entry_path(key)
+        tree_path = entry_path / TREE_DIR_NAME
+        if not tree_path.is_dir():
+            return False
+
+        logger.debug("Render cache hit for %s", key)
+        shutil.copytree(tree_path, destination, symlinks=True, copy_function=copy_file_with_metadata)
+        os.utime(entry_path)  # Mark the entry as recently used
+        return True
+
+    def put(self, key: str, source: Path) -> None:
+        """
+        Store a copy of a rendered tree.
+
+        Args:
+            key: The cache key
+            source: The path to the rendered tree
+        """
+        entry_path = self.entry_path(key)
+        if entry_path.exists():
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_entry = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            shutil.copytree(source, tmp_entry / TREE_DIR_NAME, symlinks=True, copy_function=copy_file_with_metadata)
+            (tmp_entry / SIZE_FILE_NAME).write_text(str(get_tree_size(source)))
+            os.replace(tmp_entry, entry_path)
+        except OSError:
+            # Another process stored the same entry first
+            logger.debug("Unable to store %s in the render cache", key)
+            remove_single_path(tmp_entry)
+            return
+
+        self.evict()
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """Return the last used time, size and path of every entry, least recently used first."""
+        if not self.cache_dir.is_dir():
+            return []
+
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            entry_path = Path(entry.path)
+            try:
+                size = int((entry_path / SIZE_FILE_NAME).read_text())
+            except (OSError, ValueError):
+                size = get_tree_size(entry_path)
+            entries.append((entry.stat().st_mtime, size, entry_path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in `max_size`."""
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            logger.debug("Evicting %s from the render cache", entry_path.name)
+            remove_single_path(entry_path)
+            total_size -= size
+
+
+def get_render_cache(max_size: Optional[int] = None) -> RenderCache:
+    """
+    Return the render cache stored in the cookiecutters directory.
+
+    Args:
+        max_size: The maximum size of the cache in bytes. Defaults to `DEFAULT_MAX_SIZE`.
+
+    Returns:
+        The render cache
+    """
+    user_config = get_user_config()
+    cache_dir = Path(user_config["cookiecutters_dir"]).expanduser().resolve() / ".render-cache"
+    return RenderCache(cache_dir, max_size or DEFAULT_MAX_SIZE)
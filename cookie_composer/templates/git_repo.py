@@ -1,18 +1,30 @@
 """Utility functions for handling and fetching repo archives in git format."""
 
+import hashlib
 import logging
 from pathlib import Path
 from typing import Optional
 
 from cookiecutter.utils import make_sure_path_exists
-from git import Repo
-
-from cookie_composer.git_commands import checkout_ref, clone, get_repo
-from cookie_composer.templates.types import Locality, TemplateFormat, TemplateRepo
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+
+from cookie_composer.exceptions import GitError
+from cookie_composer.git_commands import (
+    checkout_ref,
+    clone_mirror,
+    detached_worktree,
+    fetch_commit,
+    get_repo,
+    resolve_commit,
+)
+from cookie_composer.templates.types import CloneOptions, Locality, TemplateFormat, TemplateRepo
 from cookie_composer.utils import remove_single_path
 
 logger = logging.getLogger(__name__)
 
+MIRRORS_DIR = ".mirrors"
+"""The directory, inside the cache directory, containing a bare mirror of each remote template repo."""
+
 
 def get_repo_name(repo_url: str, checkout: Optional[str] = None) -> str:
     """Construct the destination repo name from the repo URL and checkout."""
@@ -23,29 +35,60 @@ def get_repo_name(repo_url: str, checkout: Optional[str] = None) -> str:
     return repo_name
 
 
+def _get_url_hash(repo_url: str) -> str:
+    """Return a short hash of the repo URL, telling apart repos with the same name on different hosts."""
+    return hashlib.sha256(repo_url.rstrip("/").encode("utf-8")).hexdigest()[:16]
+
+
+def get_mirror_path(repo_url: str, cache_dir: Path) -> Path:
+    """
+    Return the path of the bare mirror of a remote repo.
+
+    The mirror is named after the repo and a hash of its URL, so repos with the same name on different hosts
+    don't share a mirror.
+    """
+    return cache_dir.joinpath(MIRRORS_DIR, f"{get_repo_name(repo_url)}-{_get_url_hash(repo_url)}.git")
+
+
+def get_worktree_path(repo_url: str, cache_dir: Path, checkout: Optional[str] = None) -> Path:
+    """
+    Return the path of the worktree of a checkout of a remote repo.
+
+    Like the mirror, the worktree is named after the repo, the checkout and a hash of the repo's URL, so checkouts
+    of repos with the same name on different hosts don't share a worktree.
+    """
+    return cache_dir.joinpath(f"{get_repo_name(repo_url, checkout)}-{_get_url_hash(repo_url)}")
+
+
 def template_repo_from_git(
-    git_uri: str, locality: Locality, cache_dir: Path, checkout: Optional[str] = None
+    git_uri: str,
+    locality: Locality,
+    cache_dir: Path,
+    checkout: Optional[str] = None,
+    clone_options: Optional[CloneOptions] = None,
+    directory: str = "",
 ) -> TemplateRepo:
     """
     Return a template repo from a git URI.
 
-    - If the repo is remote, it will be cloned to the cache_dir and named after the repo and checkout value,
-    for example `mytemplate_main`. This allows for multiple versions of the same repo to be cached without
-    a conflict.
-    - If the repo is already cloned, it will not be cloned again.
+    - If the repo is remote, it is mirrored once into the cache_dir, and `checkout` is checked out in a worktree of
+    the mirror named after the repo, checkout value and URL, for example `mytemplate_main-0123456789abcdef`. This
+    allows for multiple versions of the same repo, and repos with the same name, to be cached without a conflict,
+    while sharing the repo's history.
+    - If the repo is already mirrored, it is only fetched when `checkout` isn't in the mirror.
     - If the repo is local, it is not cloned but will check out `checkout`, and the local path is returned.
-
+    - `clone_options` only apply to remote repos, see
+      [get_cached_remote][cookie_composer.templates.git_repo.get_cached_remote].
     """
     if locality == Locality.LOCAL:
         ensure_clean = checkout is not None
         local_path = cache_dir.joinpath(git_uri).expanduser().resolve()
         logger.debug("Getting local repo %s", local_path)
         repo = get_repo(local_path, search_parent_directories=True, ensure_clean=ensure_clean)
+        if checkout:
+            checkout_ref(repo, checkout)
     else:
-        repo = get_cached_remote(git_uri, cache_dir, checkout)
-
-    if checkout:
-        checkout_ref(repo, checkout)
+        repo = get_cached_remote(git_uri, cache_dir, checkout, clone_options, directory)
 
     return TemplateRepo(
         source=git_uri,
@@ -57,29 +100,74 @@ def template_repo_from_git(
     )
 
 
-def get_cached_remote(git_uri: str, cache_dir: Path, checkout: Optional[str] = None) -> Repo:
+def get_cached_remote(
+    git_uri: str,
+    cache_dir: Path,
+    checkout: Optional[str] = None,
+    clone_options: Optional[CloneOptions] = None,
+    directory: str = "",
+) -> Repo:
     """
-    Return a cached remote repo.
+    Return a cached remote repo, checked out at `checkout`.
+
+    All the checkouts of a remote share one bare mirror of it. Each checkout is a detached worktree of the mirror,
+    so caching another branch, tag or commit only writes its files. The clone or worktree of the checkout cached by
+    older versions, named without the URL hash, is removed.
 
-    This provides some error-checking for the cached repo, and will re-clone if the
-    cached repo is in a detached head state.
+    The mirror is created with the `depth` and `filter` of `clone_options`; an existing mirror keeps the options it
+    was created with. With `sparse`, the worktree only contains `directory`, and the directories of other layers
+    using the same checkout are added to it.
 
     Args:
         git_uri: The remote git URI
         cache_dir: The directory to cache the repo in
-        checkout: The optional checkout ref to use
+        checkout: The optional checkout ref to use. Defaults to the remote's default branch.
+        clone_options: How to clone the repo
+        directory: The directory within the repo that holds the template
+
+    Raises:
+        GitError: If `checkout` isn't in the remote repo
 
     Returns:
-        The cached repo
+        The worktree of the checkout
     """
     logger.debug("Getting cached remote repo %s", git_uri)
     cache_dir = cache_dir.expanduser().resolve()
     make_sure_path_exists(cache_dir)
-    repo_name = get_repo_name(git_uri, checkout)
-    repo_dir = cache_dir.joinpath(repo_name)
-    repo = clone(git_uri, repo_dir)
-    if repo.head.is_detached and repo.head.object.hexsha != checkout:
-        logger.info("The cached repo is not on the expected checkout, deleting and re-cloning.")
-        remove_single_path(repo_dir)
-        repo = clone(git_uri, repo_dir)
-    return repo
+    clone_options = clone_options or CloneOptions()
+    mirror = clone_mirror(
+        git_uri, get_mirror_path(git_uri, cache_dir), depth=clone_options.depth, filter=clone_options.filter
+    )
+
+    ref = checkout or "HEAD"
+    commit = resolve_commit(mirror, ref)
+    if commit is None:
+        logger.debug("%s isn't in the mirror of %s, fetching.", ref, git_uri)
+        commit = fetch_commit(mirror, ref)
+    if commit is None:
+        raise GitError(f"Could not find {ref} in {git_uri}.")
+
+    remove_legacy_checkout(git_uri, cache_dir.joinpath(get_repo_name(git_uri, checkout)))
+    sparse_paths = [directory] if clone_options.sparse and directory else None
+    return detached_worktree(mirror, get_worktree_path(git_uri, cache_dir, checkout), commit, sparse_paths)
+
+
+def remove_legacy_checkout(git_uri: str, legacy_path: Path) -> None:
+    """
+    Remove a checkout of a remote cached without the URL hash in its name, by older versions.
+
+    The checkout is only removed if it is a clone, or a worktree of a mirror, of `git_uri`, so the checkout of a
+    repo with the same name on another host is kept.
+
+    Args:
+        git_uri: The remote git URI
+        legacy_path: The path of the checkout, named after the repo and checkout
+    """
+    try:
+        legacy_repo = Repo(legacy_path)
+        urls = {url.rstrip("/") for remote in legacy_repo.remotes for url in remote.urls}
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return
+    if git_uri.rstrip("/") in urls:
+        logger.info("Removing %s, which was cached by an older version.", legacy_path)
+        remove_single_path(legacy_path)
@@ -1,13 +1,15 @@
 """Entry point for cookiecutter templates."""
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 from urllib.parse import urlparse
 
 from cookiecutter.config import get_user_config
 
-from cookie_composer.templates.git_repo import template_repo_from_git
-from cookie_composer.templates.types import Locality, TemplateFormat, TemplateRepo
+from cookie_composer.templates.git_repo import get_mirror_path, template_repo_from_git
+from cookie_composer.templates.types import CloneOptions, Locality, TemplateFormat, TemplateRepo
 from cookie_composer.templates.zipfile_repo import template_repo_from_zipfile
 
 
@@ -31,8 +33,30 @@ def identify_repo(url: str, local_path: Optional[Path] = None) -> Tuple[Template
     raise ValueError(f"Unknown template format for URL: {url}")
 
 
+def get_clone_options(user_config: Mapping[str, Any], clone: Optional[Mapping[str, Any]] = None) -> CloneOptions:
+    """
+    Get the options for cloning a remote git template.
+
+    The layer's `clone` options take precedence over the `clone` options in the `cookie_composer` section of the
+    cookiecutter user configuration.
+
+    Args:
+        user_config: The cookiecutter user configuration
+        clone: The clone options of the layer
+
+    Returns:
+        The combined clone options
+    """
+    return CloneOptions.from_configs((user_config.get("cookie_composer") or {}).get("clone"), clone)
+
+
 def get_template_repo(
-    url: str, local_path: Optional[Path] = None, checkout: Optional[str] = None, password: Optional[str] = None
+    url: str,
+    local_path: Optional[Path] = None,
+    checkout: Optional[str] = None,
+    password: Optional[str] = None,
+    clone: Optional[Mapping[str, Any]] = None,
+    directory: str = "",
 ) -> TemplateRepo:
     """
     Get a template repository from a URL.
@@ -42,6 +66,8 @@ def get_template_repo(
         local_path: Used to resolve local paths.
         checkout: The branch, tag or commit to check out after git clone
         password: The password to use if template is a password-protected Zip archive.
+        clone: The layer's options for cloning a remote git repository, like `{"depth": 1}`.
+        directory: The directory within the repository that holds the template, for sparse checkouts.
 
     Returns:
         A [TemplateRepo][cookie_composer.templates.types.TemplateRepo] object.
@@ -55,11 +81,18 @@ def get_template_repo(
         cache_dir = Path(user_config["cookiecutters_dir"])
 
     if tmpl_format == TemplateFormat.ZIP:
-        return template_repo_from_zipfile(url, locality, cache_dir, password=password)
+        template_repo = template_repo_from_zipfile(url, locality, cache_dir, password=password)
     elif tmpl_format == TemplateFormat.GIT:
-        return template_repo_from_git(url, locality, cache_dir, checkout=checkout)
+        template_repo = template_repo_from_git(
+            url,
+            locality,
+            cache_dir,
+            checkout=checkout,
+            clone_options=get_clone_options(user_config, clone),
+            directory=directory,
+        )
     else:
-        return TemplateRepo(
+        template_repo = TemplateRepo(
             source=url,
             cached_source=cache_dir,
             format=TemplateFormat.PLAIN,
@@ -68,6 +101,83 @@ def get_template_repo(
             password=None,
         )
 
+    if clone:
+        # Keep the layer's own options, without the user configuration, to write them in the composition
+        template_repo.clone = CloneOptions.from_configs(clone)
+    return template_repo
+
+
+DEFAULT_MAX_WORKERS = 8
+"""The default number of template repositories fetched at the same time."""
+
+
+def get_template_repos(
+    repo_specs: List[Dict[str, Any]], local_path: Optional[Path] = None, max_workers: Optional[int] = None
+) -> List[TemplateRepo]:
+    """
+    Get several template repositories concurrently.
+
+    Each git or plain template is resolved, cloned or fetched in a bounded pool of worker threads.
+    Specifications sharing a cached repository, like two checkouts of one remote or two URLs of one local
+    directory, are handled in order by the same worker, so two workers never operate on the same cached
+    repository at the same time.
+
+    Zip archives are fetched first, one at a time on the calling thread, because archives with the same file name
+    are cached at the same path.
+
+    Args:
+        repo_specs: The keyword arguments to [get_template_repo][cookie_composer.templates.source.get_template_repo]
+            for each template, without `local_path`.
+        local_path: Used to resolve local paths.
+        max_workers: The maximum number of repositories to fetch at once. Defaults to `DEFAULT_MAX_WORKERS`.
+
+    Returns:
+        The template repositories, in the same order as `repo_specs`.
+    """
+    cookiecutters_dir = Path(get_user_config()["cookiecutters_dir"])
+    template_repos: List[Optional[TemplateRepo]] = [None] * len(repo_specs)
+    groups: Dict[Path, List[int]] = defaultdict(list)
+    for index, spec in enumerate(repo_specs):
+        tmpl_format, locality = identify_repo(spec["url"], local_path)
+        if tmpl_format == TemplateFormat.ZIP:
+            template_repos[index] = get_template_repo(local_path=local_path, **spec)
+        else:
+            groups[get_cache_path(spec["url"], locality, cookiecutters_dir, local_path)].append(index)
+
+    if not groups:
+        return template_repos  # type: ignore[return-value]
+
+    def fetch_group(indexes: List[int]) -> List[TemplateRepo]:
+        return [get_template_repo(local_path=local_path, **repo_specs[index]) for index in indexes]
+
+    num_workers = min(max_workers or DEFAULT_MAX_WORKERS, len(groups))
+    with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="template-fetch") as executor:
+        futures = [(indexes, executor.submit(fetch_group, indexes)) for indexes in groups.values()]
+        # Groups are in the order of their first template, so errors are raised in layer order
+        for indexes, future in futures:
+            for index, template_repo in zip(indexes, future.result()):
+                template_repos[index] = template_repo
+
+    return template_repos  # type: ignore[return-value]
+
+
+def get_cache_path(url: str, locality: Locality, cookiecutters_dir: Path, local_path: Optional[Path] = None) -> Path:
+    """
+    Return the path of the repository a git or plain template is fetched into or read from.
+
+    Args:
+        url: The string from the template field in the composition file.
+        locality: The locality of the template.
+        cookiecutters_dir: The cache directory of remote templates.
+        local_path: Used to resolve local paths.
+
+    Returns:
+        The local directory, or the bare mirror shared by every checkout of a remote repository.
+    """
+    if locality == Locality.LOCAL:
+        return resolve_local_path(url, local_path)
+    return get_mirror_path(url, cookiecutters_dir.expanduser().resolve())
+
 
 def resolve_local_path(url: str, local_path: Optional[Path] = None) -> Path:
     """
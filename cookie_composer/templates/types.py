@@ -5,13 +5,14 @@ Templates are a representation of source templates used to generate projects.
 """
 
 import json
+import os
 import tempfile
 from collections import OrderedDict
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from enum import Enum
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Any, Iterator, List, Mapping, Optional
 
 from cookie_composer.utils import remove_single_path
 
@@ -33,6 +34,49 @@ class TemplateFormat(str, Enum):
     """A plain directory that isn't under version control."""
 
 
+@dataclass(frozen=True)
+class CloneOptions:
+    """
+    How to clone a remote git template repository.
+
+    The options are used when the repository is first cached. Commits missing from a shallow or partial clone are
+    fetched when they are needed, for example to update from an older commit.
+    """
+
+    depth: Optional[int] = None
+    """Only clone this many commits of history."""
+
+    filter: Optional[str] = None
+    """A partial clone filter, like `blob:none`, to only download the file contents that are needed."""
+
+    sparse: bool = False
+    """Only check out the template's directory in the cached repository."""
+
+    @classmethod
+    def from_configs(cls, *configs: Optional[Mapping[str, Any]]) -> "CloneOptions":
+        """
+        Combine clone configurations, with the values set in later configurations taking precedence.
+
+        Args:
+            *configs: Mappings of option names to values. `None` configurations and values are ignored.
+
+        Raises:
+            ValueError: If a configuration has an unknown option
+
+        Returns:
+            The combined options
+        """
+        names = {field.name for field in fields(cls)}
+        values = {}
+        for config in configs:
+            if not config:
+                continue
+            if unknown := set(config) - names:
+                raise ValueError(f"Unknown clone options: {', '.join(sorted(unknown))}")
+            values.update({key: value for key, value in config.items() if value is not None})
+        return cls(**values)
+
+
 @dataclass
 class TemplateRepo:
     """
@@ -57,6 +101,9 @@ class TemplateRepo:
     password: Optional[str] = None
     """The password to use if template is a password-protected Zip archive."""
 
+    clone: Optional[CloneOptions] = None
+    """The clone options of the layer, if the template is a remote git repository."""
+
     @property
     def current_sha(self) -> Optional[str]:
         """If the template is a git repository, return the current commit hash."""
@@ -75,35 +122,43 @@ class TemplateRepo:
 
         If the template is not a git repository, it will always return `None`.
 
+        For a repository with a remote, the latest SHA of the checkout, or of the remote's default branch, is
+        resolved from the remote's refs without fetching, once per process.
+        See [get_latest_sha][cookie_composer.remote_refs.get_latest_sha].
+
         Returns:
             The latest hexsha of the template or `None` if the template isn't a git repo
         """
         from cookie_composer.git_commands import get_repo
+        from cookie_composer.remote_refs import get_latest_sha
 
         if self.format != TemplateFormat.GIT:
             return None
 
         template_repo = get_repo(self.cached_source, search_parent_directories=True)
         if len(template_repo.remotes) > 0:
-            template_repo.remotes[0].fetch()
-            return template_repo.remotes[0].refs[0].commit.hexsha
+            return get_latest_sha(template_repo, self.checkout)
         return template_repo.head.object.hexsha
 
     @contextmanager
-    def render_source(self, output_dir: Optional[Path] = None, commit: Optional[str] = None) -> Iterator[Path]:
+    def render_source(
+        self, output_dir: Optional[Path] = None, commit: Optional[str] = None, directory: Optional[str] = None
+    ) -> Iterator[Path]:
         """
         A context manager that provides the source from which to render the template.
 
-        For git repositories, this will create a temporary working tree of the repository and yield the path
-        to the working tree.
+        For git repositories, this will export the files of the commit, or of `directory` only, from the
+        repository's objects to a temporary directory and yield its path. Nothing is checked out.
 
-        For Zip archives, this will extract the archive to a temporary directory and yield the path
+        For Zip archives, this will extract the members of `directory`, or of the whole archived project, to a
+        temporary directory and yield the path to the project. The archive itself stays cached.
 
         For plain repos, it will yield the path to the directory.
 
         Args:
             output_dir: The directory to extract the template to. If not provided, a temporary directory will be used.
             commit: The commit to checkout if the template is a git repository.
+            directory: The directory within the repository that holds the template. Only its files are exported.
 
         Yields:
             The path to the rendered template
@@ -111,16 +166,18 @@ class TemplateRepo:
         output_dir = output_dir or Path(tempfile.mkdtemp())
 
         if self.format == TemplateFormat.GIT:
-            from cookie_composer.git_commands import temp_git_worktree_dir
+            from cookie_composer.git_commands import temp_git_tree_dir
 
-            with temp_git_worktree_dir(
-                self.cached_source, output_dir, branch=self.checkout, commit=commit
-            ) as worktree_dir:
-                yield worktree_dir
+            with temp_git_tree_dir(
+                self.cached_source, output_dir, branch=self.checkout, commit=commit, directory=directory
+            ) as tree_dir:
+                yield tree_dir
         elif self.format == TemplateFormat.ZIP:
             from cookie_composer.templates.zipfile_repo import extract_zipfile
 
-            zip_dir = extract_zipfile(self.cached_source, output_dir=output_dir, password=self.password)
+            zip_dir = extract_zipfile(
+                self.cached_source, output_dir=output_dir, password=self.password, directory=directory
+            )
             yield zip_dir
             remove_single_path(zip_dir)
         elif self.format == TemplateFormat.PLAIN:
@@ -142,11 +199,6 @@ class Template:
 
     _context: Optional[OrderedDict] = None
 
-    def cleanup(self) -> None:
-        """Remove the cached template if it is a Zipfile."""
-        if self.repo.format == TemplateFormat.ZIP and self.repo.cached_source.exists():
-            remove_single_path(self.repo.cached_source)
-
     @property
     def name(self) -> str:
         """The name of the template."""
@@ -158,8 +210,16 @@ class Template:
 
     @property
     def cached_path(self) -> Path:
-        """The path to the cached template."""
-        if self.directory:
+        """
+        The path to the cached template.
+
+        For a Zip archive, this is the template's directory within the archive, which Python can import from.
+        """
+        if self.repo.format == TemplateFormat.ZIP:
+            from cookie_composer.templates.zipfile_repo import get_template_path, open_zipfile
+
+            return self.repo.cached_source / get_template_path(open_zipfile(self.repo.cached_source), self.directory)
+        elif self.directory:
             return self.repo.cached_source / self.directory
         else:
             return self.repo.cached_source
@@ -167,18 +227,31 @@ class Template:
     @property
     def context_file_path(self) -> Path:
         """The path to the template's context file."""
-        if self.directory:
-            return self.repo.cached_source / self.directory / "cookiecutter.json"
-        else:
-            return self.repo.cached_source / "cookiecutter.json"
+        return self.cached_path / "cookiecutter.json"
 
     @property
     def context(self) -> dict:
         """The context of the template."""
         if self._context is None:
-            self._context = json.loads(self.context_file_path.read_text(), object_pairs_hook=OrderedDict)
+            if self.repo.format == TemplateFormat.ZIP:
+                from cookie_composer.templates.zipfile_repo import read_template_file
+
+                context_text = read_template_file(
+                    self.repo.cached_source, "cookiecutter.json", self.directory, self.repo.password
+                )
+            else:
+                context_text = self.context_file_path.read_text()
+            self._context = json.loads(context_text, object_pairs_hook=OrderedDict)
         return self._context
 
+    def listdir(self) -> List[str]:
+        """The names of the files and directories in the template's directory. Zip archives aren't extracted."""
+        if self.repo.format == TemplateFormat.ZIP:
+            from cookie_composer.templates.zipfile_repo import list_template_dir
+
+            return list_template_dir(self.repo.cached_source, self.directory)
+        return os.listdir(self.cached_path)
+
 
 def get_template_name(path_or_url: str, directory: Optional[str] = None, checkout: Optional[str] = None) -> str:
     """
@@ -1,14 +1,17 @@
 """Utility functions for handling and fetching repo archives in zip format."""
 
+import logging
 import os
+import posixpath
 import tempfile
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from zipfile import BadZipFile, ZipFile
 
 import requests
-from cookiecutter.prompt import prompt_and_delete
 from cookiecutter.utils import make_sure_path_exists
+from fsspec.implementations.zip import ZipFileSystem
 
 from cookie_composer.exceptions import (
     EmptyZipRepositoryError,
@@ -18,12 +21,14 @@ from cookie_composer.exceptions import (
 )
 from cookie_composer.templates.types import Locality, TemplateFormat, TemplateRepo
 
+logger = logging.getLogger(__name__)
+
 
 def template_repo_from_zipfile(
-    zip_uri: str, locality: Locality, cache_dir: Path, no_input: bool = False, password: Optional[str] = None
+    zip_uri: str, locality: Locality, cache_dir: Path, password: Optional[str] = None
 ) -> TemplateRepo:
     """Return a template repo from a zipfile URI."""
-    cached_source = cache_source(zip_uri, locality == Locality.REMOTE, cache_dir, no_input)
+    cached_source = cache_source(zip_uri, locality == Locality.REMOTE, cache_dir)
     return TemplateRepo(
         source=zip_uri,
         cached_source=cached_source,
@@ -34,58 +39,94 @@ def template_repo_from_zipfile(
     )
 
 
-def download_zipfile(url: str, cache_dir: Path, no_input: bool = False) -> Path:
-    """Download a zipfile from a URL into the cache_dir."""
+def download_zipfile(url: str, cache_dir: Path) -> Path:
+    """
+    Download a zipfile from a URL into the cache_dir, unless the cached zipfile is up-to-date.
+
+    A cached zipfile is reused without prompting. It is only downloaded again if the server reports that it changed
+    since it was downloaded. It is also reused if the server can't be reached or returns an error.
+
+    Args:
+        url: The URL of the zipfile
+        cache_dir: The directory to cache the zipfile in
+
+    Returns:
+        The path to the cached zipfile
+    """
     filename = url.rsplit("/", 1)[1]
     zip_path = cache_dir.joinpath(filename)
+    is_cached = zip_path.exists()
 
-    if zip_path.exists():
-        download = prompt_and_delete(zip_path, no_input=no_input)
-    else:
-        download = True
-
-    if download:
-        # (Re) download the zipfile
-        r = requests.get(url, stream=True, timeout=100)
-        with open(zip_path, "wb") as f:
+    headers: Dict[str, str] = {}
+    if is_cached:
+        headers["If-Modified-Since"] = formatdate(zip_path.stat().st_mtime, usegmt=True)
+    try:
+        r = requests.get(url, stream=True, timeout=100, headers=headers)
+    except requests.RequestException as e:
+        if not is_cached:
+            raise
+        logger.warning("Using the cached %s, as %s can't be reached: %s", zip_path, url, e)
+        return zip_path
+
+    if is_cached and r.status_code == requests.codes.not_modified:
+        logger.debug("The cached %s is up-to-date.", zip_path)
+        return zip_path
+    if is_cached and r.status_code >= 400:
+        logger.warning("Using the cached %s, as %s returned HTTP %s.", zip_path, url, r.status_code)
+        return zip_path
+
+    # Replace the cached zipfile at once, so an interrupted download doesn't leave a partial zipfile
+    file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{filename}.")
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
             for chunk in r.iter_content(chunk_size=1024):
                 if chunk:  # filter out keep-alive new chunks
                     f.write(chunk)
-
+        os.replace(temp_path, zip_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    _set_modification_time(zip_path, r.headers.get("Last-Modified"))
     return zip_path
 
 
+def _set_modification_time(path: Path, last_modified: Optional[str]) -> None:
+    """Set the modification time of a downloaded file to its `Last-Modified` header, for the next freshness check."""
+    try:
+        timestamp = parsedate_to_datetime(last_modified).timestamp()  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return
+    os.utime(path, (timestamp, timestamp))
+
+
 def cache_source(
     zip_uri: str,
     is_remote: bool,
     cache_dir: Path,
-    no_input: bool = False,
 ) -> Path:
     """
-    Download and unpack a zipfile at a given URI.
+    Download a zipfile at a given URI, or locate a local zipfile.
 
-    This will download the zipfile to the cookiecutter repository,
-    and unpack into a temporary directory.
+    This will download the zipfile to the cookiecutter repository, where it stays cached and is reused while it is
+    up-to-date. The zipfile is read in place, and only the template being rendered is extracted, when it is rendered.
 
     Args:
         zip_uri: The URI for the zipfile.
         is_remote: Is the zip URI a URL or a file?
         cache_dir: The cookiecutter repository directory to put the archive into.
-        no_input: Do not prompt for user input and eventually force a refresh of cached resources.
 
     Returns:
-        The path to the unpacked zipfile.
+        The path to the zipfile.
     """
     cache_dir = Path(cache_dir).expanduser().resolve()
     make_sure_path_exists(cache_dir)
 
     if is_remote:
-        zip_path = download_zipfile(zip_uri, cache_dir, no_input=no_input)
+        zip_path = download_zipfile(zip_uri, cache_dir)
     else:
         # Just use the local zipfile as-is.
         zip_path = Path(zip_uri).expanduser().resolve()
 
-    # Now unpack the repository into a temporary directory
     validate_zipfile(zip_path, zip_uri)
     return zip_path
 
@@ -117,7 +158,81 @@ def validate_zipfile(zip_path: Path, zip_uri: str) -> None:
         raise InvalidZipRepositoryError(zip_uri) from e
 
 
-def extract_zipfile(zip_path: Path, output_dir: Optional[Path] = None, password: Optional[str] = None) -> Path:
+def open_zipfile(zip_path: Path, password: Optional[str] = None) -> ZipFileSystem:
+    """
+    Open a zipfile as a read-only file system, without extracting it.
+
+    Args:
+        zip_path: The path to the zipfile.
+        password: The password for a password-protected zipfile.
+
+    Returns:
+        The file system of the archive's members.
+    """
+    # Don't reuse a cached instance: it would still read a zipfile that was downloaded again since
+    zip_fs = ZipFileSystem(fo=str(zip_path), skip_instance_cache=True)
+    if password:
+        zip_fs.zip.setpassword(password.encode("utf-8"))
+    return zip_fs
+
+
+def get_project_name(zip_fs: ZipFileSystem) -> str:
+    """Return the name of the zipfile's top-level directory."""
+    # The first record in the zipfile should be the directory entry for the archive, with a trailing slash.
+    return zip_fs.zip.namelist()[0][:-1]
+
+
+def get_template_path(zip_fs: ZipFileSystem, directory: Optional[str] = None) -> str:
+    """Return the path, within the zipfile, of the template in `directory` of the archived project."""
+    return posixpath.join(get_project_name(zip_fs), directory) if directory else get_project_name(zip_fs)
+
+
+def list_template_dir(zip_path: Path, directory: Optional[str] = None) -> List[str]:
+    """
+    List the names of the entries of a template's directory, reading the zipfile's index only.
+
+    Args:
+        zip_path: The path to the zipfile.
+        directory: The directory of the template within the archived project.
+
+    Returns:
+        The file and directory names
+    """
+    zip_fs = open_zipfile(zip_path)
+    return [posixpath.basename(path) for path in zip_fs.ls(get_template_path(zip_fs, directory), detail=False)]
+
+
+def read_template_file(
+    zip_path: Path, filename: str, directory: Optional[str] = None, password: Optional[str] = None
+) -> str:
+    """
+    Read a file of a template from the zipfile, without extracting it.
+
+    Args:
+        zip_path: The path to the zipfile.
+        filename: The path of the file relative to the template's directory.
+        directory: The directory of the template within the archived project.
+        password: The password for a password-protected zipfile.
+
+    Raises:
+        InvalidZipPasswordError: If the zipfile is password-protected and the password is missing or incorrect.
+
+    Returns:
+        The contents of the file
+    """
+    zip_fs = open_zipfile(zip_path, password)
+    try:
+        return zip_fs.cat_file(posixpath.join(get_template_path(zip_fs, directory), filename)).decode("utf-8")
+    except RuntimeError as e:
+        raise InvalidZipPasswordError() from e
+
+
+def extract_zipfile(
+    zip_path: Path,
+    output_dir: Optional[Path] = None,
+    password: Optional[str] = None,
+    directory: Optional[str] = None,
+) -> Path:
     """
     Extract a zipfile into a temporary directory.
 
@@ -125,26 +240,26 @@ def extract_zipfile(zip_path: Path, output_dir: Optional[Path] = None, password:
         zip_path: The path to the zipfile.
         output_dir: Optional path to extract the zipfile to. Defaults to a temporary directory.
         password: The password for a password-protected zipfile.
+        directory: Only extract the members of this directory of the archived project.
 
     Raises:
         InvalidZipPasswordError: If the zipfile is password-protected and the user provides an incorrect password.
 
     Returns:
-        The temporary directory containing the unpacked zipfile.
+        The temporary directory containing the unpacked project.
     """
-    zip_file = ZipFile(zip_path)
-    password_bytes = password.encode("utf-8") if password else None
-
-    # The first record in the zipfile should be the directory entry for the archive, with a trailing slash.
-    project_name = zip_file.namelist()[0][:-1]
+    zip_fs = open_zipfile(zip_path, password)
+    project_name = get_project_name(zip_fs)
+    template_prefix = f"{get_template_path(zip_fs, directory)}/"
+    members = [name for name in zip_fs.zip.namelist() if name.startswith(template_prefix)]
 
     # Construct the final target directory
     output_dir = output_dir or Path(tempfile.mkdtemp())
     unzip_path = os.path.join(output_dir, project_name)
 
-    # Extract the zip file into the temporary directory
+    # Extract the template's members into the temporary directory
     try:
-        zip_file.extractall(path=output_dir, pwd=password_bytes)
+        zip_fs.zip.extractall(path=output_dir, members=members)
     except RuntimeError as e:
         raise InvalidZipPasswordError() from e
 
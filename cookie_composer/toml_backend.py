@@ -0,0 +1,152 @@
+"""
+Parse and serialize TOML with the fastest installed libraries.
+
+Parsing uses the first available of:
+
+- The standard library's `tomllib` (Python 3.11+).
+- `tomli`, which is the same parser, compiled with mypyc in its wheels.
+- `toml`.
+
+Serializing uses `tomlkit` when it is installed, for example with the `toml` extra. The new data is applied to a
+parsed copy of the existing file, so its comments, key order and formatting are kept for everything that didn't
+change. `tomlkit` parses much slower than the other parsers, so it is opt-in. Without it, the data is serialized
+with `toml`, which lays out the whole document again.
+"""
+
+import logging
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+TOMLLIB = "tomllib"
+TOMLI = "tomli"
+TOML = "toml"
+TOMLKIT = "tomlkit"
+
+
+@lru_cache(maxsize=None)
+def get_parser() -> Tuple[str, Callable[[str], dict], Tuple[Type[Exception], ...]]:
+    """
+    Return the fastest installed TOML parser.
+
+    Returns:
+        The name of the parser, its `loads` function, and the exceptions it raises for invalid TOML
+    """
+    try:
+        import tomllib
+
+        return TOMLLIB, tomllib.loads, (tomllib.TOMLDecodeError,)
+    except ImportError:
+        pass
+    try:
+        import tomli
+
+        return TOMLI, tomli.loads, (tomli.TOMLDecodeError,)
+    except ImportError:
+        pass
+
+    import toml
+
+    return TOML, toml.loads, (toml.TomlDecodeError,)
+
+
+@lru_cache(maxsize=None)
+def get_writer() -> str:
+    """Return the name of the installed TOML writer: `tomlkit` if it's installed, otherwise `toml`."""
+    try:
+        import tomlkit  # noqa: F401
+    except ImportError:
+        return TOML
+    return TOMLKIT
+
+
+def get_decode_errors() -> Tuple[Type[Exception], ...]:
+    """Return the exceptions raised for invalid TOML."""
+    return get_parser()[2]
+
+
+def loads(text: str) -> dict:
+    """Parse a TOML document."""
+    return get_parser()[1](text)
+
+
+def dumps(data: Mapping, layout: Optional[str] = None, writer: Optional[str] = None) -> str:
+    """
+    Serialize data as a TOML document.
+
+    Args:
+        data: The data to serialize
+        layout: An existing TOML document. With `tomlkit`, its comments and formatting are kept for the values that
+            are the same in `data`.
+        writer: The name of the writer to use, `tomlkit` or `toml`. Defaults to the installed writer.
+
+    Returns:
+        The TOML document
+    """
+    if (writer or get_writer()) == TOML:
+        import toml
+
+        return toml.dumps(data)
+
+    import tomlkit
+
+    if layout:
+        try:
+            if is_identical(loads(layout), thaw(data)):
+                return layout
+            document = tomlkit.parse(layout)
+            update_container(document, data)
+            text = tomlkit.dumps(document)
+            if loads(text) == thaw(data):
+                return text
+        except Exception as e:  # noqa: BLE001
+            logger.debug("tomlkit couldn't update the layout, so it is discarded: %s", e)
+        # tomlkit couldn't update the layout faithfully, so lay out the document from scratch
+
+    document = tomlkit.document()
+    update_container(document, data)
+    return tomlkit.dumps(document)
+
+
+def thaw(value: Any) -> Any:
+    """Convert the mappings and tuples in frozen data to the dicts and lists a TOML writer expects."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def is_identical(existing: Any, new: Any) -> bool:
+    """Return `True` if the values are equal and have the same types, so `1` isn't identical to `1.0` or `True`."""
+    if isinstance(existing, Mapping) and isinstance(new, Mapping):
+        return existing.keys() == new.keys() and all(is_identical(existing[key], new[key]) for key in existing)
+    elif isinstance(existing, list) and isinstance(new, list):
+        return len(existing) == len(new) and all(map(is_identical, existing, new))
+    return type(existing) is type(new) and existing == new
+
+
+def update_container(container: Any, data: Mapping) -> None:
+    """
+    Make a `tomlkit` table or document contain the data, keeping the items that don't change.
+
+    Args:
+        container: The `tomlkit` container to update in place
+        data: The new contents of the container
+    """
+    # Set the new values before removing keys, as tomlkit can't remove the last key of a dotted table
+    for key, value in data.items():
+        if key in container:
+            current = container[key]
+            if isinstance(current, Mapping) and isinstance(value, Mapping):
+                update_container(current, value)
+                continue
+            current_value = current.unwrap() if hasattr(current, "unwrap") else current
+            if is_identical(current_value, thaw(value)):
+                continue
+        container[key] = thaw(value)
+
+    for key in [key for key in container if key not in data]:
+        del container[key]
@@ -112,6 +112,44 @@ def remove_single_path(path: Path) -> None:
             raise IOError("Failed to remove file.") from exc
 
 
+MEMORY_BACKED_DIRS = [Path("/dev/shm")]  # noqa: S108
+"""Directories backed by memory (tmpfs) that are used for in-memory rendering, if available."""
+
+
+def get_memory_backed_dir() -> Optional[Path]:
+    """
+    Return a writable directory backed by memory, if the platform has one.
+
+    Returns:
+        The path to the directory, or `None` if there isn't one
+    """
+    for path in MEMORY_BACKED_DIRS:
+        if path.is_dir() and os.access(path, os.W_OK | os.X_OK):
+            return path
+    return None
+
+
+@contextmanager
+def temporary_render_dir(in_memory: bool = False) -> Iterator[Path]:
+    """
+    Create a temporary directory to render a layer into.
+
+    Cookiecutter and template hooks need a real file system, so an in-memory render uses a directory in a
+    memory-backed file system. If there isn't one, it falls back to the default temporary directory.
+
+    Args:
+        in_memory: Create the directory in a memory-backed file system
+
+    Yields:
+        The path to the temporary directory
+    """
+    import tempfile
+
+    root_dir = get_memory_backed_dir() if in_memory else None
+    with tempfile.TemporaryDirectory(prefix="cookie-composer-", dir=root_dir) as render_dir:
+        yield Path(render_dir)
+
+
 @contextmanager
 def temporary_copy(original_path: Path) -> Iterator[Path]:
     """
@@ -124,16 +162,18 @@ def temporary_copy(original_path: Path) -> Iterator[Path]:
         The path to the temporary copy
     """
     import tempfile
-    from shutil import copy2, copytree, rmtree
+    from shutil import copytree, rmtree
+
+    from cookie_composer.file_writes import copy_file_with_metadata
 
     if original_path.is_dir():
         temp_dir = tempfile.mkdtemp()
-        copytree(original_path, temp_dir, dirs_exist_ok=True)
+        copytree(original_path, temp_dir, dirs_exist_ok=True, copy_function=copy_file_with_metadata)
         yield Path(temp_dir)
         rmtree(temp_dir)
     else:
         temp_file = tempfile.NamedTemporaryFile(delete=False)
         temp_file.close()
-        copy2(original_path, temp_file.name)
+        copy_file_with_metadata(original_path, temp_file.name)
         yield Path(temp_file.name)
         os.remove(temp_file.name)
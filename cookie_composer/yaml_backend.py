@@ -0,0 +1,256 @@
+"""
+Load and dump YAML, using libyaml when it is installed.
+
+Loading uses the first available of:
+
+- ruamel.yaml's own C extension (`ruamel.yaml.clib`).
+- PyYAML's libyaml bindings, with a resolver and constructors matching ruamel.yaml's YAML 1.2 safe loader.
+- ruamel.yaml's pure-Python safe loader.
+
+Documents the PyYAML loader can't reproduce exactly (YAML directives, merge keys, duplicate keys or uncommon tags)
+and invalid documents are loaded again with the pure-Python loader. The data or errors are the same whichever
+loader is used.
+
+Dumping always uses ruamel.yaml's pure-Python emitter. The C emitters ignore the sequence indentation and dash
+offset, so their output differs.
+"""
+
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable, List, Optional, TextIO, Type, Union
+
+from immutabledict import ImmutableOrderedDict, immutabledict
+
+if TYPE_CHECKING:
+    from ruamel.yaml import YAML
+    from yaml.constructor import SafeConstructor
+    from yaml.resolver import BaseResolver
+
+logger = logging.getLogger(__name__)
+
+RUAMEL_LIBYAML = "ruamel-libyaml"
+PYYAML_LIBYAML = "pyyaml-libyaml"
+PURE_PYTHON = "pure-python"
+
+YAMLInput = Union[str, bytes]
+"""The text or bytes of a YAML stream."""
+
+_SHARED_CONSTRUCTOR_TAGS = (
+    "tag:yaml.org,2002:null",
+    "tag:yaml.org,2002:bool",
+    "tag:yaml.org,2002:float",
+    "tag:yaml.org,2002:str",
+    "tag:yaml.org,2002:seq",
+    "tag:yaml.org,2002:map",
+)
+"""The tags PyYAML's safe constructor builds the same way as ruamel.yaml's."""
+
+
+def get_yaml(pure: bool = True) -> "YAML":
+    """
+    Return a ruamel.yaml safe loader and dumper.
+
+    Args:
+        pure: Only use the pure-Python parser and emitter. The C emitter ignores the indentation settings.
+
+    Returns:
+        The configured YAML instance
+    """
+    from ruamel.yaml import YAML, SafeRepresenter
+
+    yaml = YAML(typ="safe", pure=pure)
+    yaml.default_flow_style = False
+    yaml.indent(mapping=2, sequence=4, offset=2)
+    yaml.Representer.add_representer(immutabledict, SafeRepresenter.represent_dict)
+    yaml.Representer.add_representer(ImmutableOrderedDict, SafeRepresenter.represent_dict)
+    return yaml
+
+
+@lru_cache(maxsize=None)
+def get_available_backends() -> List[str]:
+    """Return the names of the installed YAML loaders, fastest first."""
+    import ruamel.yaml
+
+    backends = []
+    if ruamel.yaml.__with_libyaml__:
+        backends.append(RUAMEL_LIBYAML)
+    if get_pyyaml_loader() is not None:
+        backends.append(PYYAML_LIBYAML)
+    backends.append(PURE_PYTHON)
+    return backends
+
+
+def get_default_backend() -> str:
+    """Return the name of the fastest installed YAML loader."""
+    return get_available_backends()[0]
+
+
+def load_yaml(stream: YAMLInput, backend: Optional[str] = None) -> Any:
+    """
+    Parse a YAML stream containing a single document.
+
+    Args:
+        stream: The YAML text or bytes
+        backend: The name of the loader to use. Defaults to the fastest installed loader.
+
+    Returns:
+        The data in the document
+    """
+    return _load(stream, backend, single=True)
+
+
+def load_all_yaml(stream: YAMLInput, backend: Optional[str] = None) -> List[Any]:
+    """
+    Parse all the documents in a YAML stream.
+
+    Args:
+        stream: The YAML text or bytes
+        backend: The name of the loader to use. Defaults to the fastest installed loader.
+
+    Returns:
+        The data in each document
+    """
+    return _load(stream, backend, single=False)
+
+
+def dump_yaml(data: Any, stream: TextIO) -> None:
+    """Serialize data as a YAML document to a stream."""
+    get_yaml().dump(data, stream)
+
+
+def dump_all_yaml(documents: Iterable[Any], stream: TextIO) -> None:
+    """Serialize each item as a YAML document to a stream."""
+    get_yaml().dump_all(documents, stream)
+
+
+def _load(stream: YAMLInput, backend: Optional[str], single: bool) -> Any:
+    """Load the YAML stream with the backend, falling back to the pure-Python loader."""
+    backend = backend or get_default_backend()
+    if backend not in get_available_backends():
+        raise ValueError(f"The YAML backend {backend} is not installed.")
+
+    if backend == PYYAML_LIBYAML and not _has_directives(stream):
+        try:
+            return _load_with_pyyaml(stream, single)
+        except Exception as e:  # noqa: BLE001
+            # The pure-Python loader raises the error, or loads what the PyYAML loader couldn't reproduce
+            logger.debug("Loading the YAML with the pure-Python loader, as the PyYAML loader failed: %s", e)
+
+    yaml = get_yaml(pure=backend != RUAMEL_LIBYAML)
+    return yaml.load(stream) if single else list(yaml.load_all(stream))
+
+
+def _has_directives(stream: YAMLInput) -> bool:
+    """Return `True` if the stream may contain a `%YAML` directive, which can change the resolution rules."""
+    directive: Union[str, bytes] = b"%YAML" if isinstance(stream, bytes) else "%YAML"
+    return directive in stream  # type: ignore[operator]
+
+
+def _load_with_pyyaml(stream: YAMLInput, single: bool) -> Any:
+    """Load the YAML stream with PyYAML's libyaml bindings."""
+    loader_class = get_pyyaml_loader()
+    loader = loader_class(stream)  # type: ignore[misc]
+    try:
+        if single:
+            return loader.get_single_data()
+        documents = []
+        while loader.check_data():
+            documents.append(loader.get_data())
+        return documents
+    finally:
+        loader.dispose()
+
+
+@lru_cache(maxsize=None)
+def get_pyyaml_loader() -> Optional[type]:
+    """
+    Return a PyYAML loader class using libyaml and ruamel.yaml's YAML 1.2 safe resolution rules.
+
+    Returns:
+        The loader class, or `None` if PyYAML or its libyaml bindings aren't installed
+    """
+    try:
+        from yaml.cyaml import CParser  # type: ignore[attr-defined]
+    except ImportError:
+        return None
+
+    resolver_class = _make_pyyaml_resolver()
+    constructor_class = _make_pyyaml_constructor()
+
+    class Loader(CParser, constructor_class, resolver_class):  # type: ignore[valid-type,misc]
+        """Parse with libyaml and construct like ruamel.yaml."""
+
+        def __init__(self, stream: YAMLInput):
+            CParser.__init__(self, stream)
+            constructor_class.__init__(self)
+            resolver_class.__init__(self)
+
+    return Loader
+
+
+def _make_pyyaml_resolver() -> Type["BaseResolver"]:
+    """Return a PyYAML resolver class resolving plain scalars like ruamel.yaml does for YAML 1.2."""
+    from ruamel.yaml.resolver import implicit_resolvers
+    from yaml.resolver import BaseResolver
+
+    class Resolver(BaseResolver):
+        """Resolve plain scalars like ruamel.yaml does for YAML 1.2."""
+
+        yaml_implicit_resolvers: ClassVar[dict] = {}  # type: ignore[misc]
+
+    for versions, tag, regexp, first in implicit_resolvers:
+        if (1, 2) in versions:
+            Resolver.add_implicit_resolver(tag, regexp, first)
+    return Resolver
+
+
+def _make_pyyaml_constructor() -> Type["SafeConstructor"]:
+    """Return a PyYAML constructor class building the data like ruamel.yaml's YAML 1.2 safe constructor."""
+    from ruamel.yaml.constructor import SafeConstructor as RuamelSafeConstructor
+    from ruamel.yaml.util import create_timestamp
+    from yaml.constructor import BaseConstructor, ConstructorError, SafeConstructor
+
+    class Constructor(SafeConstructor):
+        """Construct the data like ruamel.yaml's YAML 1.2 safe constructor, rejecting anything else."""
+
+        yaml_constructors: ClassVar[dict] = {
+            tag: SafeConstructor.yaml_constructors[tag] for tag in _SHARED_CONSTRUCTOR_TAGS
+        }
+
+        def construct_mapping(self, node: Any, deep: bool = False) -> dict:
+            if any(key_node.tag == "tag:yaml.org,2002:merge" for key_node, _ in node.value):
+                raise ConstructorError(None, None, "merge keys are not supported", node.start_mark)
+            mapping = BaseConstructor.construct_mapping(self, node, deep=deep)
+            if len(mapping) != len(node.value):
+                raise ConstructorError(None, None, "found duplicate keys", node.start_mark)
+            return mapping
+
+        def construct_yaml_int(self, node: Any) -> int:
+            return _parse_yaml_int(self.construct_scalar(node))
+
+        def construct_yaml_timestamp(self, node: Any) -> Any:
+            match = RuamelSafeConstructor.timestamp_regexp.match(node.value)
+            if match is None:
+                message = f'failed to construct timestamp from "{node.value}"'
+                raise ConstructorError(None, None, message, node.start_mark)
+            return create_timestamp(**match.groupdict())
+
+    Constructor.yaml_constructors["tag:yaml.org,2002:int"] = Constructor.construct_yaml_int
+    Constructor.yaml_constructors["tag:yaml.org,2002:timestamp"] = Constructor.construct_yaml_timestamp
+    Constructor.yaml_constructors[None] = SafeConstructor.construct_undefined
+    return Constructor
+
+
+def _parse_yaml_int(value: str) -> int:
+    """Parse a YAML 1.2 integer, which may have a sign, underscores, and a binary, octal or hexadecimal prefix."""
+    value = value.replace("_", "")
+    sign = -1 if value[0] == "-" else +1
+    if value[0] in "+-":
+        value = value[1:]
+    if value.startswith("0b"):
+        return sign * int(value[2:], 2)
+    elif value.startswith("0x"):
+        return sign * int(value[2:], 16)
+    elif value.startswith("0o"):
+        return sign * int(value[2:], 8)
+    return sign * int(value)
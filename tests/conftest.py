@@ -28,6 +28,14 @@ def isolated_filesystem(monkeypatch, tmp_path):
     monkeypatch.setenv("USERPROFILE", str(root_path))
 
 
+@pytest.fixture(autouse=True)
+def clear_resolved_refs():
+    """Forget the remote refs resolved by other tests."""
+    from cookie_composer.remote_refs import clear_resolved_refs
+
+    clear_resolved_refs()
+
+
 @pytest.fixture(scope="session")
 def fixtures_path() -> Path:
     """Return the path to the testing fixtures."""
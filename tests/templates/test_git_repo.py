@@ -4,11 +4,20 @@ from pathlib import Path
 
 from git import Repo
 
-from cookie_composer.templates.git_repo import get_repo_name, template_repo_from_git
+from cookie_composer import git_commands
+from cookie_composer.exceptions import GitError
+from cookie_composer.templates.git_repo import (
+    MIRRORS_DIR,
+    get_cached_remote,
+    get_mirror_path,
+    get_repo_name,
+    get_worktree_path,
+    template_repo_from_git,
+)
 import pytest
 from pytest import param
 
-from cookie_composer.templates.types import Locality, TemplateFormat
+from cookie_composer.templates.types import CloneOptions, Locality, TemplateFormat
 
 
 @pytest.mark.parametrize(
@@ -97,7 +106,7 @@ def test_template_repo_from_git_remote_no_checkout(default_origin: Repo, tmp_pat
     origin_path = Path(default_origin.working_dir)
     template_repo = template_repo_from_git(str(origin_path), Locality.REMOTE, tmp_path, checkout=None)
     assert template_repo.source == str(origin_path)
-    assert template_repo.cached_source == origin_path.parent.joinpath("origin")
+    assert template_repo.cached_source == get_worktree_path(str(origin_path), tmp_path.resolve())
     assert template_repo.format == TemplateFormat.GIT
     assert template_repo.locality == Locality.REMOTE
     assert template_repo.checkout is None
@@ -112,7 +121,7 @@ def test_template_repo_from_git_remote_with_checkout(default_origin: Repo, tmp_p
     origin_path = Path(default_origin.working_dir)
     template_repo = template_repo_from_git(str(origin_path), Locality.REMOTE, tmp_path, checkout="remote-branch")
     assert template_repo.source == str(origin_path)
-    assert template_repo.cached_source == origin_path.parent.joinpath("origin_remote-branch")
+    assert template_repo.cached_source == get_worktree_path(str(origin_path), tmp_path.resolve(), "remote-branch")
     assert template_repo.format == TemplateFormat.GIT
     assert template_repo.locality == Locality.REMOTE
     assert template_repo.checkout == "remote-branch"
@@ -125,13 +134,14 @@ def test_template_repo_from_git_existing_remote_no_checkout(default_origin: Repo
     - remote repo previously cloned no checkout
     """
     origin_path = Path(default_origin.working_dir)
-    repo_path = tmp_path.joinpath("origin")
-    repo = default_origin.clone(repo_path)
+    legacy_path = tmp_path.joinpath("origin")
+    repo = default_origin.clone(legacy_path)
     repo.heads.master.checkout()
     repo.remotes.origin.pull()
     template_repo = template_repo_from_git(str(origin_path), Locality.REMOTE, tmp_path, checkout=None)
     assert template_repo.source == default_origin.working_dir
-    assert template_repo.cached_source == repo_path
+    assert template_repo.cached_source == get_worktree_path(str(origin_path), tmp_path.resolve())
+    assert not legacy_path.exists()
     assert template_repo.format == TemplateFormat.GIT
     assert template_repo.locality == Locality.REMOTE
     assert template_repo.checkout is None
@@ -145,8 +155,8 @@ def test_template_repo_from_git_existing_remote_with_checkout(default_origin: Re
     """
     branch = "remote-branch"
     origin_path = Path(default_origin.working_dir)
-    repo_path = tmp_path.joinpath(f"origin_{branch}")
-    repo = default_origin.clone(repo_path)
+    legacy_path = tmp_path.joinpath(f"origin_{branch}")
+    repo = default_origin.clone(legacy_path)
     repo.remotes.origin.pull()
     repo.create_head(branch, f"origin/{branch}")
     repo.heads[branch].checkout()
@@ -154,7 +164,126 @@ def test_template_repo_from_git_existing_remote_with_checkout(default_origin: Re
 
     template_repo = template_repo_from_git(str(origin_path), Locality.REMOTE, tmp_path, checkout="remote-branch")
     assert template_repo.source == default_origin.working_dir
-    assert template_repo.cached_source == repo_path
+    assert template_repo.cached_source == get_worktree_path(str(origin_path), tmp_path.resolve(), branch)
+    assert not legacy_path.exists()
     assert template_repo.format == TemplateFormat.GIT
     assert template_repo.locality == Locality.REMOTE
     assert template_repo.checkout == "remote-branch"
+
+
+def test_checkouts_of_a_remote_share_one_mirror(default_origin: Repo, tmp_path: Path):
+    """Each checkout is a detached worktree of the same bare mirror."""
+    origin_path = Path(default_origin.working_dir)
+    commit = default_origin.commit("v1.0.0").hexsha
+
+    for checkout in (None, "remote-branch", "v1.0.0", commit):
+        template_repo = template_repo_from_git(str(origin_path), Locality.REMOTE, tmp_path, checkout=checkout)
+        expected_commit = default_origin.commit(checkout or "HEAD").hexsha
+        assert template_repo.current_sha == expected_commit
+
+    assert list(tmp_path.joinpath(MIRRORS_DIR).iterdir()) == [get_mirror_path(str(origin_path), tmp_path)]
+    mirror = Repo(get_mirror_path(str(origin_path), tmp_path))
+    assert len(mirror.git.worktree("list").splitlines()) == 5
+
+
+def test_remotes_with_the_same_name_have_separate_worktrees(default_origin: Repo, tmp_path: Path):
+    """Repos with the same name at different URLs are cached in different worktrees."""
+    other_origin = default_origin.clone(tmp_path / "other" / "origin")
+    other_origin.index.commit("Another commit")
+
+    repo = get_cached_remote(default_origin.working_dir, tmp_path / "cache")
+    other_repo = get_cached_remote(other_origin.working_dir, tmp_path / "cache")
+
+    assert repo.working_dir != other_repo.working_dir
+    assert repo.head.commit.hexsha == default_origin.head.commit.hexsha
+    assert other_repo.head.commit.hexsha == other_origin.head.commit.hexsha
+
+
+def test_legacy_checkouts_of_other_remotes_are_kept(default_origin: Repo, tmp_path: Path):
+    """A checkout named like the remote's, but cloned from another remote, isn't removed."""
+    other_origin = default_origin.clone(tmp_path / "other" / "origin")
+    legacy_path = tmp_path.joinpath("cache", "origin")
+    other_origin.clone(legacy_path)
+
+    get_cached_remote(default_origin.working_dir, tmp_path / "cache")
+
+    assert legacy_path.joinpath(".git").is_dir()
+
+
+def test_cached_remote_fetches_missing_commits(default_origin: Repo, tmp_path: Path):
+    """A commit that isn't in the mirror yet is fetched, and a missing ref is an error."""
+    origin_path = Path(default_origin.working_dir)
+    get_cached_remote(str(origin_path), tmp_path)
+    clone = default_origin.clone(tmp_path / "clone")
+    clone.index.commit("A new commit")
+    clone.remotes.origin.push("master")
+    new_commit = clone.head.commit.hexsha
+
+    repo = get_cached_remote(str(origin_path), tmp_path, new_commit)
+    assert repo.head.commit.hexsha == new_commit
+
+    with pytest.raises(GitError):
+        get_cached_remote(str(origin_path), tmp_path, "missing-branch")
+
+
+@pytest.fixture
+def templates_origin(tmp_path: Path) -> Repo:
+    """A repo with two template directories and three commits, allowing partial clones."""
+    repo = Repo.init(tmp_path / "templates")
+    for number in range(3):
+        for directory in ("one", "two"):
+            tmp_path.joinpath("templates", directory).mkdir(exist_ok=True)
+            tmp_path.joinpath("templates", directory, "cookiecutter.json").write_text(f'{{"version": {number}}}')
+        repo.git.add(".")
+        repo.index.commit(f"Version {number}")
+    with repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+        config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+    return repo
+
+
+def test_cached_remote_uses_the_clone_options(templates_origin: Repo, tmp_path: Path):
+    """A shallow, blobless and sparse cache only contains what the layers need."""
+    url = f"file://{templates_origin.working_dir}"
+    options = CloneOptions(depth=1, filter="blob:none", sparse=True)
+
+    repo = get_cached_remote(url, tmp_path / "cache", clone_options=options, directory="one")
+    mirror = Repo(get_mirror_path(url, (tmp_path / "cache").resolve()))
+
+    assert git_commands.is_shallow(mirror)
+    assert git_commands.is_partial(mirror)
+    assert sorted(path.name for path in Path(repo.working_dir).iterdir()) == [".git", "one"]
+
+    repo = get_cached_remote(url, tmp_path / "cache", clone_options=options, directory="two")
+    assert sorted(path.name for path in Path(repo.working_dir).iterdir()) == [".git", "one", "two"]
+    assert not repo.is_dirty()
+
+    with git_commands.temp_git_tree_dir(Path(repo.working_dir), tmp_path / "render", commit="HEAD~1") as tree_dir:
+        assert tree_dir.joinpath("one", "cookiecutter.json").read_text() == '{"version": 1}'
+
+
+def test_rendering_an_older_commit_deepens_a_shallow_cache(templates_origin: Repo, tmp_path: Path):
+    """A commit older than the shallow history is fetched when it is rendered."""
+    url = f"file://{templates_origin.working_dir}"
+    repo = get_cached_remote(url, tmp_path / "cache", clone_options=CloneOptions(depth=1))
+    first_commit = templates_origin.commit("HEAD~2").hexsha
+    assert git_commands.resolve_commit(repo, first_commit) is None
+
+    with git_commands.temp_git_tree_dir(
+        Path(repo.working_dir), tmp_path / "render", commit=first_commit, directory="two"
+    ) as tree_dir:
+        assert tree_dir.joinpath("two", "cookiecutter.json").read_text() == '{"version": 0}'
+
+
+def test_fetch_commit_unshallows_when_the_remote_refuses_commits(templates_origin: Repo, tmp_path: Path):
+    """When a commit can't be fetched by its hash, the whole history is fetched."""
+    mirror = git_commands.clone_mirror(f"file://{templates_origin.working_dir}", tmp_path / "mirror.git", depth=1)
+    with templates_origin.config_writer() as config:
+        config.set_value("uploadpack", "allowAnySHA1InWant", "false")
+    with mirror.config_writer() as config:
+        # Version 2 of the protocol allows fetching any commit
+        config.set_value("protocol", "version", "0")
+    first_commit = templates_origin.commit("HEAD~2").hexsha
+
+    assert git_commands.fetch_commit(mirror, first_commit) == first_commit
+    assert not git_commands.is_shallow(mirror)
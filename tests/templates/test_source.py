@@ -4,8 +4,8 @@ from typing import Tuple
 
 from cookiecutter.config import get_user_config
 
-from cookie_composer.templates.types import TemplateFormat, Locality, TemplateRepo
-from cookie_composer.templates.source import identify_repo, get_template_repo
+from cookie_composer.templates.types import CloneOptions, TemplateFormat, Locality, TemplateRepo
+from cookie_composer.templates.source import get_clone_options, identify_repo, get_template_repo, get_template_repos
 
 import pytest
 from pathlib import Path
@@ -102,7 +102,7 @@ def test_get_template_repo(mocker, url, local_path, cache_dir, tmpl_format, loca
             None,
             TemplateFormat.GIT,
             Locality.REMOTE,
-            {"checkout": None},
+            {"checkout": None, "clone_options": CloneOptions(), "directory": ""},
         ),
         (
             "/path/to/local/git/repo",
@@ -110,7 +110,7 @@ def test_get_template_repo(mocker, url, local_path, cache_dir, tmpl_format, loca
             Path("/path/to/local/git/repo"),
             TemplateFormat.GIT,
             Locality.LOCAL,
-            {"checkout": None},
+            {"checkout": None, "clone_options": CloneOptions(), "directory": ""},
         ),
         (
             "repo",
@@ -118,7 +118,7 @@ def test_get_template_repo(mocker, url, local_path, cache_dir, tmpl_format, loca
             Path("/path/to/local/git/repo"),
             TemplateFormat.GIT,
             Locality.LOCAL,
-            {"checkout": None},
+            {"checkout": None, "clone_options": CloneOptions(), "directory": ""},
         ),
     ],
 )
@@ -160,3 +160,125 @@ def test_get_template_repo_plain(mocker, url, local_path, tmpl_format, locality)
     assert result.locality == Locality.LOCAL
     assert result.checkout is None
     assert result.password is None
+
+
+def test_get_template_repos_returns_repos_in_order(tmp_path: Path):
+    """Template repos are returned in the same order as the specifications."""
+    for name in ("one", "two", "three"):
+        tmp_path.joinpath(name).mkdir()
+    repo_specs = [{"url": name} for name in ("three", "one", "two", "one")]
+
+    result = get_template_repos(repo_specs, local_path=tmp_path, max_workers=2)
+
+    assert [repo.cached_source for repo in result] == [
+        tmp_path / "three",
+        tmp_path / "one",
+        tmp_path / "two",
+        tmp_path / "one",
+    ]
+
+
+def test_get_template_repos_serializes_same_url(mocker):
+    """Specifications sharing a URL are fetched by the same worker, in order."""
+    import threading
+
+    calls = []
+
+    def fake_get_template_repo(url, local_path=None, checkout=None, password=None):
+        calls.append((url, checkout, threading.current_thread().name))
+        return mocker.Mock(spec=TemplateRepo, source=url, checkout=checkout)
+
+    mocker.patch("cookie_composer.templates.source.get_template_repo", side_effect=fake_get_template_repo)
+    repo_specs = [
+        {"url": "https://github.com/user/repo.git", "checkout": "v1"},
+        {"url": "https://github.com/user/other.git"},
+        {"url": "https://github.com/user/repo.git", "checkout": "v2"},
+    ]
+
+    result = get_template_repos(repo_specs)
+
+    assert [(repo.source, repo.checkout) for repo in result] == [
+        ("https://github.com/user/repo.git", "v1"),
+        ("https://github.com/user/other.git", None),
+        ("https://github.com/user/repo.git", "v2"),
+    ]
+    repo_calls = [call for call in calls if call[0] == "https://github.com/user/repo.git"]
+    assert [call[1] for call in repo_calls] == ["v1", "v2"]
+    assert repo_calls[0][2] == repo_calls[1][2]
+
+
+def test_get_template_repos_serializes_same_cache_path(mocker, tmp_path: Path):
+    """Different URLs of the same cached repository are fetched by the same worker."""
+    import threading
+
+    calls = []
+
+    def fake_get_template_repo(url, local_path=None, checkout=None):
+        calls.append((url, threading.current_thread().name))
+        return mocker.Mock(spec=TemplateRepo, source=url)
+
+    mocker.patch("cookie_composer.templates.source.get_template_repo", side_effect=fake_get_template_repo)
+    tmp_path.joinpath("local").mkdir()
+    repo_specs = [
+        {"url": "https://github.com/user/repo.git", "checkout": "v1"},
+        {"url": "local"},
+        {"url": "https://github.com/user/repo.git/", "checkout": "v2"},
+        {"url": "./local"},
+    ]
+
+    get_template_repos(repo_specs, local_path=tmp_path)
+
+    threads = dict(calls)
+    assert threads["https://github.com/user/repo.git"] == threads["https://github.com/user/repo.git/"]
+    assert threads["local"] == threads["./local"]
+
+
+def test_get_template_repos_fetches_zipfiles_on_the_calling_thread(mocker):
+    """Zip archives with the same file name share a cache path, so they aren't fetched by the workers."""
+    import threading
+
+    calls = []
+
+    def fake_get_template_repo(url, local_path=None):
+        calls.append((url, threading.current_thread()))
+        return mocker.Mock(spec=TemplateRepo, source=url)
+
+    mocker.patch("cookie_composer.templates.source.get_template_repo", side_effect=fake_get_template_repo)
+    repo_specs = [
+        {"url": "https://github.com/user/repo.git"},
+        {"url": "https://example.com/template.zip"},
+        {"url": "https://example.com/other.zip"},
+    ]
+
+    result = get_template_repos(repo_specs)
+
+    assert [repo.source for repo in result] == [spec["url"] for spec in repo_specs]
+    threads = dict(calls)
+    assert threads["https://example.com/template.zip"] is threading.current_thread()
+    assert threads["https://example.com/other.zip"] is threading.current_thread()
+    assert threads["https://github.com/user/repo.git"] is not threading.current_thread()
+
+
+def test_get_template_repos_raises_first_error_in_order(mocker):
+    """The error of the earliest failing template is raised."""
+
+    def fake_get_template_repo(url, local_path=None, checkout=None, password=None):
+        raise ValueError(url)
+
+    mocker.patch("cookie_composer.templates.source.get_template_repo", side_effect=fake_get_template_repo)
+
+    with pytest.raises(ValueError, match="first"):
+        get_template_repos([{"url": "first"}, {"url": "second"}])
+
+
+def test_get_template_repos_empty():
+    """No specifications return no repos."""
+    assert get_template_repos([]) == []
+
+
+def test_get_clone_options_overrides_the_user_config():
+    """The layer's clone options take precedence over the user configuration."""
+    user_config = {"cookie_composer": {"clone": {"depth": 1, "filter": "blob:none"}}}
+
+    assert get_clone_options(user_config, {"depth": 10}) == CloneOptions(depth=10, filter="blob:none")
+    assert get_clone_options({}, None) == CloneOptions()
@@ -3,7 +3,7 @@
 import pytest
 from pytest import param
 
-from cookie_composer.templates.types import get_template_name
+from cookie_composer.templates.types import CloneOptions, get_template_name
 
 
 @pytest.mark.parametrize(
@@ -31,3 +31,12 @@ def test_get_template_name_errors(bad_value):
     """It should raise errors."""
     with pytest.raises(ValueError):
         get_template_name(bad_value)
+
+
+def test_clone_options_from_configs():
+    """Values set in later configurations take precedence, and unknown options are errors."""
+    options = CloneOptions.from_configs({"depth": 1, "filter": "blob:none"}, None, {"depth": None, "sparse": True})
+    assert options == CloneOptions(depth=1, filter="blob:none", sparse=True)
+
+    with pytest.raises(ValueError):
+        CloneOptions.from_configs({"shallow": True})
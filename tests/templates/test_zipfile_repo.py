@@ -1,19 +1,37 @@
 """Tests for zipfile_repo.py module."""
 
-import shutil
+import json
+import os
 import tempfile
 from pathlib import Path
+from typing import Optional
+from zipfile import ZipFile
 
 import pytest
+import requests
+from pytest import param
 
 from cookie_composer.exceptions import (
-    InvalidZipRepositoryError,
-    InvalidZipPasswordError,
     EmptyZipRepositoryError,
+    InvalidZipPasswordError,
+    InvalidZipRepositoryError,
     NoZipDirectoryError,
 )
+from cookie_composer.layers import LayerConfig, render_layer
 from cookie_composer.templates import zipfile_repo
-from cookie_composer.templates.types import Locality
+from cookie_composer.templates.types import Locality, Template
+
+
+@pytest.fixture
+def multi_template_zip(fixtures_path: Path, tmp_path: Path) -> Path:
+    """A zipfile of a project with the template1 and template2 fixtures in sub directories."""
+    zip_path = tmp_path / "multi-template.zip"
+    with ZipFile(zip_path, "w") as zip_file:
+        zip_file.writestr("project/", "")
+        for name in ("template1", "template2"):
+            for path in sorted(fixtures_path.joinpath(name).rglob("*")):
+                zip_file.write(path, f"project/{name}/{path.relative_to(fixtures_path / name)}")
+    return zip_path
 
 
 def mock_download(fixture_path: Path):
@@ -37,25 +55,17 @@ def mock_download_with_empty_chunks(fixture_path: Path):
 
 def test_unzip_local_file(mocker, fixtures_path: Path, tmp_path: Path):
     """Local file reference can be unzipped."""
-    mock_prompt_and_delete = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.prompt_and_delete", return_value=True, autospec=True
-    )
     zipfile_path = fixtures_path.joinpath("fake-repo-tmpl.zip")
     output_dir = zipfile_repo.cache_source(str(zipfile_path), is_remote=False, cache_dir=tmp_path)
     assert str(output_dir).startswith(str(fixtures_path))
-    assert not mock_prompt_and_delete.called
 
 
 def test_unzip_local_protected_file(mocker, fixtures_path: Path, tmp_path: Path):
     """Local protected file reference can be unzipped."""
-    mock_prompt_and_delete = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.prompt_and_delete", return_value=True, autospec=True
-    )
     zipfile_path = fixtures_path.joinpath("protected-fake-repo-tmpl.zip")
     output_dir = zipfile_repo.cache_source(str(zipfile_path), is_remote=False, cache_dir=tmp_path)
 
     assert str(output_dir).startswith(str(fixtures_path))
-    assert not mock_prompt_and_delete.called
 
 
 def test_extract_protected_local_file_environment_password(fixtures_path: Path):
@@ -81,6 +91,52 @@ def test_extract_protected_local_file_user_password_with_noinput(fixtures_path:
         zipfile_repo.extract_zipfile(zipfile_path, password=None)
 
 
+def test_extract_only_the_template_directory(multi_template_zip: Path, tmp_path: Path):
+    """Only the members of the template's directory are extracted."""
+    output_dir = zipfile_repo.extract_zipfile(multi_template_zip, tmp_path / "output", directory="template1")
+
+    assert output_dir == tmp_path / "output" / "project"
+    assert [path.name for path in output_dir.iterdir()] == ["template1"]
+    assert output_dir.joinpath("template1", "cookiecutter.json").exists()
+
+
+def test_read_protected_template_file(fixtures_path: Path):
+    """Files are read from a password-protected zipfile without extracting it."""
+    zipfile_path = fixtures_path.joinpath("protected-fake-repo-tmpl.zip")
+
+    context = json.loads(zipfile_repo.read_template_file(zipfile_path, "cookiecutter.json", password="sekrit"))
+
+    assert context["full_name"] == "Audrey Roy"
+    with pytest.raises(InvalidZipPasswordError):
+        zipfile_repo.read_template_file(zipfile_path, "cookiecutter.json", password="not-the-right-password")
+
+
+def test_template_is_read_from_the_zipfile(multi_template_zip: Path, fixtures_path: Path, tmp_path: Path):
+    """The context and the entries of a template in a zipfile are read from the archive."""
+    template_repo = zipfile_repo.template_repo_from_zipfile(
+        str(multi_template_zip), locality=Locality.LOCAL, cache_dir=tmp_path / "cache"
+    )
+    template = Template(repo=template_repo, directory="template2")
+
+    assert template.context == json.loads(fixtures_path.joinpath("template2", "cookiecutter.json").read_text())
+    assert sorted(template.listdir()) == sorted(path.name for path in fixtures_path.joinpath("template2").iterdir())
+    assert template.cached_path == multi_template_zip / "project" / "template2"
+
+
+def test_rendering_keeps_the_cached_zipfile(multi_template_zip: Path, tmp_path: Path):
+    """A template in a zipfile renders, and the zipfile stays cached for the next render."""
+    template_repo = zipfile_repo.template_repo_from_zipfile(
+        str(multi_template_zip), locality=Locality.LOCAL, cache_dir=tmp_path / "cache"
+    )
+    layer_config = LayerConfig(template=Template(repo=template_repo, directory="template1"), no_input=True)
+
+    rendered_layer = render_layer(layer_config, tmp_path / "render")
+
+    assert rendered_layer.rendered_name == "fake-project-template"
+    assert (tmp_path / "render" / "fake-project-template" / "README.md").exists()
+    assert multi_template_zip.exists()
+
+
 def test_validate_empty_zip_file(fixtures_path: Path):
     """In `validate_zipfile()`, an empty file raises an error."""
     zipfile_path = fixtures_path.joinpath("empty.zip")
@@ -102,14 +158,18 @@ def test_bad_zip_file(fixtures_path: Path):
         zipfile_repo.validate_zipfile(zipfile_path, str(zipfile_path))
 
 
+def mock_response(mocker, fixtures_path: Path, status_code: int = 200, headers: Optional[dict] = None):
+    """Fake response of `requests.get`, streaming the fake-repo-tmpl.zip fixture."""
+    response = mocker.MagicMock(status_code=status_code, headers=headers or {})
+    response.iter_content.return_value = mock_download(fixtures_path)
+    return response
+
+
 def test_download_zipfile_url(mocker, tmp_path: Path, fixtures_path: Path):
     """In `download_zipfile()`, a url will be downloaded."""
-    request = mocker.MagicMock()
-    request.iter_content.return_value = mock_download(fixtures_path)
-
-    mocker.patch(
+    mock_requests_get = mocker.patch(
         "cookie_composer.templates.zipfile_repo.requests.get",
-        return_value=request,
+        return_value=mock_response(mocker, fixtures_path, headers={"Last-Modified": "Wed, 01 May 2024 12:00:00 GMT"}),
         autospec=True,
     )
 
@@ -121,15 +181,15 @@ def test_download_zipfile_url(mocker, tmp_path: Path, fixtures_path: Path):
     assert output_path.exists()
     assert output_path.is_file()
     assert output_path.name == "fake-repo-tmpl.zip"
+    assert output_path.read_bytes() == fixtures_path.joinpath("fake-repo-tmpl.zip").read_bytes()
+    assert output_path.stat().st_mtime == 1714564800
+    assert mock_requests_get.call_args.kwargs["headers"] == {}
+    assert list(tmp_path.glob(".fake-repo-tmpl.zip.*")) == []
 
 
 def test_download_url_with_empty_chunks(mocker, tmp_path: Path, fixtures_path: Path):
     """In `download_zipfile()` empty chunk must be ignored."""
-    mock_prompt_and_delete = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.prompt_and_delete", return_value=True, autospec=True
-    )
-
-    request = mocker.MagicMock()
+    request = mock_response(mocker, fixtures_path)
     request.iter_content.return_value = mock_download_with_empty_chunks(fixtures_path)
 
     mocker.patch(
@@ -148,105 +208,102 @@ def test_download_url_with_empty_chunks(mocker, tmp_path: Path, fixtures_path: P
     assert output_path.name == "fake-repo-tmpl.zip"
 
 
-def test_download_url_existing_cache(mocker, tmp_path: Path, fixtures_path: Path):
-    """Url should be downloaded and unzipped, old zip file will be removed."""
-    mock_prompt_and_delete = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.prompt_and_delete", return_value=True, autospec=True
-    )
-
-    request = mocker.MagicMock()
-    request.iter_content.return_value = mock_download(fixtures_path)
-
-    mocker.patch(
+def test_download_url_existing_cache_changed(mocker, tmp_path: Path, fixtures_path: Path):
+    """A cached zipfile that changed on the server is downloaded again, without prompting."""
+    mock_requests_get = mocker.patch(
         "cookie_composer.templates.zipfile_repo.requests.get",
-        return_value=request,
+        return_value=mock_response(mocker, fixtures_path),
         autospec=True,
     )
 
     # Create an existing cache of the zipfile
     existing_zip = tmp_path.joinpath("fake-repo-tmpl.zip")
     existing_zip.write_text("This is an existing zipfile")
+    os.utime(existing_zip, (1714564800, 1714564800))
 
     output_path = zipfile_repo.download_zipfile(
         "https://example.com/path/to/fake-repo-tmpl.zip",
         cache_dir=tmp_path,
     )
 
-    assert output_path.exists()
-    assert output_path.is_file()
-    assert output_path.name == "fake-repo-tmpl.zip"
-    assert mock_prompt_and_delete.call_count == 1
-
+    assert output_path == existing_zip
+    assert output_path.read_bytes() == fixtures_path.joinpath("fake-repo-tmpl.zip").read_bytes()
+    assert mock_requests_get.call_args.kwargs["headers"] == {"If-Modified-Since": "Wed, 01 May 2024 12:00:00 GMT"}
 
-def test_download_url_existing_cache_no_input(mocker, tmp_path: Path, fixtures_path: Path):
-    """If no_input is provided, the existing file should be removed."""
-    request = mocker.MagicMock()
-    request.iter_content.return_value = mock_download(fixtures_path)
 
-    mock_requests_get = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.requests.get",
-        return_value=request,
-        autospec=True,
-    )
+def test_download_is_ok_to_reuse(mocker, tmp_path: Path, fixtures_path: Path):
+    """A cached zipfile that didn't change on the server is not downloaded again."""
+    request = mock_response(mocker, fixtures_path, status_code=304)
+    mocker.patch("cookie_composer.templates.zipfile_repo.requests.get", return_value=request, autospec=True)
 
-    # Create an existing cache of the zipfile
     existing_zip = tmp_path.joinpath("fake-repo-tmpl.zip")
     existing_zip.write_text("This is an existing zipfile")
 
     output_path = zipfile_repo.download_zipfile(
         "https://example.com/path/to/fake-repo-tmpl.zip",
         cache_dir=tmp_path,
-        no_input=True,
     )
 
-    assert output_path.exists()
-    assert output_path.is_file()
-    assert output_path.name == "fake-repo-tmpl.zip"
-    assert mock_requests_get.call_count == 1
-
+    assert output_path == existing_zip
+    assert output_path.read_text() == "This is an existing zipfile"
+    assert request.iter_content.call_count == 0
 
-def test_download_should_abort_if_no_redownload(mocker, tmp_path: Path):
-    """Should exit without cloning anything If no re-download."""
-    mocker.patch("cookie_composer.templates.zipfile_repo.prompt_and_delete", side_effect=SystemExit, autospec=True)
 
-    mock_requests_get = mocker.patch(
+@pytest.mark.parametrize(
+    ["side_effect", "status_code"],
+    [
+        param(requests.ConnectionError("offline"), 200, id="unreachable"),
+        param(None, 500, id="server-error"),
+    ],
+)
+def test_download_reuses_the_cache_when_the_server_fails(
+    mocker, tmp_path: Path, fixtures_path: Path, side_effect, status_code: int
+):
+    """A cached zipfile is used when the server can't be reached or returns an error."""
+    request = mock_response(mocker, fixtures_path, status_code=status_code)
+    mocker.patch(
         "cookie_composer.templates.zipfile_repo.requests.get",
+        return_value=request,
+        side_effect=side_effect,
         autospec=True,
     )
 
-    # Create an existing cache of the zipfile
     existing_zip = tmp_path.joinpath("fake-repo-tmpl.zip")
     existing_zip.write_text("This is an existing zipfile")
 
-    zipfile_url = "https://example.com/path/to/fake-repo-tmpl.zip"
+    output_path = zipfile_repo.download_zipfile("https://example.com/path/to/fake-repo-tmpl.zip", cache_dir=tmp_path)
 
-    with pytest.raises(SystemExit):
-        zipfile_repo.download_zipfile(zipfile_url, cache_dir=tmp_path)
+    assert output_path.read_text() == "This is an existing zipfile"
+    assert request.iter_content.call_count == 0
 
-    assert not mock_requests_get.called
 
+def test_an_interrupted_download_keeps_the_cached_zipfile(mocker, tmp_path: Path, fixtures_path: Path):
+    """The cached zipfile is only replaced once the new zipfile is completely downloaded."""
+    request = mock_response(mocker, fixtures_path)
+    request.iter_content.side_effect = requests.ConnectionError("interrupted")
+    mocker.patch("cookie_composer.templates.zipfile_repo.requests.get", return_value=request, autospec=True)
+    existing_zip = tmp_path.joinpath("fake-repo-tmpl.zip")
+    existing_zip.write_text("This is an existing zipfile")
 
-def test_download_is_ok_to_reuse(mocker, tmp_path: Path, fixtures_path: Path):
-    """Already downloaded zip should not be downloaded again."""
-    mock_prompt_and_delete = mocker.patch(
-        "cookie_composer.templates.zipfile_repo.prompt_and_delete", return_value=False, autospec=True
-    )
+    with pytest.raises(requests.ConnectionError):
+        zipfile_repo.download_zipfile("https://example.com/path/to/fake-repo-tmpl.zip", cache_dir=tmp_path)
 
-    request = mocker.MagicMock()
+    assert existing_zip.read_text() == "This is an existing zipfile"
+    assert list(tmp_path.glob(".fake-repo-tmpl.zip.*")) == []
 
-    existing_zip = tmp_path.joinpath("fake-repo-tmpl.zip")
-    shutil.copy(fixtures_path.joinpath("fake-repo-tmpl.zip"), existing_zip)
 
-    output_path = zipfile_repo.download_zipfile(
-        "https://example.com/path/to/fake-repo-tmpl.zip",
-        cache_dir=tmp_path,
+def test_download_without_a_cache_raises_connection_errors(mocker, tmp_path: Path):
+    """Without a cached zipfile, a server that can't be reached is an error."""
+    mocker.patch(
+        "cookie_composer.templates.zipfile_repo.requests.get",
+        side_effect=requests.ConnectionError("offline"),
+        autospec=True,
     )
 
-    assert output_path.exists()
-    assert output_path.is_file()
-    assert output_path.name == "fake-repo-tmpl.zip"
-    assert mock_prompt_and_delete.call_count == 1
-    assert request.iter_content.call_count == 0
+    with pytest.raises(requests.ConnectionError):
+        zipfile_repo.download_zipfile("https://example.com/path/to/fake-repo-tmpl.zip", cache_dir=tmp_path)
+
+    assert not tmp_path.joinpath("fake-repo-tmpl.zip").exists()
 
 
 def test_template_repo_from_zipfile(fixtures_path: Path, tmp_path: Path):
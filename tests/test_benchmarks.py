@@ -0,0 +1,62 @@
+"""Smoke tests for the benchmark suite."""
+
+import json
+from pathlib import Path
+
+from benchmarks import run
+from benchmarks.fixtures import get_fixtures
+
+
+def test_fixtures_load():
+    """Every fixture makes a pair of documents."""
+    for make_fixture in get_fixtures(scale=0.01).values():
+        existing, new = make_fixture()
+        assert isinstance(existing, dict)
+        assert isinstance(new, dict)
+
+
+def test_benchmarks_run_on_every_fixture():
+    """Every kind of benchmark runs on a fixture."""
+    benchmarks = run.get_benchmarks(get_fixtures()["package"]())
+
+    assert set(benchmarks) == set(run.BENCHMARK_KINDS)
+    for func in benchmarks.values():
+        func()
+
+
+def test_main_saves_and_compares_results(tmp_path: Path, capsys):
+    """Results are saved, and slower results than the baseline are reported as regressions."""
+    results_path = tmp_path / "results.json"
+    args = ["-k", "merge[overwrite]/package", "--repeat", "1"]
+
+    assert run.main([*args, "--save", str(results_path)]) == 0
+    results = json.loads(results_path.read_text())
+    assert list(results) == ["merge[overwrite]/package"]
+
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({"merge[overwrite]/package": {"time_us": 0.000001, "peak_kib": 0}}))
+    assert run.main([*args, "--compare", str(baseline_path)]) == 1
+    assert "slower than the baseline" in capsys.readouterr().out
+
+
+def test_yaml_benchmark_compares_every_backend():
+    """The YAML benchmark times every installed backend."""
+    from benchmarks import bench_yaml
+    from cookie_composer.yaml_backend import get_available_backends
+
+    text = bench_yaml.dump_all(bench_yaml.make_composition(2, 5))
+
+    assert set(bench_yaml.compare_backends(text, number=1)) == set(get_available_backends())
+
+
+def test_toml_benchmark_compares_implementations():
+    """The TOML benchmark times the toml package and the backend, which give the same data."""
+    from benchmarks import bench_toml
+    from cookie_composer import toml_backend
+
+    texts = (bench_toml.make_cargo_manifest(3, "base"), bench_toml.make_cargo_manifest(2, "layer"))
+
+    assert len(bench_toml.compare(texts, number=1)) >= 2
+    assert toml_backend.loads(bench_toml.backend_merge(texts, toml_backend.get_writer())) == toml_backend.loads(
+        bench_toml.toml_package_merge(texts)
+    )
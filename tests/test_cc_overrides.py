@@ -2,6 +2,7 @@
 
 import platform
 from collections import OrderedDict
+from pathlib import Path
 
 import pytest
 from click.testing import CliRunner
@@ -405,3 +406,118 @@ class TestReadUserChoice:
         read_user_variable.assert_called_once_with("project_name", "A New Project", {}, "  [dim][1/2][/] ")
         read_user_choice.assert_called_once_with("pkg_name", rendered_choices, {}, "  [dim][2/2][/] ")
         assert cookiecutter_dict == expected
+
+
+def test_bytecode_cache_shared_across_directories(tmp_path: Path, mocker, monkeypatch):
+    """The same template in a different directory reuses the cached bytecode."""
+    from jinja2 import FileSystemLoader
+
+    from cookie_composer.cc_overrides import CustomStrictEnvironment, get_bytecode_cache
+
+    for name in ("first", "second"):
+        tmp_path.joinpath(name).mkdir()
+        tmp_path.joinpath(name, "README.md").write_text("Hello {{ name }}!")
+
+    # Like cookiecutter's generate_files, load the templates relative to the template directory
+    monkeypatch.chdir(tmp_path / "first")
+    first_env = CustomStrictEnvironment(loader=FileSystemLoader("."))
+    assert first_env.get_template("README.md").render(name="World") == "Hello World!"
+    assert len(list(Path(get_bytecode_cache().directory).iterdir())) == 1
+
+    monkeypatch.chdir(tmp_path / "second")
+    second_env = CustomStrictEnvironment(loader=FileSystemLoader("."))
+    compile_spy = mocker.spy(second_env, "compile")
+    assert second_env.get_template("README.md").render(name="Again") == "Hello Again!"
+    compile_spy.assert_not_called()
+
+
+def test_bytecode_cache_changed_source_recompiles(tmp_path: Path, mocker):
+    """A changed template is compiled again."""
+    from jinja2 import FileSystemLoader
+
+    from cookie_composer.cc_overrides import CustomStrictEnvironment
+
+    tmp_path.joinpath("README.md").write_text("Hello {{ name }}!")
+    CustomStrictEnvironment(loader=FileSystemLoader(str(tmp_path))).get_template("README.md")
+
+    tmp_path.joinpath("README.md").write_text("Goodbye {{ name }}!")
+    env = CustomStrictEnvironment(loader=FileSystemLoader(str(tmp_path)))
+    compile_spy = mocker.spy(env, "compile")
+    assert env.get_template("README.md").render(name="World") == "Goodbye World!"
+    compile_spy.assert_called_once()
+
+
+def test_use_bytecode_cache_patches_generation():
+    """Cookiecutter's environments use the bytecode cache only while generating files."""
+    import cookiecutter.generate
+
+    from cookie_composer.cc_overrides import create_env_with_context, get_bytecode_cache, use_bytecode_cache
+
+    original = cookiecutter.generate.create_env_with_context
+    with use_bytecode_cache():
+        assert cookiecutter.generate.create_env_with_context is create_env_with_context
+        env = cookiecutter.generate.create_env_with_context({"cookiecutter": {}})
+        assert env.bytecode_cache is get_bytecode_cache()
+    assert cookiecutter.generate.create_env_with_context is original
+
+
+def test_use_bytecode_cache_reads_the_user_config_once(mocker):
+    """The environments created in a block reuse the cache it resolved, without reading the user config again."""
+    from cookie_composer import cc_overrides
+
+    get_user_config = mocker.spy(cc_overrides, "get_user_config")
+    with cc_overrides.use_bytecode_cache():
+        with cc_overrides.use_bytecode_cache():
+            environments = [cc_overrides.CustomStrictEnvironment() for _ in range(3)]
+            environments.append(cc_overrides.create_env_with_context({"cookiecutter": {}}))
+
+    assert get_user_config.call_count == 1
+    assert all(env.bytecode_cache is environments[0].bytecode_cache for env in environments)
+
+
+def test_use_reflink_copies_clones_the_files_cookiecutter_does_not_render(tmp_path: Path, mocker):
+    """Binary files and `_copy_without_render` paths are cloned when reflinks are enabled."""
+    import shutil
+
+    import cookiecutter.generate
+
+    from cookie_composer import file_writes
+
+    def clone(origin: Path, destination: Path) -> bool:
+        shutil.copyfile(origin, destination)
+        return True
+
+    clone_file = mocker.patch.object(file_writes, "clone_file", side_effect=clone)
+    template_dir = tmp_path / "template"
+    project_dir = template_dir / "{{cookiecutter.project}}"
+    project_dir.joinpath("assets").mkdir(parents=True)
+    project_dir.joinpath("logo.bin").write_bytes(b"\x00\x01" * 1024)
+    project_dir.joinpath("assets", "style.css").write_text("{{ not rendered }}")
+    project_dir.joinpath("README.md").write_text("{{ cookiecutter.project }}")
+    context = {"cookiecutter": {"project": "demo", "_copy_without_render": ["assets"]}}
+
+    original_shutil = cookiecutter.generate.shutil
+    with file_writes.reflink_copies(), cc_overrides.use_reflink_copies():
+        cookiecutter.generate.generate_files(str(template_dir), context, str(tmp_path / "output"))
+    assert cookiecutter.generate.shutil is original_shutil
+
+    output_dir = tmp_path / "output" / "demo"
+    assert {call.args[1].name for call in clone_file.call_args_list} == {"logo.bin", "style.css"}
+    assert output_dir.joinpath("logo.bin").read_bytes() == b"\x00\x01" * 1024
+    assert output_dir.joinpath("assets", "style.css").read_text() == "{{ not rendered }}"
+    assert output_dir.joinpath("README.md").read_text() == "demo"
+
+
+def test_use_reflink_copies_copies_when_reflinks_are_disabled(tmp_path: Path, mocker):
+    """Without a reflink_copies block, cookiecutter's copies are regular copies."""
+    from cookie_composer import file_writes
+
+    clone_file = mocker.patch.object(file_writes, "clone_file")
+    origin = tmp_path / "origin.bin"
+    origin.write_bytes(b"data")
+
+    with cc_overrides.use_reflink_copies():
+        cc_overrides.ReflinkShutil.copyfile(origin, tmp_path / "copy.bin")
+
+    clone_file.assert_not_called()
+    assert tmp_path.joinpath("copy.bin").read_bytes() == b"data"
@@ -53,3 +53,96 @@ def test_local_extension(tmpdir, runner, fixtures_path):
     content = Path(output_dir, "Foobar", "HISTORY.rst").read_text()
     assert "FoobarFoobar" in content
     assert "FOOBAR" in content
+
+
+def test_create_parallel(tmp_path, runner, fixtures_path):
+    """The layers of a composition can be generated concurrently from the command line."""
+    result = runner.invoke(
+        cli.create,
+        [
+            "--no-input",
+            "--default-config",
+            "--parallel",
+            "--max-workers",
+            "2",
+            "--output-dir",
+            str(tmp_path),
+            str(fixtures_path / "multi-template.yaml"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert Path(tmp_path, "fake-project-template", "ABOUT.md").exists()
+
+
+def test_create_reflink(tmp_path, runner, fixtures_path, mocker):
+    """Files are copied with reflinks from the command line, falling back to regular copies."""
+    from cookie_composer import file_writes
+
+    clone_file = mocker.spy(file_writes, "clone_file")
+    result = runner.invoke(
+        cli.create,
+        [
+            "--no-input",
+            "--default-config",
+            "--reflink",
+            "--output-dir",
+            str(tmp_path),
+            str(fixtures_path / "multi-template.yaml"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert Path(tmp_path, "fake-project-template", "ABOUT.md").exists()
+    assert clone_file.called
+    assert not file_writes.reflinks_enabled()
+
+
+def test_add_and_update_pass_the_reflink_option(tmp_path, runner, mocker):
+    """The add and update commands pass the --reflink option to the rendering."""
+    add_cmd = mocker.patch.object(cli, "add_cmd")
+    update_cmd = mocker.patch.object(cli, "update_cmd")
+
+    result = runner.invoke(cli.add, ["--reflink", "-d", str(tmp_path), "template"])
+    assert result.exit_code == 0, result.output
+    assert add_cmd.call_args.kwargs["reflink"] is True
+
+    result = runner.invoke(cli.update, ["--reflink", "-d", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert update_cmd.call_args.kwargs["reflink"] is True
+
+
+def test_create_in_memory(tmp_path, runner, fixtures_path, mocker):
+    """The layers are rendered in a memory-backed file system from the command line."""
+    from cookie_composer import layers
+
+    temporary_render_dir = mocker.spy(layers, "temporary_render_dir")
+    result = runner.invoke(
+        cli.create,
+        [
+            "--no-input",
+            "--default-config",
+            "--in-memory",
+            "--output-dir",
+            str(tmp_path),
+            str(fixtures_path / "multi-template.yaml"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert Path(tmp_path, "fake-project-template", "ABOUT.md").exists()
+    assert temporary_render_dir.call_args_list == [mocker.call(True)] * 2
+
+
+def test_add_and_update_pass_the_in_memory_option(tmp_path, runner, mocker):
+    """The add and update commands pass the --in-memory option to the rendering."""
+    add_cmd = mocker.patch.object(cli, "add_cmd")
+    update_cmd = mocker.patch.object(cli, "update_cmd")
+
+    result = runner.invoke(cli.add, ["--in-memory", "-d", str(tmp_path), "template"])
+    assert result.exit_code == 0, result.output
+    assert add_cmd.call_args.kwargs["in_memory"] is True
+
+    result = runner.invoke(cli.update, ["--in-memory", "-d", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert update_cmd.call_args.kwargs["in_memory"] is True
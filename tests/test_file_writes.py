@@ -0,0 +1,117 @@
+"""Test writing and copying files."""
+
+import os
+from pathlib import Path
+
+from cookie_composer import file_writes
+from cookie_composer.file_writes import copy_if_changed, track_writes, write_text_if_changed
+
+OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+
+def make_old_file(path: Path, content: str) -> Path:
+    """Write a file with an old modification time."""
+    path.write_text(content)
+    os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    return path
+
+
+def test_copy_skips_identical_files(tmp_path: Path):
+    """Copying over a file with the same content only updates its permissions."""
+    origin = tmp_path / "origin.txt"
+    origin.write_text("content")
+    origin.chmod(0o755)
+    destination = make_old_file(tmp_path / "destination.txt", "content")
+    destination.chmod(0o644)
+
+    with track_writes() as writes:
+        assert copy_if_changed(origin, destination) is False
+
+    assert destination.stat().st_mtime_ns == OLD_MTIME_NS
+    assert destination.stat().st_mode & 0o777 == 0o755
+    assert (writes.written, writes.skipped) == (0, 1)
+
+
+def test_copy_writes_changed_and_new_files(tmp_path: Path):
+    """Files with different content, even of the same size, and new files are copied."""
+    origin = tmp_path / "origin.txt"
+    origin.write_text("content")
+    destination = make_old_file(tmp_path / "destination.txt", "CONTENT")
+
+    with track_writes() as writes:
+        assert copy_if_changed(origin, destination) is True
+        assert copy_if_changed(origin, tmp_path / "new.txt") is True
+
+    assert destination.read_text() == "content"
+    assert (tmp_path / "new.txt").read_text() == "content"
+    assert (writes.written, writes.skipped) == (2, 0)
+
+
+def test_write_text_skips_identical_content(tmp_path: Path):
+    """Writing the same text doesn't touch the file, and different text is written."""
+    path = make_old_file(tmp_path / "data.txt", "line 1\nline 2\n")
+
+    with track_writes() as writes:
+        assert write_text_if_changed(path, "line 1\nline 2\n") is False
+        assert path.stat().st_mtime_ns == OLD_MTIME_NS
+        assert write_text_if_changed(path, "line 1\nline 3\n") is True
+
+    assert path.read_text() == "line 1\nline 3\n"
+    assert str(writes) == "Wrote 1 files. Skipped 1 unchanged files."
+
+
+def test_nested_blocks_share_the_counts(tmp_path: Path):
+    """An inner block adds to the outer block's counts."""
+    with track_writes() as outer_writes:
+        with track_writes() as inner_writes:
+            write_text_if_changed(tmp_path / "data.txt", "data")
+        assert inner_writes is outer_writes
+
+    assert outer_writes.written == 1
+
+
+def test_copies_use_reflinks_only_when_enabled(tmp_path: Path, mocker):
+    """Files are cloned inside a reflink_copies block, and copied otherwise."""
+    clone_file = mocker.patch.object(file_writes, "clone_file", return_value=False)
+    origin = tmp_path / "origin.bin"
+    origin.write_bytes(b"\x00\x01" * 1024)
+    origin.chmod(0o755)
+
+    file_writes.copy_file(origin, tmp_path / "copy.bin")
+    clone_file.assert_not_called()
+
+    with file_writes.reflink_copies():
+        file_writes.copy_file(origin, tmp_path / "fallback.bin")
+        with file_writes.reflink_copies(False):
+            assert not file_writes.reflinks_enabled()
+        assert file_writes.reflinks_enabled()
+    assert not file_writes.reflinks_enabled()
+
+    clone_file.assert_called_once_with(origin, tmp_path / "fallback.bin")
+    for name in ("copy.bin", "fallback.bin"):
+        assert (tmp_path / name).read_bytes() == origin.read_bytes()
+        assert (tmp_path / name).stat().st_mode & 0o777 == 0o755
+
+
+def test_cloned_files_are_not_copied_again(tmp_path: Path, mocker):
+    """A successful clone isn't followed by a regular copy."""
+    mocker.patch.object(file_writes, "clone_file", return_value=True)
+    copyfile = mocker.patch.object(file_writes.shutil, "copyfile")
+    origin = tmp_path / "origin.bin"
+    origin.write_bytes(b"data")
+    (tmp_path / "clone.bin").write_bytes(b"data")
+
+    with file_writes.reflink_copies():
+        file_writes.copy_file(origin, tmp_path / "clone.bin")
+
+    copyfile.assert_not_called()
+
+
+def test_clone_file_falls_back_when_unsupported(tmp_path: Path, mocker):
+    """An error from the clone system call means clones are unsupported."""
+    mocker.patch.object(file_writes, "_ficlone", side_effect=OSError(95, "Operation not supported"))
+    mocker.patch.object(file_writes, "_clonefile", side_effect=OSError(45, "Operation not supported"))
+    origin = tmp_path / "origin.bin"
+    origin.write_bytes(b"data")
+
+    assert file_writes.clone_file(origin, tmp_path / "clone.bin") is False
@@ -110,3 +110,121 @@ def test_temp_git_worktree_dir(
         assert wtree_dir == dest_path
         r = git_commands.get_repo(wtree_dir)
         assert r.head.commit.hexsha == default_origin.commit(expected_ref).hexsha
+
+
+def test_temp_git_worktree_dir_of_detached_head(default_repo: Repo, tmp_path: Path):
+    """A repo with a detached HEAD uses its current commit for the checkout branch."""
+    default_repo.git.checkout("--detach", "v1.0.0")
+
+    with git_commands.temp_git_worktree_dir(
+        Path(default_repo.working_dir), tmp_path / "dest", branch="remote-branch"
+    ) as wtree_dir:
+        assert git_commands.get_repo(wtree_dir).head.commit == default_repo.commit("v1.0.0")
+
+
+def test_detached_worktree_reuses_and_moves_the_worktree(default_origin: Repo, tmp_path: Path):
+    """An existing worktree is checked out at the new commit, and other directories are replaced."""
+    mirror = git_commands.clone_mirror(default_origin.working_dir, tmp_path / "mirror.git")
+    worktree_path = tmp_path / "worktree"
+    worktree_path.mkdir()
+    worktree_path.joinpath("stale.txt").write_text("stale")
+
+    worktree = git_commands.detached_worktree(mirror, worktree_path, mirror.commit("v1.0.0").hexsha)
+    assert not worktree_path.joinpath("stale.txt").exists()
+    assert worktree.head.is_detached
+
+    worktree = git_commands.detached_worktree(mirror, worktree_path, mirror.commit("remote-branch").hexsha)
+    assert worktree.head.commit == mirror.commit("remote-branch")
+    assert git_commands.resolve_commit(mirror, "missing-branch") is None
+
+
+@pytest.mark.parametrize(
+    ["checkout", "commit", "expected_ref"],
+    [
+        param(None, None, "master", id="default"),
+        param("remote-branch", None, "remote-branch", id="checkout branch"),
+        param(None, "HEAD~1", "HEAD~1", id="checkout commit"),
+    ],
+)
+def test_temp_git_tree_dir(
+    default_origin: Repo, tmp_path: Path, checkout: Optional[str], commit: Optional[str], expected_ref: str
+):
+    """Should export the files of the appropriate ref without adding a worktree."""
+    dest_path = tmp_path / "dest"
+    expected_tree = default_origin.commit(expected_ref).tree
+
+    with git_commands.temp_git_tree_dir(
+        Path(default_origin.working_dir), dest_path, branch=checkout, commit=commit
+    ) as tree_dir:
+        assert tree_dir == dest_path
+        assert sorted(path.name for path in tree_dir.iterdir()) == sorted(blob.name for blob in expected_tree.blobs)
+        assert tree_dir.joinpath("README.md").read_bytes() == (expected_tree / "README.md").data_stream.read()
+
+    assert not dest_path.exists()
+    assert len(default_origin.git.worktree("list").splitlines()) == 1
+
+
+def test_export_tree_writes_only_the_directory(tmp_path: Path):
+    """Only the directory is exported, keeping executable bits and symbolic links."""
+    repo = Repo.init(tmp_path / "repo")
+    template_dir = tmp_path / "repo" / "template" / "hooks"
+    template_dir.mkdir(parents=True)
+    template_dir.joinpath("post_gen_project.sh").write_text("#!/bin/sh\n")
+    template_dir.joinpath("post_gen_project.sh").chmod(0o755)
+    template_dir.joinpath("link.sh").symlink_to("post_gen_project.sh")
+    tmp_path.joinpath("repo", "README.md").write_text("Read me")
+    repo.git.add(".")
+    repo.index.commit("Add a template")
+
+    output_dir = git_commands.export_tree(repo, "HEAD", tmp_path / "output", "template")
+
+    assert not output_dir.joinpath("README.md").exists()
+    hook = output_dir / "template" / "hooks" / "post_gen_project.sh"
+    assert hook.read_text() == "#!/bin/sh\n"
+    assert hook.stat().st_mode & 0o777 == 0o755
+    assert output_dir.joinpath("template", "hooks", "link.sh").readlink() == Path("post_gen_project.sh")
+    with pytest.raises(GitError):
+        git_commands.export_tree(repo, "HEAD", tmp_path / "output", "missing")
+
+
+def test_export_tree_applies_the_gitattributes(tmp_path: Path):
+    """The files are converted like a checkout, with the attributes of the exported commit."""
+    repo = Repo.init(tmp_path / "repo")
+    template_dir = tmp_path / "repo" / "template"
+    template_dir.mkdir()
+    tmp_path.joinpath("repo", ".gitattributes").write_text("* text eol=crlf\n*.py ident\n")
+    template_dir.joinpath("lines.txt").write_bytes(b"a\nb\n")
+    template_dir.joinpath("version.py").write_bytes(b"# $Id$\n")
+    repo.git.add(".")
+    repo.index.commit("Add a template")
+    blob_sha = repo.git.rev_parse("HEAD:template/version.py")
+    tmp_path.joinpath("repo", ".gitattributes").unlink()
+
+    output_dir = git_commands.export_tree(repo, "HEAD", tmp_path / "output", "template")
+
+    assert not output_dir.joinpath(".gitattributes").exists()
+    assert output_dir.joinpath("template", "lines.txt").read_bytes() == b"a\r\nb\r\n"
+    assert output_dir.joinpath("template", "version.py").read_bytes() == f"# $Id: {blob_sha} $\r\n".encode()
+
+
+def test_sparse_patterns_of_nested_directories():
+    """Parent directories only include their files, and the paths can be read back."""
+    patterns = git_commands.get_sparse_patterns(["a/b/", "a/b/c", "one"])
+
+    assert patterns == "/*\n!/*/\n/a/\n!/a/*/\n/a/b/\n/one/\n"
+
+
+def test_sparse_worktree_adds_and_removes_paths(default_origin: Repo, tmp_path: Path):
+    """Sparse paths are added to an existing sparse worktree, and a full checkout removes the restriction."""
+    mirror = git_commands.clone_mirror(default_origin.working_dir, tmp_path / "mirror.git")
+    commit = mirror.commit("remote-branch").hexsha
+    worktree = git_commands.detached_worktree(mirror, tmp_path / "worktree", commit, ["docs"])
+    assert git_commands.get_sparse_paths(worktree) == ["docs"]
+
+    worktree = git_commands.detached_worktree(mirror, tmp_path / "worktree", commit, ["src/app"])
+    assert git_commands.get_sparse_paths(worktree) == ["docs", "src/app"]
+    assert sorted(path.name for path in tmp_path.joinpath("worktree").iterdir()) == [".git", "README.md", "newfile.md"]
+
+    worktree = git_commands.detached_worktree(mirror, tmp_path / "worktree", commit)
+    assert git_commands.get_sparse_paths(worktree) is None
+    assert not worktree.is_dirty()
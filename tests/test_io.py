@@ -75,3 +75,13 @@ def test_serialize_rendered_layer(rendered_layer_info: Tuple[dict, RenderedLayer
     layer_info = rendered_layer_info[0]
     rendered_layer = rendered_layer_info[1]
     assert io.serialize_rendered_layer(rendered_layer) == layer_info
+
+
+def test_clone_options_are_kept_when_serializing(fixtures_path: Path):
+    """A layer's clone options are read from and written to the composition, and are omitted if not set."""
+    layer_info = {"template": str(fixtures_path / "template1"), "clone": {"depth": 1}}
+
+    layer = io.deserialize_layer(layer_info, fixtures_path)
+
+    assert io.serialize_layer(layer)["clone"] == {"depth": 1, "filter": None, "sparse": False}
+    assert "clone" not in io.serialize_layer(io.deserialize_layer({"template": layer_info["template"]}))
@@ -10,9 +10,9 @@ import pytest
 from pytest import param
 from cookiecutter.config import get_user_config
 
-from cookie_composer import layers
+from cookie_composer import layers, merge_files
 from cookie_composer.layers import LayerConfig, RenderedLayer
-from cookie_composer.data_merge import Context, comprehensive_merge, DO_NOT_MERGE, OVERWRITE
+from cookie_composer.data_merge import Context, comprehensive_merge, COMPREHENSIVE, DO_NOT_MERGE, OVERWRITE
 from cookie_composer.templates.source import get_template_repo
 from cookie_composer.templates.types import Template
 
@@ -179,6 +179,183 @@ def test_merge_layers(tmp_path: Path, fixtures_path: Path, template_one: Templat
     assert requirements_content == "bar>=5.0.0\nbaz\nfoo\n"
 
 
+def _write_overlay_layers(tmp_path: Path, template: Template) -> list:
+    """Create three rendered layers that overwrite one file and merge another."""
+    rendered_layers = []
+    for index, key in enumerate(["a", "b", "c"], start=1):
+        location = tmp_path / f"layer{index}"
+        project = location / "project"
+        project.mkdir(parents=True)
+        (project / "README.md").write_text(f"layer {index}\n")
+        (project / "data.json").write_text(json.dumps({key: index, "list": [index]}))
+        layer_config = LayerConfig(
+            template=template, skip_if_file_exists=False, merge_strategies={"*.json": COMPREHENSIVE}
+        )
+        rendered_layers.append(
+            RenderedLayer(layer=layer_config, location=location, rendered_context={}, rendered_name="project")
+        )
+    return rendered_layers
+
+
+def test_plan_layer_merges(tmp_path: Path, template_one: Template):
+    """Only the last write of a path and the merges after it are planned."""
+    rendered_layers = _write_overlay_layers(tmp_path, template_one)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    plan = layers.plan_layer_merges(destination, rendered_layers)
+
+    assert plan.directories == [destination / "project"]
+    assert plan.files[destination / "project" / "README.md"] == [
+        layers.MergeOperation(tmp_path / "layer3" / "project" / "README.md", layers.WriteStrategy.WRITE)
+    ]
+    assert plan.files[destination / "project" / "data.json"] == [
+        layers.MergeOperation(tmp_path / "layer1" / "project" / "data.json", layers.WriteStrategy.WRITE),
+        layers.MergeOperation(
+            tmp_path / "layer2" / "project" / "data.json", layers.WriteStrategy.MERGE, COMPREHENSIVE
+        ),
+        layers.MergeOperation(
+            tmp_path / "layer3" / "project" / "data.json", layers.WriteStrategy.MERGE, COMPREHENSIVE
+        ),
+    ]
+
+
+def test_merge_rendered_layers(tmp_path: Path, template_one: Template, mocker):
+    """Merging all the layers at once matches merging them one at a time, writing each file once."""
+    from cookie_composer.merge_files import json_file
+
+    rendered_layers = _write_overlay_layers(tmp_path, template_one)
+    per_layer_dir = tmp_path / "per-layer"
+    per_layer_dir.mkdir()
+    for rendered_layer in rendered_layers:
+        layers.merge_layers(per_layer_dir, rendered_layer)
+
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    copy_spy = mocker.spy(layers, "copy_if_changed")
+    write_spy = mocker.spy(json_file, "write_json")
+
+    layers.merge_rendered_layers(destination, rendered_layers)
+
+    assert copy_spy.call_count == 1
+    assert write_spy.call_count == 1
+    per_layer_files = {p.relative_to(per_layer_dir): p.read_text() for p in per_layer_dir.rglob("*.*")}
+    merged_files = {p.relative_to(destination): p.read_text() for p in destination.rglob("*.*")}
+    assert merged_files == per_layer_files
+    assert json.loads((destination / "project" / "data.json").read_text()) == {
+        "a": 1,
+        "b": 2,
+        "c": 3,
+        "list": [1, 2, 3],
+    }
+
+
+def _write_env_layers(tmp_path: Path, template: Template) -> list:
+    """Write two rendered layers: the first writes `prod.env`, and the second merges into it."""
+    rendered_layers = []
+    for index, content in enumerate(("A=1\n", "B=2\n"), start=1):
+        location = tmp_path / f"layer{index}"
+        (location / "project").mkdir(parents=True)
+        (location / "project" / "prod.env").write_text(content)
+        layer_config = LayerConfig(
+            template=template, skip_if_file_exists=False, merge_strategies={"*.env": COMPREHENSIVE}
+        )
+        rendered_layers.append(
+            RenderedLayer(layer=layer_config, location=location, rendered_context={}, rendered_name="project")
+        )
+    return rendered_layers
+
+
+def test_merge_functions_without_the_document_cache_read_the_written_file(
+    tmp_path: Path, template_one: Template, monkeypatch
+):
+    """A merge function that reads the destination itself finds the file written by the previous layer."""
+
+    def merge_env_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
+        existing_file.write_text(existing_file.read_text() + new_file.read_text())
+
+    registry = merge_files.MergeFunctionRegistry({}, entry_point_group=None)
+    registry.register(".env", merge_env_files)
+    monkeypatch.setattr(layers, "MERGE_FUNCTIONS", registry)
+    monkeypatch.setattr(merge_files, "MERGE_FUNCTIONS", registry)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    layers.merge_rendered_layers(destination, _write_env_layers(tmp_path, template_one))
+
+    assert (destination / "project" / "prod.env").read_text() == "A=1\nB=2\n"
+
+
+def test_a_failed_merge_keeps_the_written_file(tmp_path: Path, template_one: Template, monkeypatch):
+    """If the first merge into a file fails, the file written by the previous layer is still copied."""
+    from cookie_composer.exceptions import MergeError
+
+    def merge_env_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
+        raise MergeError(str(new_file), str(existing_file), merge_strategy, "Can't merge")
+
+    registry = merge_files.MergeFunctionRegistry({}, entry_point_group=None)
+    registry.register(".env", merge_env_files, uses_document_cache=True)
+    monkeypatch.setattr(layers, "MERGE_FUNCTIONS", registry)
+    monkeypatch.setattr(merge_files, "MERGE_FUNCTIONS", registry)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    with pytest.raises(MergeError):
+        layers.merge_rendered_layers(destination, _write_env_layers(tmp_path, template_one))
+
+    assert (destination / "project" / "prod.env").read_text() == "A=1\n"
+
+
+def test_writing_a_layer_file_invalidates_the_cached_document(tmp_path: Path, template_one: Template):
+    """A layer that overwrites a merged file replaces the document in the cache."""
+    destination = tmp_path / "destination"
+    (destination / "project").mkdir(parents=True)
+    (destination / "project" / "data.json").write_text(json.dumps({"a": 1}))
+
+    def rendered_layer(name: str, data: dict, merge_strategy: str) -> RenderedLayer:
+        location = tmp_path / name
+        (location / "project").mkdir(parents=True)
+        (location / "project" / "data.json").write_text(json.dumps(data))
+        layer_config = LayerConfig(
+            template=template_one, skip_if_file_exists=False, merge_strategies={"*.json": merge_strategy}
+        )
+        return RenderedLayer(layer=layer_config, location=location, rendered_context={}, rendered_name="project")
+
+    from cookie_composer.merge_files.document_cache import cached_documents
+
+    with cached_documents() as document_cache:
+        layers.merge_layers(destination, rendered_layer("merged", {"b": 2}, COMPREHENSIVE))
+        assert destination / "project" / "data.json" in document_cache
+        layers.merge_layers(destination, rendered_layer("written", {"c": 3}, "do-not-merge"))
+        assert destination / "project" / "data.json" not in document_cache
+
+    assert json.loads((destination / "project" / "data.json").read_text()) == {"c": 3}
+
+
+def test_merging_into_a_written_toml_file_keeps_its_comments(tmp_path: Path, template_one: Template):
+    """A TOML file written by a layer and merged by a later layer keeps its layout and comments."""
+    pyproject = '# top comment\n[project]\nname = "demo"  # keep me\n'
+    rendered_layers = []
+    for name, content in (("layer1", pyproject), ("layer2", '[project]\nversion = "1.0"\n')):
+        location = tmp_path / name
+        (location / "project").mkdir(parents=True)
+        (location / "project" / "pyproject.toml").write_text(content)
+        layer_config = LayerConfig(
+            template=template_one, skip_if_file_exists=False, merge_strategies={"*.toml": COMPREHENSIVE}
+        )
+        rendered_layers.append(
+            RenderedLayer(layer=layer_config, location=location, rendered_context={}, rendered_name="project")
+        )
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    layers.merge_rendered_layers(destination, rendered_layers)
+
+    assert (destination / "project" / "pyproject.toml").read_text() == (
+        '# top comment\n[project]\nname = "demo"  # keep me\nversion = "1.0"\n'
+    )
+
+
 def test_render_layers(fixtures_path: Path, tmp_path: Path, template_one: Template, template_two: Template):
     """Render layers generates a list of rendered layer objects."""
     tmpl_layers = [
@@ -196,6 +373,73 @@ def test_render_layers(fixtures_path: Path, tmp_path: Path, template_one: Templa
     assert rendered_items == {"ABOUT.md", "README.md", "requirements.txt", "demo.jinja", "doc.rst"}
 
 
+def test_render_layers_writes_overwritten_files_once(
+    tmp_path: Path, template_one: Template, template_two: Template, mocker
+):
+    """Files that a later layer overwrites are only written from the last layer."""
+    copy_spy = mocker.spy(layers, "copy_if_changed")
+    tmpl_layers = [
+        LayerConfig(template=template_one),
+        LayerConfig(template=template_two),
+    ]
+
+    rendered_layers = layers.render_layers(tmpl_layers, tmp_path, None, no_input=True)
+
+    destinations = [call.args[1] for call in copy_spy.call_args_list]
+    requirements_path = tmp_path / rendered_layers[0].rendered_name / "requirements.txt"
+    assert len(destinations) == len(set(destinations)) == 5
+    assert requirements_path in destinations
+    assert [x.location for x in rendered_layers] == [tmp_path, tmp_path]
+
+
+def test_render_layers_in_memory(tmp_path: Path, template_one: Template, template_two: Template, monkeypatch):
+    """Rendering layers in memory generates the same files."""
+    from cookie_composer import utils
+
+    memory_dir = tmp_path / "shm"
+    memory_dir.mkdir()
+    monkeypatch.setattr(utils, "MEMORY_BACKED_DIRS", [memory_dir])
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    tmpl_layers = [
+        LayerConfig(template=template_one),
+        LayerConfig(template=template_two),
+    ]
+
+    rendered_layers = layers.render_layers(tmpl_layers, destination, None, no_input=True, in_memory=True)
+    rendered_project = destination / rendered_layers[0].rendered_name
+    rendered_items = {item.name for item in os.scandir(rendered_project)}
+
+    assert rendered_items == {"ABOUT.md", "README.md", "requirements.txt", "demo.jinja", "doc.rst"}
+    assert list(memory_dir.iterdir()) == []
+
+
+def test_render_layers_parallel(tmp_path: Path, template_one: Template, template_two: Template):
+    """Rendering layers in parallel renders the same files and contexts as rendering them sequentially."""
+    sequential_dir = tmp_path / "sequential"
+    sequential_dir.mkdir()
+    parallel_dir = tmp_path / "parallel"
+    parallel_dir.mkdir()
+
+    sequential_layers = layers.render_layers(
+        [LayerConfig(template=template_one), LayerConfig(template=template_two)], sequential_dir, no_input=True
+    )
+    parallel_layers = layers.render_layers(
+        [LayerConfig(template=template_one), LayerConfig(template=template_two)],
+        parallel_dir,
+        no_input=True,
+        parallel=True,
+        max_workers=2,
+    )
+
+    assert [x.rendered_context for x in parallel_layers] == [x.rendered_context for x in sequential_layers]
+    assert [x.layer.initial_context for x in parallel_layers] == [x.layer.initial_context for x in sequential_layers]
+    assert [x.location for x in parallel_layers] == [parallel_dir, parallel_dir]
+    sequential_files = {p.relative_to(sequential_dir): p.read_bytes() for p in sequential_dir.rglob("*.*")}
+    parallel_files = {p.relative_to(parallel_dir): p.read_bytes() for p in parallel_dir.rglob("*.*")}
+    assert parallel_files == sequential_files
+
+
 def test_render_layer_git_template(fixtures_path: Path, tmp_path: Path):
     """Render layer of a git-based template includes the latest_commit."""
     from git import Actor, Repo
@@ -443,3 +687,21 @@ def test_get_accept_hooks_per_layer(value: str, num_layers: int, expected: list)
 def test_get_template_rendered_name(template_one: Template):
     context = Context({"cookiecutter": {"repo_name": "fake-project-template"}})
     assert layers.get_template_rendered_name(template_one, context) == "fake-project-template"
+
+
+def test_merging_the_same_layers_again_skips_every_write(tmp_path: Path, template_one: Template):
+    """Merging layers into a destination that already has their output doesn't rewrite any file."""
+    from cookie_composer.file_writes import track_writes
+
+    rendered_layers = _write_overlay_layers(tmp_path, template_one)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    layers.merge_rendered_layers(destination, rendered_layers)
+    mtimes = {p: p.stat().st_mtime_ns for p in destination.rglob("*") if p.is_file()}
+
+    with track_writes() as writes:
+        layers.merge_rendered_layers(destination, rendered_layers)
+
+    assert writes.written == 0
+    assert writes.skipped == len(mtimes)
+    assert {p: p.stat().st_mtime_ns for p in destination.rglob("*") if p.is_file()} == mtimes
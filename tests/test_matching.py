@@ -0,0 +1,58 @@
+"""Tests for the matching module."""
+
+from fnmatch import fnmatch
+
+import pytest
+from pytest import param
+
+from cookie_composer.matching import GlobMatcher, compile_globs, matches_any_glob, rel_fnmatch
+
+PATHS = [
+    "/home/user/project/README.md",
+    "/home/user/project/docs/index.md",
+    "/home/user/project/pyproject.toml",
+    "/home/user/project/.github/workflows/test.yaml",
+    "/home/user/project/src/[weird]/file*.py",
+    "project/setup.cfg",
+    "README.rst",
+]
+
+PATTERNS = [
+    param(["README.md"], id="plain-name"),
+    param(["*.md"], id="leading-star"),
+    param(["docs/*"], id="directory"),
+    param([".github/*", "*.yaml"], id="multiple"),
+    param(["*.[ct][of][gm]*"], id="character-classes"),
+    param(["*", "*.md"], id="catch-all-first"),
+    param(["project/*.toml", "*/*.cfg", "*.md"], id="mixed"),
+    param(["*a*b*c*", "*e*a*d*"], id="many-stars"),
+    param([], id="empty"),
+]
+
+
+@pytest.mark.parametrize("patterns", PATTERNS)
+@pytest.mark.parametrize("path", PATHS)
+def test_matches_any_glob_same_as_fnmatch(path: str, patterns: list):
+    """The compiled matcher makes the same decision as matching each pattern."""
+    expected = any(rel_fnmatch(path, pattern) for pattern in patterns)
+    assert matches_any_glob(path, patterns) is expected
+
+
+@pytest.mark.parametrize("patterns", PATTERNS)
+@pytest.mark.parametrize("path", PATHS)
+def test_first_match_is_first_matching_pattern(path: str, patterns: list):
+    """The first match is the index of the first pattern that matches."""
+    expected = next((index for index, pattern in enumerate(patterns) if rel_fnmatch(path, pattern)), None)
+    assert GlobMatcher(tuple(patterns)).first_match(path) == expected
+
+
+def test_rel_fnmatch_prefixes_star():
+    """Patterns are matched relative to the end of the path."""
+    assert rel_fnmatch("/path/to/README.md", "README.md")
+    assert not fnmatch("/path/to/README.md", "README.md")
+
+
+def test_compile_globs_is_cached():
+    """The same patterns return the same compiled matcher."""
+    assert compile_globs(("*.md", "*.txt")) is compile_globs(("*.md", "*.txt"))
+    assert compile_globs(("*.md", "*.txt")) is not compile_globs(("*.txt", "*.md"))
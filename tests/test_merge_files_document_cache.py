@@ -0,0 +1,51 @@
+"""Test the parsed-document cache used while merging files."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from cookie_composer.data_merge import COMPREHENSIVE
+from cookie_composer.merge_files import toml_file
+from cookie_composer.merge_files.document_cache import cached_documents, get_active_cache
+
+
+def test_merges_are_written_when_the_cache_is_flushed(tmp_path: Path, fixtures_path: Path, mocker):
+    """Several merges into one file parse it once and write it once."""
+    existing_file = tmp_path / "existing.toml"
+    shutil.copy(fixtures_path / "existing.toml", existing_file)
+    read_spy = mocker.spy(toml_file, "read_toml")
+    write_spy = mocker.spy(toml_file, "write_toml")
+    original_content = existing_file.read_text()
+
+    with cached_documents():
+        toml_file.merge_toml_files(fixtures_path / "new.toml", existing_file, COMPREHENSIVE)
+        toml_file.merge_toml_files(fixtures_path / "new.toml", existing_file, COMPREHENSIVE)
+        assert existing_file.read_text() == original_content
+
+    assert read_spy.call_count == 1
+    assert write_spy.call_count == 1
+    assert existing_file.read_text() != original_content
+    assert get_active_cache() is None
+
+
+def test_nested_blocks_share_the_cache():
+    """An inner block reuses the outer cache, which is flushed by the outer block."""
+    with cached_documents() as outer_cache:
+        with cached_documents() as inner_cache:
+            assert inner_cache is outer_cache
+        assert get_active_cache() is outer_cache
+
+
+def test_merges_are_written_when_the_block_raises(tmp_path: Path, fixtures_path: Path):
+    """The merges done before an error are written, like the files already copied to the destination."""
+    existing_file = tmp_path / "existing.toml"
+    shutil.copy(fixtures_path / "existing.toml", existing_file)
+    original_content = existing_file.read_text()
+
+    with pytest.raises(RuntimeError), cached_documents():
+        toml_file.merge_toml_files(fixtures_path / "new.toml", existing_file, COMPREHENSIVE)
+        raise RuntimeError("A later layer failed")
+
+    assert existing_file.read_text() != original_content
+    assert get_active_cache() is None
@@ -1,7 +1,9 @@
 """Test the merge_files.helpers functions."""
 
+import copy
 from collections import OrderedDict
-from typing import Any
+from functools import reduce
+from typing import Any, Callable
 
 import pytest
 from immutabledict import immutabledict
@@ -122,3 +124,276 @@ def test_context_flatten():
         "lower_project_name": "fake project template2",
     }
     assert context.flatten() == expected
+
+
+@pytest.mark.parametrize(
+    ["maps"],
+    [
+        param([{"a": 1, "b": {"c": [1]}}, {"a": 2, "b": {"c": [2], "d": 3}}, {"e": 4}], id="uniform kinds"),
+        param([{"a": [1]}, {"a": "scalar"}, {"a": [2]}], id="scalar replaces a list"),
+        param([{"a": {"b": 1}}, {"a": 1}, {"a": {"c": 2}}], id="scalar replaces a dict"),
+        param([OrderedDict({"a": 1}), {"b": 2}, OrderedDict({"c": 3})], id="ordered dicts"),
+    ],
+)
+def test_context_flatten_children_match_full_merge(maps: list):
+    """Flattening a chain of children is the same as merging all the maps."""
+    context = data_merge.Context(maps[-1])
+    for context_map in reversed(maps[:-1]):
+        context = context.new_child(context_map)
+
+    assert context.flatten() == reduce(data_merge.comprehensive_merge, context.maps, {})
+
+
+def test_context_flatten_merges_only_the_new_map(mocker):
+    """A child only merges its own map into the flattened parent."""
+    context = data_merge.Context({"a": 1})
+    context.flatten()
+    merge_spy = mocker.spy(data_merge, "comprehensive_merge")
+
+    child = context.new_child({"b": 2})
+    assert child.flatten() == {"a": 1, "b": 2}
+    assert child.flatten() == {"a": 1, "b": 2}
+
+    assert merge_spy.call_count == 1
+
+
+def test_context_flatten_is_invalidated_by_changes():
+    """Changes to the context or its parents update the flattened view."""
+    context = data_merge.Context({"a": 1})
+    child = context.new_child({"b": 2})
+    assert child.flatten() == {"a": 1, "b": 2}
+
+    context["a"] = 10
+    assert child.flatten() == {"a": 10, "b": 2}
+
+    child["c"] = 3
+    assert child.flatten() == {"a": 10, "b": 2, "c": 3}
+
+    child.pop("c")
+    del context["a"]
+    assert child.flatten() == {"b": 2}
+
+
+def test_context_flatten_is_invalidated_by_replacing_a_map():
+    """Replacing one of the maps, in the context or its parent, updates the flattened view."""
+    context = data_merge.Context({"a": 1, "nested": {"b": [1]}})
+    child = context.new_child({"c": 3})
+    assert child.flatten() == {"a": 1, "nested": {"b": [1]}, "c": 3}
+
+    child.maps[0] = {"c": 30}
+    assert child.flatten() == {"a": 1, "nested": {"b": [1]}, "c": 30}
+
+    child.maps[1] = {"a": 10}
+    assert child.flatten() == {"a": 10, "c": 30}
+
+    context.maps[0] = {"nested": {"b": [2]}}
+    context.update({"a": 20})
+    assert context.flatten() == {"a": 20, "nested": {"b": [2]}}
+    assert child.flatten() == {"a": 10, "c": 30}
+
+
+def test_context_flatten_returns_a_new_mapping():
+    """Changing the flattened view does not change the context."""
+    context = data_merge.Context({"a": {"b": 1}})
+    flattened = context.flatten()
+    flattened["a"] = 2
+    flattened["c"] = 3
+
+    assert context.flatten() == {"a": {"b": 1}}
+    assert context.flatten() is not context.flatten()
+
+
+def test_context_flatten_does_not_recurse():
+    """Contexts of documents deeper than the recursion limit can be flattened."""
+    context = data_merge.Context(make_deep_document(10_000, [1])).new_child(make_deep_document(10_000, [2]))
+
+    assert sorted(get_leaf(context.flatten())) == [1, 2]
+    assert sorted(get_leaf(context.flatten())) == [1, 2]
+
+
+def test_merges_do_not_modify_the_arguments():
+    """The merged values are copied along the merged paths, leaving the arguments unchanged."""
+    first = {"a": {"b": {"c": 1}, "d": [1]}, "e": {"f": 1}}
+    second = {"a": {"b": {"g": 2}, "d": [2]}, "h": {"i": 2}}
+    originals = copy.deepcopy((first, second))
+
+    deep_merged = data_merge.deep_merge(first, second)
+    comprehensively_merged = data_merge.comprehensive_merge(first, second)
+
+    assert deep_merged == {"a": {"b": {"c": 1, "g": 2}, "d": [2]}, "e": {"f": 1}, "h": {"i": 2}}
+    assert comprehensively_merged["a"]["b"] == {"c": 1, "g": 2}
+    assert sorted(comprehensively_merged["a"]["d"]) == [1, 2]
+    assert (first, second) == originals
+    assert comprehensively_merged["e"] is first["e"]
+    assert deep_merged["h"] is second["h"]
+
+
+def test_merge_iterables_keeps_first_seen_order():
+    """Items are de-duplicated, keeping the order in which they are first seen."""
+    result = data_merge.merge_iterables(["b", "a", {"c": [1]}], ["d", {"c": [1]}, "a", "e"])
+
+    assert result == ["b", "a", immutabledict({"c": (1,)}), "d", "e"]
+
+
+def test_merge_iterables_freezes_repeated_items_once(mocker):
+    """An unhashable item appearing several times is frozen once, and frozen items are not frozen again."""
+    freeze_spy = mocker.spy(data_merge, "freeze_data")
+    record = {"repo": "https://github.com/example/hooks", "hooks": [{"id": "lint"}]}
+
+    result = data_merge.merge_iterables([record, "a"], [record, "b"])
+    assert result == [immutabledict({"repo": record["repo"], "hooks": (immutabledict({"id": "lint"}),)}), "a", "b"]
+    assert [call.args[0] for call in freeze_spy.call_args_list].count(record) == 1
+    freeze_spy.reset_mock()
+
+    assert data_merge.merge_iterables(result, ["b"]) == result
+    assert freeze_spy.call_count == 0
+
+
+def test_comprehensive_merge_lists_are_deterministic():
+    """Merging lists gives the same order every time."""
+    existing = {"hooks": [{"id": "black"}, {"id": "ruff"}], "dependencies": ["a", "b", "c"]}
+    new = {"hooks": [{"id": "mypy"}, {"id": "black"}], "dependencies": ["d", "a"]}
+
+    result = data_merge.comprehensive_merge(existing, new)
+
+    assert result["hooks"] == [{"id": "black"}, {"id": "ruff"}, {"id": "mypy"}]
+    assert result["dependencies"] == ["a", "b", "c", "d"]
+
+
+@pytest.mark.parametrize(
+    ["merge_strategy", "expected"],
+    [
+        param("comprehensive", ("comprehensive", ()), id="not keyed"),
+        param("keyed-comprehensive", ("keyed-comprehensive", ("name", "id")), id="default keys"),
+        param("keyed-comprehensive:id", ("keyed-comprehensive", ("id",)), id="one key"),
+        param("keyed-comprehensive: key, name", ("keyed-comprehensive", ("key", "name")), id="several keys"),
+    ],
+)
+def test_parse_merge_strategy(merge_strategy: str, expected: tuple):
+    """The record keys are parsed from keyed strategies."""
+    assert data_merge.parse_merge_strategy(merge_strategy) == expected
+
+
+def test_comprehensive_merge_records_by_key():
+    """Records with the same identity are merged in place; other items are de-duplicated."""
+    existing = {
+        "services": [
+            {"name": "db", "image": "postgres:15", "ports": [5432]},
+            {"name": "web", "image": "app"},
+            "shared",
+        ]
+    }
+    new = {
+        "services": [
+            {"name": "cache", "image": "redis"},
+            {"name": "db", "image": "postgres:16", "ports": [5433]},
+            "shared",
+            {"image": "anonymous"},
+        ]
+    }
+
+    result = data_merge.comprehensive_merge(existing, new, record_keys=("name",))
+
+    assert result == {
+        "services": [
+            {"name": "db", "image": "postgres:16", "ports": [5432, 5433]},
+            {"name": "web", "image": "app"},
+            "shared",
+            {"name": "cache", "image": "redis"},
+            {"image": "anonymous"},
+        ]
+    }
+    assert existing["services"][0] == {"name": "db", "image": "postgres:15", "ports": [5432]}
+
+
+def test_merge_records_uses_first_record_key():
+    """A record is identified by the first record key it contains."""
+    result = data_merge.merge_records(
+        [{"id": 1, "value": "a"}, {"name": "x", "id": 2}],
+        [{"id": 2, "value": "b"}, {"name": "x", "value": "c"}],
+        ("name", "id"),
+        lambda record1, record2: {**record1, **record2},
+    )
+
+    assert result == [{"id": 1, "value": "a"}, {"name": "x", "id": 2, "value": "c"}, {"id": 2, "value": "b"}]
+
+
+def test_freeze_data_freezes_nested_objects():
+    """Nested mappings, lists, tuples and sets are frozen; named tuples keep their type."""
+    from typing import NamedTuple
+
+    class Point(NamedTuple):
+        x: int
+        y: list
+
+    document = {"a": [1, {"b": {2, 3}}], "c": OrderedDict(d=(4, [5])), "e": Point(1, [2])}
+
+    frozen = data_merge.freeze_data(document)
+
+    assert frozen == immutabledict(
+        {
+            "a": (1, immutabledict({"b": frozenset({2, 3})})),
+            "c": immutabledict({"d": (4, (5,))}),
+            "e": Point(1, (2,)),
+        }
+    )
+    assert isinstance(frozen["e"], Point)
+    hash(frozen)
+
+
+def test_freeze_data_raises_for_nested_unsupported_types():
+    """An unsupported nested object raises a ValueError."""
+    unsupported = object()
+
+    with pytest.raises(ValueError):
+        data_merge.freeze_data({"a": [1, {"b": unsupported}]})
+
+
+def make_deep_document(depth: int, leaf: Any) -> dict:
+    """Make a document nested `depth` levels deep."""
+    document: Any = leaf
+    for _ in range(depth):
+        document = {"child": document, "depth": [1]}
+    return document
+
+
+def get_leaf(document: Any) -> Any:
+    """Follow the "child" keys to the bottom of a deep document."""
+    while isinstance(document, (dict, immutabledict)):
+        document = document["child"]
+    return document
+
+
+def test_merging_deep_documents_does_not_recurse():
+    """Documents deeper than the recursion limit can be merged and frozen."""
+    depth = 10_000
+    existing = make_deep_document(depth, [1])
+    new = make_deep_document(depth, [2])
+
+    assert get_leaf(data_merge.deep_merge(existing, new)) == [2]
+    assert get_leaf(data_merge.comprehensive_merge(existing, new)) == [1, 2]
+    assert get_leaf(data_merge.freeze_data(existing)) == (1,)
+
+
+@pytest.mark.parametrize(
+    ["func", "documents", "exception"],
+    [
+        param(data_merge.deep_merge, ({"a": {"b": 1}}, {"a": 1}), TypeError, id="deep merge a dict and a scalar"),
+        param(
+            data_merge.comprehensive_merge,
+            ({"a": [1]}, {"a": [bytearray(b"x")]}),
+            ValueError,
+            id="unsupported unhashable list item",
+        ),
+        param(
+            data_merge.comprehensive_merge,
+            (make_deep_document(2000, [1]), make_deep_document(2000, [bytearray(b"x")])),
+            ValueError,
+            id="deep unsupported unhashable list item",
+        ),
+    ],
+)
+def test_merge_errors(func: Callable, documents: tuple, exception: type):
+    """Documents that can't be merged raise the documented exceptions."""
+    with pytest.raises(exception):
+        func(*documents)
@@ -0,0 +1,111 @@
+"""Test the registry of merge functions."""
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+
+from cookie_composer import merge_files
+from cookie_composer.data_merge import COMPREHENSIVE, DO_NOT_MERGE, get_merge_strategy
+from cookie_composer.merge_files import MergeFunctionRegistry
+
+
+def merge_env_files(new_file: Path, existing_file: Path, merge_strategy: str) -> None:
+    """A merge function registered by an entry point."""
+
+
+class FakeEntryPoint(NamedTuple):
+    """The parts of an entry point the registry uses."""
+
+    name: str
+    value: str
+
+    def load(self):
+        return merge_files.import_object(self.value)
+
+
+def test_merge_modules_are_imported_on_first_use():
+    """Importing the package and checking for a suffix doesn't import the merge modules."""
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from cookie_composer.merge_files import MERGE_FUNCTIONS\n"
+        "assert MERGE_FUNCTIONS.get_key(Path('data.toml')) == '.toml'\n"
+        "assert 'cookie_composer.merge_files.toml_file' not in sys.modules\n"
+        "MERGE_FUNCTIONS.get_for_path(Path('data.toml'))\n"
+        "assert 'cookie_composer.merge_files.toml_file' in sys.modules\n"
+        "assert 'cookie_composer.merge_files.json_file' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_builtin_merge_functions_are_loaded():
+    """The built-in suffixes load their merge functions."""
+    from cookie_composer.merge_files.yaml_file import merge_yaml_files
+
+    registry = MergeFunctionRegistry(merge_files.BUILTIN_MERGE_FUNCTIONS, entry_point_group=None)
+
+    assert registry[".yml"] is merge_yaml_files
+    assert set(registry) == set(merge_files.BUILTIN_MERGE_FUNCTIONS)
+    with pytest.raises(KeyError):
+        registry.get_for_path(Path("README.md"))
+
+
+def test_entry_points_are_discovered_once(mocker):
+    """Entry points add merge functions by file name or suffix, but don't replace registered ones."""
+    entry_points = [
+        FakeEntryPoint(".env", f"{__name__}:merge_env_files"),
+        FakeEntryPoint(".json", f"{__name__}:merge_env_files"),
+    ]
+    get_entry_points = mocker.patch.object(merge_files, "_get_entry_points", return_value=entry_points)
+    registry = MergeFunctionRegistry(merge_files.BUILTIN_MERGE_FUNCTIONS)
+
+    assert ".json" in registry
+    get_entry_points.assert_not_called()
+
+    assert registry.get_for_path(Path(".env")) is merge_env_files
+    assert registry.get_for_path(Path("prod.env")) is merge_env_files
+    assert registry[".json"] is not merge_env_files
+    assert registry.get_key(Path("README.md")) is None
+    get_entry_points.assert_called_once()
+
+
+def test_file_names_take_precedence_over_suffixes():
+    """A merge function registered for a file name is used instead of the one for its suffix."""
+    registry = MergeFunctionRegistry({}, entry_point_group=None)
+    registry.register(".txt", print)
+    registry.register("requirements.txt", merge_env_files)
+
+    assert registry.get_for_path(Path("requirements.txt")) is merge_env_files
+    assert registry.get_for_path(Path("notes.txt")) is print
+
+
+def test_registered_file_names_are_mergeable(mocker):
+    """The merge strategy applies to files handled by registered merge functions."""
+    registry = MergeFunctionRegistry(merge_files.BUILTIN_MERGE_FUNCTIONS, entry_point_group=None)
+    registry.register("requirements.txt", merge_env_files)
+    mocker.patch.object(merge_files, "MERGE_FUNCTIONS", registry)
+
+    assert get_merge_strategy(Path("requirements.txt"), {"*.txt": COMPREHENSIVE}) == COMPREHENSIVE
+    assert get_merge_strategy(Path("notes.txt"), {"*.txt": COMPREHENSIVE}) == DO_NOT_MERGE
+
+
+def test_registered_merge_functions_declare_the_document_cache():
+    """Built-in merge functions use the document cache, other merge functions only if they are registered so."""
+    registry = MergeFunctionRegistry(
+        merge_files.BUILTIN_MERGE_FUNCTIONS,
+        entry_point_group=None,
+        document_cache_keys=merge_files.BUILTIN_MERGE_FUNCTIONS,
+    )
+    registry.register(".env", merge_env_files)
+    registry.register("requirements.txt", merge_env_files, uses_document_cache=True)
+
+    assert registry.uses_document_cache(Path("data.json"))
+    assert not registry.uses_document_cache(Path(".env"))
+    assert registry.uses_document_cache(Path("requirements.txt"))
+    assert not registry.uses_document_cache(Path("README.md"))
+
+    registry.register(".json", merge_env_files)
+    assert not registry.uses_document_cache(Path("data.json"))
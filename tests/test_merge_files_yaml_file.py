@@ -5,7 +5,7 @@ import shutil
 import pytest
 from ruamel.yaml import YAML
 
-from cookie_composer.data_merge import DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE, COMPREHENSIVE
+from cookie_composer.data_merge import DO_NOT_MERGE, NESTED_OVERWRITE, OVERWRITE, COMPREHENSIVE, KEYED_COMPREHENSIVE
 from cookie_composer.exceptions import MergeError
 from cookie_composer.merge_files import yaml_file
 
@@ -108,3 +108,39 @@ def test_bad_strategy(tmp_path, fixtures_path):
 
     with pytest.raises(MergeError):
         yaml_file.merge_yaml_files(new_file, existing_file, "not-a-stragegy")
+
+
+def test_keyed_comprehensive_merge(tmp_path):
+    """Records with the same key are merged instead of duplicated."""
+    existing_file = tmp_path / "existing.yaml"
+    existing_file.write_text(
+        "steps:\n"
+        "  - name: checkout\n"
+        "    uses: actions/checkout@v3\n"
+        "  - name: test\n"
+        "    run: pytest\n"
+        "    env:\n"
+        "      CI: 'true'\n"
+    )
+    new_file = tmp_path / "new.yaml"
+    new_file.write_text(
+        "steps:\n"
+        "  - name: checkout\n"
+        "    uses: actions/checkout@v4\n"
+        "  - name: lint\n"
+        "    run: ruff .\n"
+        "  - name: test\n"
+        "    env:\n"
+        "      COVERAGE: 'true'\n"
+    )
+
+    yaml_file.merge_yaml_files(new_file, existing_file, f"{KEYED_COMPREHENSIVE}:name")
+
+    rendered = yaml.load(existing_file)
+    assert rendered == {
+        "steps": [
+            {"name": "checkout", "uses": "actions/checkout@v4"},
+            {"name": "test", "run": "pytest", "env": {"CI": "true", "COVERAGE": "true"}},
+            {"name": "lint", "run": "ruff ."},
+        ]
+    }
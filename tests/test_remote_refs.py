@@ -0,0 +1,92 @@
+"""Tests for resolving the refs of remotes."""
+
+from pathlib import Path
+
+import pytest
+from cookiecutter.config import DEFAULT_CONFIG
+from git import Repo
+
+from cookie_composer import remote_refs
+from cookie_composer.git_commands import resolve_commit
+from cookie_composer.templates.git_repo import template_repo_from_git
+from cookie_composer.templates.types import Locality
+
+
+@pytest.fixture
+def origin_clone(default_origin: Repo, tmp_path: Path) -> Repo:
+    """A clone of the default origin, to push new commits and tags with."""
+    clone = default_origin.clone(tmp_path / "clone")
+    with clone.config_writer() as config:
+        config.set_value("user", "name", "Bob")
+        config.set_value("user", "email", "bob@example.com")
+    clone.create_tag("v2.0.0", ref="origin/remote-branch", message="An annotated tag")
+    clone.remotes.origin.push("v2.0.0")
+    return clone
+
+
+def push_commit(clone: Repo) -> str:
+    """Push a new commit to the master branch of the origin."""
+    clone.git.checkout("master")
+    clone.index.commit("A new commit")
+    clone.remotes.origin.push("master")
+    return clone.head.commit.hexsha
+
+
+def test_ls_remote_resolves_branches_and_tags(default_origin: Repo, origin_clone: Repo):
+    """Branches, annotated tags and HEAD are resolved to commits."""
+    assert remote_refs.ls_remote(origin_clone, "HEAD") == default_origin.commit("master").hexsha
+    assert remote_refs.ls_remote(origin_clone, "remote-branch") == default_origin.commit("remote-branch").hexsha
+    assert remote_refs.ls_remote(origin_clone, "v2.0.0") == default_origin.commit("remote-branch").hexsha
+    assert remote_refs.ls_remote(origin_clone, "missing") is None
+
+
+def test_parse_ls_remote():
+    """Each line is split into the commit hash and the ref name, which may contain spaces."""
+    output = f"{'a' * 40}\tHEAD\n{'b' * 40}\trefs/tags/v1.0.0^{{}}\n{'c' * 40}\trefs/heads/a branch"
+
+    assert remote_refs.parse_ls_remote(output) == [
+        ("a" * 40, "HEAD"),
+        ("b" * 40, "refs/tags/v1.0.0^{}"),
+        ("c" * 40, "refs/heads/a branch"),
+    ]
+    assert remote_refs.parse_ls_remote("") == []
+
+
+def test_latest_sha_queries_the_remote_once_without_fetching(default_origin: Repo, origin_clone: Repo, tmp_path):
+    """The latest commit is listed, not fetched, and remembered for the rest of the process."""
+    template_repo = template_repo_from_git(default_origin.working_dir, Locality.REMOTE, tmp_path / "cache")
+    cached_repo = Repo(template_repo.cached_source)
+    new_commit = push_commit(origin_clone)
+
+    assert template_repo.latest_sha == new_commit
+    assert resolve_commit(cached_repo, new_commit) is None
+
+    push_commit(origin_clone)
+    assert template_repo.latest_sha == new_commit
+
+    remote_refs.clear_resolved_refs()
+    assert template_repo.latest_sha == origin_clone.head.commit.hexsha
+
+
+def test_pinned_commits_are_their_own_latest_sha(default_origin: Repo, origin_clone: Repo):
+    """A commit hash that isn't the name of a ref resolves to itself."""
+    commit = default_origin.commit("v1.0.0").hexsha
+
+    assert remote_refs.get_latest_sha(origin_clone, commit) == commit
+    assert remote_refs.get_latest_sha(origin_clone, commit[:10]) == commit
+
+
+def test_resolved_refs_are_cached_on_disk_with_a_ttl(origin_clone: Repo, monkeypatch, mocker):
+    """With a TTL, other processes reuse the resolved refs until they expire."""
+    monkeypatch.setitem(DEFAULT_CONFIG, "cookie_composer", {"remote_refs_ttl": 60})
+    ls_remote = mocker.spy(remote_refs, "ls_remote")
+    commit = remote_refs.get_latest_sha(origin_clone)
+
+    remote_refs.clear_resolved_refs()
+    assert remote_refs.get_latest_sha(origin_clone) == commit
+    assert ls_remote.call_count == 1
+
+    mocker.patch.object(remote_refs.time, "time", return_value=remote_refs.time.time() + 61)
+    remote_refs.clear_resolved_refs()
+    assert remote_refs.get_latest_sha(origin_clone) == commit
+    assert ls_remote.call_count == 2
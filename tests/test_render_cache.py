@@ -0,0 +1,88 @@
+"""Tests for the render_cache module."""
+
+import os
+from pathlib import Path
+from shutil import copytree
+
+from git import Actor, Repo
+
+from cookie_composer import layers
+from cookie_composer.layers import LayerConfig
+from cookie_composer.render_cache import RenderCache, get_render_cache, get_render_cache_key
+from cookie_composer.templates.source import get_template_repo
+from cookie_composer.templates.types import Template
+
+
+def make_tree(path: Path, contents: str = "content") -> Path:
+    """Create a small rendered tree."""
+    path.joinpath("subdir").mkdir(parents=True)
+    path.joinpath("README.md").write_text(contents)
+    path.joinpath("subdir", "file.txt").write_text(contents)
+    return path
+
+
+def test_render_cache_key_is_stable():
+    """The same inputs make the same key, regardless of context ordering."""
+    key1 = get_render_cache_key("abc123", "", {"a": 1, "b": [1, 2]}, False)
+    key2 = get_render_cache_key("abc123", "", {"b": [1, 2], "a": 1}, False)
+    assert key1 == key2
+
+
+def test_render_cache_key_changes_with_inputs():
+    """Changing any of the inputs changes the key."""
+    base = get_render_cache_key("abc123", "", {"a": 1}, False)
+    assert get_render_cache_key("def456", "", {"a": 1}, False) != base
+    assert get_render_cache_key("abc123", "sub", {"a": 1}, False) != base
+    assert get_render_cache_key("abc123", "", {"a": 2}, False) != base
+    assert get_render_cache_key("abc123", "", {"a": 1}, True) != base
+
+
+def test_render_cache_put_and_get(tmp_path: Path):
+    """A stored tree is copied back on a hit."""
+    cache = RenderCache(tmp_path / "cache")
+    source = make_tree(tmp_path / "source")
+
+    assert not cache.get("key", tmp_path / "missing")
+    cache.put("key", source)
+
+    destination = tmp_path / "destination"
+    assert cache.get("key", destination)
+    assert destination.joinpath("README.md").read_text() == "content"
+    assert destination.joinpath("subdir", "file.txt").read_text() == "content"
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path: Path):
+    """Entries used least recently are evicted when the cache is too big."""
+    cache = RenderCache(tmp_path / "cache", max_size=45)
+    cache.put("first", make_tree(tmp_path / "first", "0123456789"))
+    cache.put("second", make_tree(tmp_path / "second", "0123456789"))
+    os.utime(cache.entry_path("first"), (1, 1))
+    os.utime(cache.entry_path("second"), (2, 2))
+    assert cache.get("first", tmp_path / "used")  # Makes "first" the most recently used
+
+    cache.put("third", make_tree(tmp_path / "third", "0123456789"))
+
+    assert cache.entry_path("first").exists()
+    assert not cache.entry_path("second").exists()
+    assert cache.entry_path("third").exists()
+
+
+def test_render_layer_uses_cache_for_commits(fixtures_path: Path, tmp_path: Path, mocker):
+    """Rendering a layer at a specific commit twice only generates the files once."""
+    git_tmpl_path = copytree(fixtures_path / "template1", tmp_path / "template1")
+    repo = Repo.init(str(git_tmpl_path))
+    repo.git.add(".")
+    repo.index.commit(message="A commit", committer=Actor("Bob", "bob@example.com"))
+    commit = repo.head.commit.hexsha
+    template = Template(repo=get_template_repo(str(git_tmpl_path), tmp_path))
+    generate_spy = mocker.spy(layers, "generate_files")
+
+    first = layers.render_layer(LayerConfig(template=template, no_input=True), tmp_path / "first", commit=commit)
+    second = layers.render_layer(LayerConfig(template=template, no_input=True), tmp_path / "second", commit=commit)
+
+    assert generate_spy.call_count == 1
+    assert first.rendered_context == second.rendered_context
+    first_files = {p.relative_to(tmp_path / "first") for p in (tmp_path / "first").rglob("*")}
+    second_files = {p.relative_to(tmp_path / "second") for p in (tmp_path / "second").rglob("*")}
+    assert first_files == second_files
+    assert len(get_render_cache().entries()) == 1
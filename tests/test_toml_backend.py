@@ -0,0 +1,84 @@
+"""Test the TOML parsing and serializing backends."""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+import toml
+from immutabledict import immutabledict
+
+from cookie_composer import toml_backend
+from cookie_composer.data_merge import COMPREHENSIVE
+from cookie_composer.merge_files import toml_file
+
+LAYOUT = """# The project configuration
+[project]
+name = "example"  # The distribution name
+dependencies = [
+    "requests",
+]
+
+[tool.example]
+number = 1
+dotted.a = 1
+dotted.b = [1, 2]
+"""
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="tomllib is new in Python 3.11")
+def test_parser_prefers_tomllib():
+    """The standard library parser is used when it is available."""
+    assert toml_backend.get_parser()[0] == toml_backend.TOMLLIB
+
+
+def test_dumps_keeps_the_layout_of_unchanged_values():
+    """Comments and formatting are kept, and changed values are replaced."""
+    pytest.importorskip("tomlkit")
+    data = toml_backend.loads(LAYOUT)
+    data["tool"]["example"]["number"] = 2
+    del data["tool"]["example"]["dotted"]["a"]
+    data["tool"]["example"]["new"] = immutabledict({"list": (1, 2)})
+
+    text = toml_backend.dumps(data, LAYOUT)
+
+    assert text.startswith('# The project configuration\n[project]\nname = "example"  # The distribution name\n')
+    assert 'dependencies = [\n    "requests",\n]' in text
+    assert toml_backend.loads(text) == toml_backend.thaw(data)
+
+
+def test_dumps_returns_the_layout_of_unchanged_data():
+    """Data that didn't change is serialized as the existing document."""
+    pytest.importorskip("tomlkit")
+
+    assert toml_backend.dumps(toml_backend.loads(LAYOUT), LAYOUT) == LAYOUT
+
+
+def test_dumps_replaces_values_of_a_different_type():
+    """Values that are equal but of a different type are replaced."""
+    text = toml_backend.dumps({"a": 1.0, "b": True}, "a = 1\nb = 1\n")
+
+    assert toml_backend.loads(text) == {"a": 1.0, "b": True}
+    assert isinstance(toml_backend.loads(text)["a"], float)
+
+
+def test_dumps_without_tomlkit_uses_toml(mocker):
+    """Without tomlkit, the document is laid out by toml."""
+    mocker.patch.object(toml_backend, "get_writer", return_value=toml_backend.TOML)
+    data = {"project": {"name": "example"}}
+
+    assert toml_backend.dumps(data, LAYOUT) == toml.dumps(data)
+    assert toml_backend.dumps(data, LAYOUT, writer=toml_backend.TOML) == toml.dumps(data)
+
+
+def test_merging_keeps_comments_of_the_existing_file(tmp_path: Path, fixtures_path: Path):
+    """Merging a TOML file keeps the comments in the destination."""
+    pytest.importorskip("tomlkit")
+    existing_file = tmp_path / "existing.toml"
+    existing_file.write_text(f"# Keep this comment\n{(fixtures_path / 'existing.toml').read_text()}")
+    shutil.copy(fixtures_path / "new.toml", tmp_path / "new.toml")
+
+    toml_file.merge_toml_files(tmp_path / "new.toml", existing_file, COMPREHENSIVE)
+
+    assert existing_file.read_text().startswith("# Keep this comment\n")
+    assert toml.load(existing_file)["section1"]["number"] == 2
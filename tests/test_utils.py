@@ -29,6 +29,50 @@ def test_get_context_for_layer(fixtures_path: Path):
     assert result4 == result3
 
 
+def test_get_context_for_layer_caches_prefix_contexts(fixtures_path: Path, mocker):
+    """The merged contexts are computed once, and only new layers are merged when layers are added."""
+    from cookie_composer import composition
+
+    rendered_comp = read_rendered_composition(fixtures_path / "rendered_composition.yaml")
+    merge_spy = mocker.spy(composition, "comprehensive_merge")
+
+    contexts = [get_context_for_layer(rendered_comp, index) for index in range(len(rendered_comp.layers))]
+    assert merge_spy.call_count == len(rendered_comp.layers)
+
+    with pytest.raises(TypeError):
+        contexts[0]["modified"] = True
+    assert get_context_for_layer(rendered_comp, 0) is contexts[0]
+    merge_spy.reset_mock()
+    assert [get_context_for_layer(rendered_comp, index) for index in range(len(contexts))] == contexts
+    assert merge_spy.call_count == 0
+
+    new_layer = rendered_comp.layers[0].model_copy(update={"rendered_context": {"new_key": "value"}})
+    rendered_comp.layers.append(new_layer)
+    merge_spy.reset_mock()
+
+    assert get_context_for_layer(rendered_comp) == {**contexts[-1], "new_key": "value"}
+    assert merge_spy.call_count == 1
+
+    rendered_comp.layers[0] = new_layer
+    assert "_docs_requirements" in get_context_for_layer(rendered_comp, 2)
+    assert get_context_for_layer(rendered_comp, 0) == {"new_key": "value"}
+
+    del rendered_comp.layers[1:]
+    assert get_context_for_layer(rendered_comp) == {"new_key": "value"}
+
+
+def test_get_context_for_layer_keeps_garbage_collected_layers_apart(fixtures_path: Path):
+    """A replaced layer is detected after the caller drops its last reference to it."""
+    rendered_comp = read_rendered_composition(fixtures_path / "rendered_composition.yaml")
+    layer = rendered_comp.layers[0]
+    get_context_for_layer(rendered_comp, 0)
+
+    rendered_comp.layers[0] = layer.model_copy(update={"rendered_context": {"replaced": True}})
+    del layer
+
+    assert get_context_for_layer(rendered_comp, 0) == {"replaced": True}
+
+
 def test_remove_single_path(tmp_path: Path):
     """It should remove a single path."""
     path = tmp_path / "file.txt"
@@ -47,3 +91,27 @@ def test_remove_single_path(tmp_path: Path):
     file_path.touch()
     utils.remove_single_path(dir_path)
     assert not dir_path.exists()
+
+
+def test_temporary_render_dir_in_memory(tmp_path: Path, monkeypatch):
+    """An in-memory render directory is created in a memory-backed directory."""
+    memory_dir = tmp_path / "shm"
+    memory_dir.mkdir()
+    monkeypatch.setattr(utils, "MEMORY_BACKED_DIRS", [memory_dir])
+
+    with utils.temporary_render_dir(in_memory=True) as render_dir:
+        assert render_dir.parent == memory_dir
+        assert render_dir.is_dir()
+    assert not render_dir.exists()
+
+
+def test_temporary_render_dir_falls_back(tmp_path: Path, monkeypatch):
+    """Without a memory-backed directory, the default temporary directory is used."""
+    import tempfile
+
+    monkeypatch.setattr(utils, "MEMORY_BACKED_DIRS", [tmp_path / "missing"])
+
+    with utils.temporary_render_dir(in_memory=True) as render_dir:
+        assert render_dir.parent == Path(tempfile.gettempdir())
+        assert render_dir.is_dir()
+    assert not render_dir.exists()
@@ -0,0 +1,74 @@
+"""Test the YAML loading and dumping backends."""
+
+import io
+
+import pytest
+from immutabledict import immutabledict
+from ruamel.yaml import YAMLError
+
+from cookie_composer import yaml_backend
+
+STREAMS = [
+    "a: 1\nb: 010\nc: 0o17\nd: 0x1F\ne: 0b101\nf: -1_000\ng: +12\nh: 0",
+    "a: yes\nb: on\nc: True\nd: FALSE\ne: ~\nf: null\ng:",
+    "a: 1.5\nb: .inf\nc: -.INF\nd: 1e3\ne: .5\nf: 1:20",
+    "a: 2001-12-14t21:59:43.10-05:00\nb: 2002-12-14\nc: 2001-12-14 21:59:43.10",
+    "a: 'quoted 1'\nb: \"2\"\nc: |\n  block\nd: !!str 1\ne: !!int '3'",
+    "x: &anchor [1, 2]\ny: *anchor\n? [1, 2]\n: complex key",
+    "base: &base {x: 1}\nderived:\n  <<: *base\n  y: 2",
+    "%YAML 1.1\n---\na: yes\nb: 010",
+    "a: !!binary aGVsbG8=\nb: !!set {x, y}\nc: !!omap [{a: 1}]",
+    "---\na: 1\n---\n- b\n- 2\n",
+    "",
+]
+
+INVALID_STREAMS = ["a: [b", "a: 1\na: 2", "a: ="]
+
+
+@pytest.mark.parametrize("backend", yaml_backend.get_available_backends())
+@pytest.mark.parametrize("stream", STREAMS)
+def test_backends_load_the_same_data(backend: str, stream: str):
+    """Every backend loads the same data as the pure-Python loader."""
+    expected = yaml_backend.load_all_yaml(stream, yaml_backend.PURE_PYTHON)
+
+    assert yaml_backend.load_all_yaml(stream, backend) == expected
+    assert yaml_backend.load_all_yaml(stream.encode(), backend) == expected
+
+
+@pytest.mark.parametrize("backend", yaml_backend.get_available_backends())
+@pytest.mark.parametrize("stream", INVALID_STREAMS)
+def test_backends_raise_the_same_errors(backend: str, stream: str):
+    """Every backend raises the pure-Python loader's errors."""
+    with pytest.raises(YAMLError) as expected:
+        yaml_backend.load_yaml(stream, yaml_backend.PURE_PYTHON)
+
+    with pytest.raises(YAMLError) as actual:
+        yaml_backend.load_yaml(stream, backend)
+
+    assert actual.type is expected.type
+
+
+def test_load_yaml_requires_a_single_document():
+    """Loading a single document from a stream of several raises an error."""
+    with pytest.raises(YAMLError):
+        yaml_backend.load_yaml("---\na: 1\n---\nb: 2\n")
+
+
+def test_unavailable_backend_raises_error():
+    """Asking for a backend that isn't installed raises a ValueError."""
+    with pytest.raises(ValueError):
+        yaml_backend.load_yaml("a: 1", "unknown")
+
+
+def test_pure_python_is_the_last_backend():
+    """The pure-Python loader is always available, as the last resort."""
+    assert yaml_backend.get_available_backends()[-1] == yaml_backend.PURE_PYTHON
+
+
+def test_dumped_yaml_indents_sequences():
+    """Dumped documents use the configured indentation and convert immutable dicts."""
+    stream = io.StringIO()
+
+    yaml_backend.dump_all_yaml([immutabledict({"a": ["b", {"c": 1}]}), {"d": 2}], stream)
+
+    assert stream.getvalue() == "a:\n  - b\n  - c: 1\n---\nd: 2\n"